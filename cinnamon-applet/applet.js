@@ -2,6 +2,8 @@ const Applet = imports.ui.applet;
 const PopupMenu = imports.ui.popupMenu;
 const St = imports.gi.St;
 const GLib = imports.gi.GLib;
+const Gio = imports.gi.Gio;
+const ByteArray = imports.byteArray;
 const Mainloop = imports.mainloop;
 const Util = imports.misc.util;
 
@@ -59,6 +61,24 @@ function getTranslator() {
     };
 }
 
+// Control socket of the daemon: socket_path from its config file
+// ($XDG_CONFIG_HOME/redragon-hs-companion/config.json) if set
+function controlSocketPath() {
+    let configPath = GLib.get_user_config_dir() + '/redragon-hs-companion/config.json';
+    try {
+        let [, contents] = GLib.file_get_contents(configPath);
+        let socketPath = JSON.parse(ByteArray.toString(contents)).socket_path;
+        if (typeof socketPath === 'string' && socketPath !== '') return socketPath;
+    } catch (e) {
+        // Missing or invalid config: the daemon uses its default too
+    }
+    return GLib.get_user_runtime_dir() + '/redragon-control.sock';
+}
+
+// Reader of the control daemon's state page, shared with the GNOME
+// extension (gnome-extension/statePage.js, installed next to this file)
+const StatePage = imports.ui.appletManager.applets['redragon-volume-sync@cristiano'].statePage;
+
 class RedragonVolumeApplet extends Applet.TextIconApplet {
     constructor(metadata, orientation, panel_height, instance_id) {
         super(orientation, panel_height, instance_id);
@@ -79,6 +99,11 @@ class RedragonVolumeApplet extends Applet.TextIconApplet {
             this._updatingSlider = false;
             this._volumeChangeTimeout = null;
             this._monitoringTimeout = null;
+            this._subscribed = false;
+            this._subscribeCancellable = null;
+            this._connection = null;
+            this._eventStream = null;
+            this._lastLocalChange = 0;
 
             // Script path
             this.scriptPath = GLib.get_home_dir() + '/.local/bin/redragon-volume';
@@ -202,6 +227,9 @@ class RedragonVolumeApplet extends Applet.TextIconApplet {
 
         try {
             Util.spawn_async([this.scriptPath, 'mute'], () => {
+                // Subscribed: the new volume is pushed by the daemon
+                if (this._subscribed) return;
+
                 // After muting, update the volume
                 Mainloop.timeout_add(100, () => {
                     this.updateVolume();
@@ -220,6 +248,25 @@ class RedragonVolumeApplet extends Applet.TextIconApplet {
             return;
         }
 
+        // The daemon's state page answers without spawning anything
+        let page = StatePage.readStatePage();
+        if (page !== null) {
+            let state = page.headsets[0];
+            if (state) {
+                if (!this.isConnected || this.deviceName !== state.device) {
+                    this.deviceName = state.device;
+                    this.isConnected = true;
+                    this.statusLabel.set_text("✓ " + this.deviceName);
+                    this._findSinkName();
+                }
+                if (state.volume !== null) this._applyVolume(state.volume);
+            } else {
+                this.isConnected = false;
+                this.statusLabel.set_text("❌ " + this._('not_found'));
+            }
+            return;
+        }
+
         try {
             Util.spawn_async([this.scriptPath, 'status'], (stdout) => {
                 let output = stdout.toString();
@@ -248,27 +295,12 @@ class RedragonVolumeApplet extends Applet.TextIconApplet {
     }
 
     _findSinkName() {
-        try {
-            let [success, stdout] = GLib.spawn_command_line_sync('pactl list sinks short');
-            if (success) {
-                let output = stdout.toString();
-                // Search for line containing XiiSound, Weltrend, Redragon or H878
-                let lines = output.split('\n');
-                for (let line of lines) {
-                    if (line.includes('XiiSound') || line.includes('Weltrend') ||
-                        line.includes('Redragon') || line.includes('H878')) {
-                        // Formato: ID  NAME  MODULE  ...
-                        let parts = line.split(/\s+/);
-                        if (parts.length >= 2) {
-                            this.sinkName = parts[1];
-                            break;
-                        }
-                    }
-                }
+        // Served from the daemon's sink index, pactl never runs on the Cinnamon thread
+        this._sendCommand('sink', (response) => {
+            if (response && response.startsWith('OK: ')) {
+                this.sinkName = response.substring(4).trim();
             }
-        } catch (e) {
-            global.logError("Redragon: Error searching sink: " + e);
-        }
+        });
     }
 
     setAsDefaultSink() {
@@ -276,43 +308,34 @@ class RedragonVolumeApplet extends Applet.TextIconApplet {
             return;
         }
 
-        try {
-            Util.spawn_async(['pactl', 'set-default-sink', this.sinkName], () => {
-                // Show success notification
-                let message = this._('set_as_default', this.deviceName);
-                Util.spawnCommandLine('notify-send "Redragon Volume" "' +
-                    message + '" -i audio-headphones');
-            });
-        } catch (e) {
-            global.logError("Redragon: Error setting default sink: " + e);
-        }
+        this._sendCommand('set-default', (response) => {
+            if (!response || !response.startsWith('OK:')) {
+                global.logError("Redragon: Error setting default sink: " + response);
+                return;
+            }
+
+            // Show success notification
+            let message = this._('set_as_default', this.deviceName);
+            Util.spawnCommandLine('notify-send "Redragon Volume" "' +
+                message + '" -i audio-headphones');
+        });
     }
 
     updateVolume() {
         if (!this.isConnected) return;
 
+        let page = StatePage.readStatePage();
+        if (page !== null && page.headsets.length > 0 && page.headsets[0].volume !== null) {
+            this._applyVolume(page.headsets[0].volume);
+            return;
+        }
+
         try {
             Util.spawn_async([this.scriptPath, 'get'], (stdout) => {
                 let output = stdout.toString();
                 let match = output.match(/Volume:\s*(\d+)%/);
                 if (match) {
-                    this.currentVolume = parseInt(match[1]);
-                    this.isMuted = (this.currentVolume === 0);
-
-                    this.volumeLabel.set_text(this.currentVolume + " %");
-                    this.set_applet_label(this.currentVolume + "%");
-                    this._updateIcon();
-
-                    // Update mute button text
-                    if (this.muteItem) {
-                        let muteText = this.isMuted ? "🔊 " + this._('unmute') : "🔇 " + this._('mute');
-                        this.muteItem.label.set_text(muteText);
-                    }
-
-                    // Update slider without triggering event
-                    this._updatingSlider = true;
-                    this.volumeSlider.setValue(this.currentVolume / 100.0);
-                    this._updatingSlider = false;
+                    this._applyVolume(parseInt(match[1]));
                 }
             });
         } catch (e) {
@@ -320,10 +343,31 @@ class RedragonVolumeApplet extends Applet.TextIconApplet {
         }
     }
 
+    _applyVolume(volume) {
+        this.currentVolume = volume;
+        this.isMuted = (this.currentVolume === 0);
+
+        this.volumeLabel.set_text(this.currentVolume + " %");
+        this.set_applet_label(this.currentVolume + "%");
+        this._updateIcon();
+
+        // Update mute button text
+        if (this.muteItem) {
+            let muteText = this.isMuted ? "🔊 " + this._('unmute') : "🔇 " + this._('mute');
+            this.muteItem.label.set_text(muteText);
+        }
+
+        // Update slider without triggering event
+        this._updatingSlider = true;
+        this.volumeSlider.setValue(this.currentVolume / 100.0);
+        this._updatingSlider = false;
+    }
+
     onSliderChanged(value) {
         if (this._updatingSlider || !this.isConnected) return;
 
         let volume = Math.round(value * 100);
+        this._lastLocalChange = GLib.get_monotonic_time();
 
         // Immediate visual feedback
         this.currentVolume = volume;
@@ -360,6 +404,8 @@ class RedragonVolumeApplet extends Applet.TextIconApplet {
         let newVolume = Math.max(0, Math.min(100, this.currentVolume + delta));
 
         if (newVolume !== this.currentVolume) {
+            this._lastLocalChange = GLib.get_monotonic_time();
+
             // Update UI immediately
             this.currentVolume = newVolume;
             this.isMuted = (newVolume === 0);
@@ -378,6 +424,13 @@ class RedragonVolumeApplet extends Applet.TextIconApplet {
     }
 
     startMonitoring() {
+        // Receive changes pushed by the control daemon, poll only if that fails
+        this._subscribe();
+    }
+
+    _startPolling() {
+        if (this._monitoringTimeout) return;
+
         // Update every 3 seconds
         this._monitoringTimeout = Mainloop.timeout_add_seconds(3, () => {
             if (this.isConnected) {
@@ -385,14 +438,143 @@ class RedragonVolumeApplet extends Applet.TextIconApplet {
             } else {
                 this.detectDevice();
             }
+
+            // Keep trying to get back to push updates
+            this._subscribe();
             return true;
         });
     }
 
-    on_applet_removed_from_panel() {
+    _stopPolling() {
         if (this._monitoringTimeout) {
             Mainloop.source_remove(this._monitoringTimeout);
+            this._monitoringTimeout = null;
         }
+    }
+
+    _sendCommand(command, callback) {
+        // One-shot request to the control daemon, answered asynchronously
+        let socketPath = controlSocketPath();
+        let client = new Gio.SocketClient();
+
+        client.connect_async(new Gio.UnixSocketAddress({path: socketPath}), null, (obj, res) => {
+            let connection;
+            try {
+                connection = obj.connect_finish(res);
+                connection.get_output_stream().write_all(ByteArray.fromString(command), null);
+            } catch (e) {
+                callback(null);
+                return;
+            }
+
+            // The daemon closes the connection after its response
+            let stream = new Gio.DataInputStream({base_stream: connection.get_input_stream()});
+            stream.read_line_async(GLib.PRIORITY_DEFAULT, null, (stream, res) => {
+                let line = null;
+                try {
+                    [line] = stream.read_line_finish_utf8(res);
+                } catch (e) {
+                    // Reported as no response
+                }
+                connection.close(null);
+                callback(line);
+            });
+        });
+    }
+
+    _subscribe() {
+        if (this._subscribed || this._subscribeCancellable) return;
+
+        let socketPath = controlSocketPath();
+        let client = new Gio.SocketClient();
+        this._subscribeCancellable = new Gio.Cancellable();
+
+        client.connect_async(new Gio.UnixSocketAddress({path: socketPath}), this._subscribeCancellable, (obj, res) => {
+            try {
+                this._connection = obj.connect_finish(res);
+                this._connection.get_output_stream().write_all(ByteArray.fromString('subscribe'), null);
+                this._eventStream = new Gio.DataInputStream({base_stream: this._connection.get_input_stream()});
+                this._readEvent();
+            } catch (e) {
+                this._onSubscriptionLost();
+            }
+        });
+    }
+
+    _readEvent() {
+        this._eventStream.read_line_async(GLib.PRIORITY_DEFAULT, this._subscribeCancellable, (stream, res) => {
+            let line;
+            try {
+                [line] = stream.read_line_finish_utf8(res);
+            } catch (e) {
+                this._onSubscriptionLost();
+                return;
+            }
+            if (line === null) {
+                // Daemon closed the connection (restart/stop)
+                this._onSubscriptionLost();
+                return;
+            }
+
+            if (line.startsWith('OK: subscribed')) {
+                this._subscribed = true;
+                this._stopPolling();
+            } else if (line.startsWith('EVENT:')) {
+                this._onStateEvent(line);
+            }
+            this._readEvent();
+        });
+    }
+
+    _onStateEvent(line) {
+        // Parse: EVENT: device=H878 Wireless headset card=3 ... volume=75
+        let deviceMatch = line.match(/device=([^\s]+(?:\s+[^\s]+)*?)\s+card=/);
+        let volumeMatch = line.match(/volume=(\d+)/);
+
+        if (!deviceMatch || !volumeMatch) {
+            this.isConnected = false;
+            this.statusLabel.set_text("❌ " + this._('not_found'));
+            return;
+        }
+
+        if (!this.isConnected || this.deviceName !== deviceMatch[1]) {
+            this.deviceName = deviceMatch[1];
+            this.isConnected = true;
+            this.statusLabel.set_text("✓ " + this.deviceName);
+            this._findSinkName();
+        }
+
+        // Don't move the slider under the user's hand (older values still in flight)
+        if (GLib.get_monotonic_time() - this._lastLocalChange < 500000) return;
+        this._applyVolume(parseInt(volumeMatch[1]));
+    }
+
+    _onSubscriptionLost() {
+        this._closeSubscription();
+        this._startPolling();
+    }
+
+    _closeSubscription() {
+        this._subscribed = false;
+        if (this._subscribeCancellable) {
+            this._subscribeCancellable.cancel();
+            this._subscribeCancellable = null;
+        }
+        if (this._connection) {
+            try {
+                this._connection.close(null);
+            } catch (e) {
+                // Already closed
+            }
+            this._connection = null;
+        }
+        this._eventStream = null;
+    }
+
+    on_applet_removed_from_panel() {
+        this._closeSubscription();
+        this._stopPolling();
+        StatePage.closeStatePage();
         if (this._volumeChangeTimeout) {
             Mainloop.source_remove(this._volumeChangeTimeout);
         }
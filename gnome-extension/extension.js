@@ -17,6 +17,21 @@ import * as Main from 'resource:///org/gnome/shell/ui/main.js';
 import * as Slider from 'resource:///org/gnome/shell/ui/slider.js';
 
 import {Translator} from './translations.js';
+import {closeStatePage, readStatePage} from './statePage.js';
+
+// Control socket of the daemon: socket_path from its config file
+// ($XDG_CONFIG_HOME/redragon-hs-companion/config.json) if set
+function controlSocketPath() {
+    let configPath = GLib.build_filenamev([GLib.get_user_config_dir(), 'redragon-hs-companion', 'config.json']);
+    try {
+        let [, contents] = GLib.file_get_contents(configPath);
+        let socketPath = JSON.parse(new TextDecoder().decode(contents)).socket_path;
+        if (typeof socketPath === 'string' && socketPath !== '') return socketPath;
+    } catch (e) {
+        // Missing or invalid config: the daemon uses its default too
+    }
+    return GLib.build_filenamev([GLib.get_user_runtime_dir(), 'redragon-control.sock']);
+}
 
 const RedragonIndicator = GObject.registerClass(
 class RedragonIndicator extends PanelMenu.Button {
@@ -32,6 +47,11 @@ class RedragonIndicator extends PanelMenu.Button {
         this._sinkName = null;
         this._syncTimeout = null;
         this._volumeChangeTimeout = null;
+        this._subscribed = false;
+        this._subscribeCancellable = null;
+        this._connection = null;
+        this._eventStream = null;
+        this._lastLocalChange = 0;
         this._updatingSlider = false;
         this._translator = new Translator();
 
@@ -188,6 +208,7 @@ class RedragonIndicator extends PanelMenu.Button {
         let newVolume = Math.max(0, Math.min(100, this._currentVolume + delta));
 
         if (newVolume !== this._currentVolume) {
+            this._lastLocalChange = GLib.get_monotonic_time();
             // Update UI immediately for instant feedback
             this._currentVolume = newVolume;
             this._isMuted = (newVolume === 0);
@@ -213,6 +234,13 @@ class RedragonIndicator extends PanelMenu.Button {
         // Detect the headset initially
         this._detectHeadset();
 
+        // Receive changes pushed by the control daemon, poll only if that fails
+        this._subscribe();
+    }
+
+    _startPolling() {
+        if (this._syncTimeout) return;
+
         // Monitor every 2 seconds
         this._syncTimeout = GLib.timeout_add_seconds(GLib.PRIORITY_DEFAULT, 2, () => {
             // Update the volume whenever the headset is connected
@@ -222,11 +250,161 @@ class RedragonIndicator extends PanelMenu.Button {
                 // If not connected, try to detect
                 this._detectHeadset();
             }
+
+            // Keep trying to get back to push updates
+            this._subscribe();
             return GLib.SOURCE_CONTINUE;
         });
     }
 
+    _stopPolling() {
+        if (this._syncTimeout) {
+            GLib.source_remove(this._syncTimeout);
+            this._syncTimeout = null;
+        }
+    }
+
+    _sendCommand(command, callback) {
+        // One-shot request to the control daemon, answered asynchronously
+        let socketPath = controlSocketPath();
+        let client = new Gio.SocketClient();
+
+        client.connect_async(new Gio.UnixSocketAddress({path: socketPath}), null, (obj, res) => {
+            let connection;
+            try {
+                connection = obj.connect_finish(res);
+                connection.get_output_stream().write_all(new TextEncoder().encode(command), null);
+            } catch (e) {
+                callback(null);
+                return;
+            }
+
+            // The daemon closes the connection after its response
+            let stream = new Gio.DataInputStream({base_stream: connection.get_input_stream()});
+            stream.read_line_async(GLib.PRIORITY_DEFAULT, null, (stream, res) => {
+                let line = null;
+                try {
+                    [line] = stream.read_line_finish_utf8(res);
+                } catch (e) {
+                    // Reported as no response
+                }
+                connection.close(null);
+                callback(line);
+            });
+        });
+    }
+
+    _subscribe() {
+        if (this._subscribed || this._subscribeCancellable) return;
+
+        let socketPath = controlSocketPath();
+        let client = new Gio.SocketClient();
+        this._subscribeCancellable = new Gio.Cancellable();
+
+        client.connect_async(new Gio.UnixSocketAddress({path: socketPath}), this._subscribeCancellable, (obj, res) => {
+            try {
+                this._connection = obj.connect_finish(res);
+                this._connection.get_output_stream().write_all(new TextEncoder().encode('subscribe'), null);
+                this._eventStream = new Gio.DataInputStream({base_stream: this._connection.get_input_stream()});
+                this._readEvent();
+            } catch (e) {
+                this._onSubscriptionLost();
+            }
+        });
+    }
+
+    _readEvent() {
+        this._eventStream.read_line_async(GLib.PRIORITY_DEFAULT, this._subscribeCancellable, (stream, res) => {
+            let line;
+            try {
+                [line] = stream.read_line_finish_utf8(res);
+            } catch (e) {
+                this._onSubscriptionLost();
+                return;
+            }
+            if (line === null) {
+                // Daemon closed the connection (restart/stop)
+                this._onSubscriptionLost();
+                return;
+            }
+
+            if (line.startsWith('OK: subscribed')) {
+                this._subscribed = true;
+                this._stopPolling();
+            } else if (line.startsWith('EVENT:')) {
+                this._onStateEvent(line);
+            }
+            this._readEvent();
+        });
+    }
+
+    _onStateEvent(line) {
+        // Parse: EVENT: device=H878 Wireless headset card=3 ... volume=75
+        let deviceMatch = line.match(/device=([^\s]+(?:\s+[^\s]+)*?)\s+card=/);
+        let volumeMatch = line.match(/volume=(\d+)/);
+
+        if (!deviceMatch || !volumeMatch) {
+            this._isConnected = false;
+            this._deviceName = "Redragon";
+            this._statusLabel.text = '❌ ' + this._translator._('not_found');
+            return;
+        }
+
+        if (!this._isConnected || this._deviceName !== deviceMatch[1]) {
+            this._deviceName = deviceMatch[1];
+            this._isConnected = true;
+            this._statusLabel.text = '✓ ' + this._deviceName;
+            this._findSinkName();
+        }
+
+        // Don't move the slider under the user's hand (older values still in flight)
+        if (GLib.get_monotonic_time() - this._lastLocalChange < 500000) return;
+        this._applyVolume(parseInt(volumeMatch[1]));
+    }
+
+    _onSubscriptionLost() {
+        this._closeSubscription();
+        this._startPolling();
+    }
+
+    _closeSubscription() {
+        this._subscribed = false;
+        if (this._subscribeCancellable) {
+            this._subscribeCancellable.cancel();
+            this._subscribeCancellable = null;
+        }
+        if (this._connection) {
+            try {
+                this._connection.close(null);
+            } catch (e) {
+                // Already closed
+            }
+            this._connection = null;
+        }
+        this._eventStream = null;
+    }
+
     _detectHeadset() {
+        // The daemon's state page answers without spawning anything
+        let page = readStatePage();
+        if (page !== null) {
+            let state = page.headsets[0];
+            if (state) {
+                if (!this._isConnected || this._deviceName !== state.device) {
+                    this._deviceName = state.device;
+                    this._isConnected = true;
+                    this._statusLabel.text = '✓ ' + this._deviceName;
+                    this._findSinkName();
+                }
+                if (state.volume !== null) this._applyVolume(state.volume);
+            } else {
+                this._isConnected = false;
+                this._deviceName = "Redragon";
+                this._statusLabel.text = '❌ ' + this._translator._('not_found');
+            }
+            return;
+        }
+
         try {
             let scriptPath = GLib.build_filenamev([GLib.get_home_dir(), '.local', 'bin', 'redragon-volume']);
             let [success, stdout, stderr] = GLib.spawn_command_line_sync(`${scriptPath} status`);
@@ -258,30 +436,23 @@ class RedragonIndicator extends PanelMenu.Button {
     }
 
     _findSinkName() {
-        try {
-            let [success, stdout] = GLib.spawn_command_line_sync('pactl list sinks short');
-            if (success) {
-                let output = new TextDecoder().decode(stdout);
-                let lines = output.split('\n');
-                for (let line of lines) {
-                    if (line.includes('XiiSound') || line.includes('Weltrend') ||
-                        line.includes('Redragon') || line.includes('H878')) {
-                        let parts = line.split(/\s+/);
-                        if (parts.length >= 2) {
-                            this._sinkName = parts[1];
-                            break;
-                        }
-                    }
-                }
+        // Served from the daemon's sink index, pactl never runs on the shell thread
+        this._sendCommand('sink', (response) => {
+            if (response && response.startsWith('OK: ')) {
+                this._sinkName = response.substring(4).trim();
             }
-        } catch (e) {
-            log(`Redragon: Error finding sink: ${e}`);
-        }
+        });
     }
 
     _getVolume() {
         if (!this._isConnected) return;
 
+        let page = readStatePage();
+        if (page !== null && page.headsets.length > 0 && page.headsets[0].volume !== null) {
+            this._applyVolume(page.headsets[0].volume);
+            return;
+        }
+
         try {
             let scriptPath = GLib.build_filenamev([GLib.get_home_dir(), '.local', 'bin', 'redragon-volume']);
             let [success, stdout, stderr] = GLib.spawn_command_line_sync(`${scriptPath} get`);
@@ -291,26 +462,7 @@ class RedragonIndicator extends PanelMenu.Button {
                 // Parse: Volume: 75%
                 let match = output.match(/Volume:\s*(\d+)%/);
                 if (match) {
-                    this._currentVolume = parseInt(match[1]);
-                    this._isMuted = (this._currentVolume === 0);
-                    
-                    // Update volume label
-                    this._volumeLabel.text = this._currentVolume + ' %';
-                    
-                    // Update icon
-                    this._updateIcon();
-                    
-                    // Update mute button text
-                    if (this._isMuted) {
-                        this._muteButton.label.text = '🔊 ' + this._translator._('unmute');
-                    } else {
-                        this._muteButton.label.text = '🔇 ' + this._translator._('mute');
-                    }
-                    
-                    // Update slider without triggering event
-                    this._updatingSlider = true;
-                    this._slider.value = this._currentVolume / 100.0;
-                    this._updatingSlider = false;
+                    this._applyVolume(parseInt(match[1]));
                 }
             }
         } catch (e) {
@@ -318,13 +470,39 @@ class RedragonIndicator extends PanelMenu.Button {
         }
     }
 
+    _applyVolume(volume) {
+        this._currentVolume = volume;
+        this._isMuted = (this._currentVolume === 0);
+
+        // Update volume label
+        this._volumeLabel.text = this._currentVolume + ' %';
+
+        // Update icon
+        this._updateIcon();
+
+        // Update mute button text
+        if (this._isMuted) {
+            this._muteButton.label.text = '🔊 ' + this._translator._('unmute');
+        } else {
+            this._muteButton.label.text = '🔇 ' + this._translator._('mute');
+        }
+
+        // Update slider without triggering event
+        this._updatingSlider = true;
+        this._slider.value = this._currentVolume / 100.0;
+        this._updatingSlider = false;
+    }
+
     _toggleMute() {
         if (!this._isConnected) return;
 
         try {
             let scriptPath = GLib.build_filenamev([GLib.get_home_dir(), '.local', 'bin', 'redragon-volume']);
             GLib.spawn_command_line_async(`${scriptPath} mute`);
-            
+
+            // Subscribed: the new volume is pushed by the daemon
+            if (this._subscribed) return;
+
             // Update volume after a brief delay
             GLib.timeout_add(GLib.PRIORITY_DEFAULT, 100, () => {
                 this._getVolume();
@@ -340,20 +518,22 @@ class RedragonIndicator extends PanelMenu.Button {
             return;
         }
 
-        try {
-            GLib.spawn_command_line_async(`pactl set-default-sink ${this._sinkName}`);
-            
+        this._sendCommand('set-default', (response) => {
+            if (!response || !response.startsWith('OK:')) {
+                log(`Redragon: Error setting default sink: ${response}`);
+                return;
+            }
+
             let message = this._translator._('set_as_default', {device: this._deviceName});
             GLib.spawn_command_line_async(`notify-send "Redragon Volume" "${message}" -i audio-headphones`);
-        } catch (e) {
-            log(`Redragon: Error setting default sink: ${e}`);
-        }
+        });
     }
 
     _onSliderChanged() {
         if (!this._isConnected || this._updatingSlider) return;
 
         let volume = Math.round(this._slider.value * 100);
+        this._lastLocalChange = GLib.get_monotonic_time();
         
         // Immediate visual feedback
         this._currentVolume = volume;
@@ -380,10 +560,9 @@ class RedragonIndicator extends PanelMenu.Button {
 
 
     destroy() {
-        if (this._syncTimeout) {
-            GLib.source_remove(this._syncTimeout);
-            this._syncTimeout = null;
-        }
+        this._closeSubscription();
+        this._stopPolling();
+        closeStatePage();
         if (this._volumeChangeTimeout) {
             GLib.source_remove(this._volumeChangeTimeout);
             this._volumeChangeTimeout = null;
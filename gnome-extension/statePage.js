@@ -0,0 +1,110 @@
+/* statePage.js
+ *
+ * Reader of the control daemon's state page ($XDG_RUNTIME_DIR/redragon-state,
+ * layout described in redragon_state.py): headset state without spawning
+ * redragon-volume or connecting to the daemon
+ *
+ * Shared by both widgets: the Cinnamon applet gets a copy turned into a
+ * legacy module by install.sh and the release workflow (only the import
+ * and export lines change)
+ */
+
+import GLib from 'gi://GLib';
+
+const MAGIC = 0x54534452; // "RDST" little-endian
+const LAYOUT_VERSION = 2;
+const HEADER_SIZE = 24;
+const SLOT_SIZE = 104;
+const FLAG_ANALOG = 1;
+const FLAG_MUTED = 2;
+
+// The page is mapped once and kept while the daemon that wrote it runs
+let mapping = null;
+let mappedPid = 0;
+
+function decodeText(bytes) {
+    let end = bytes.indexOf(0);
+    let text = end < 0 ? bytes : bytes.subarray(0, end);
+    // The GJS of older Cinnamon releases has no TextDecoder
+    return typeof TextDecoder !== 'undefined' ? new TextDecoder().decode(text) : imports.byteArray.toString(text);
+}
+
+function parseStatePage(bytes) {
+    if (bytes.length < HEADER_SIZE) return null;
+    let view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    if (view.getUint32(0, true) !== MAGIC || view.getUint16(4, true) !== LAYOUT_VERSION) return null;
+    // Closed by the daemon on exit
+    let pid = view.getUint32(16, true);
+    if (pid === 0) return null;
+
+    let count = view.getUint16(6, true);
+    let headsets = [];
+    for (let i = 0; i < count && HEADER_SIZE + (i + 1) * SLOT_SIZE <= bytes.length; i++) {
+        let offset = HEADER_SIZE + i * SLOT_SIZE;
+        let readable = view.getInt32(offset + 12, true) >= 0;
+        let flags = view.getUint16(offset + 16, true);
+        headsets.push({
+            card: view.getInt32(offset, true).toString(),
+            pcm0: readable ? view.getInt32(offset + 4, true) : null,
+            pcm1: readable ? view.getInt32(offset + 8, true) : null,
+            volume: readable ? view.getInt32(offset + 12, true) : null,
+            analog: (flags & FLAG_ANALOG) !== 0,
+            muted: (flags & FLAG_MUTED) !== 0,
+            id: decodeText(bytes.subarray(offset + 20, offset + 40)),
+            device: decodeText(bytes.subarray(offset + 40, offset + 104)) || 'Redragon',
+        });
+    }
+    // Low 32 bits are enough to notice changes
+    return {sequence: view.getUint32(8, true), pid, headsets};
+}
+
+// Copy of the mapped page, so that the daemon cannot change it while parsed
+function copyPage() {
+    return new Uint8Array(mapping.get_bytes().toArray());
+}
+
+// Seqlock read: a copy is accepted when the next copy shows the same even
+// sequence, i.e. no update started in between
+function snapshot() {
+    let previous = parseStatePage(copyPage());
+    for (let attempt = 0; previous !== null && attempt < 5; attempt++) {
+        let page = parseStatePage(copyPage());
+        if (page === null) break;
+        if (page.sequence % 2 === 0 && previous.sequence === page.sequence) return previous;
+        previous = page;
+    }
+    return null;
+}
+
+// Returns {sequence, headsets} (default headset first), null if the daemon
+// does not publish a page
+export function readStatePage() {
+    // A daemon killed without closing its page leaves it behind, and its
+    // successor publishes a new file
+    if (mapping !== null && !GLib.file_test(`/proc/${mappedPid}`, GLib.FileTest.EXISTS))
+        closeStatePage();
+
+    for (let fresh = mapping === null; ; fresh = true) {
+        if (mapping === null) {
+            try {
+                mapping = GLib.MappedFile.new(GLib.build_filenamev([GLib.get_user_runtime_dir(), 'redragon-state']), false);
+            } catch (e) {
+                return null;
+            }
+        }
+        let page = snapshot();
+        if (page !== null) {
+            mappedPid = page.pid;
+            return page;
+        }
+        // Closed or replaced page: map the file again, once
+        closeStatePage();
+        if (fresh) return null;
+    }
+}
+
+// Drops the mapping (the widget is disabled)
+export function closeStatePage() {
+    mapping = null;
+    mappedPid = 0;
+}
@@ -12,6 +12,10 @@ show_help() {
     echo
     echo "Options:"
     echo "  --help, -h      Show this help message"
+    echo "  --combined      Run volume sync inside the control daemon (one service"
+    echo "                  instead of two, no separate redragon-volume-sync)"
+    echo "  --on-demand     Start the control daemon on the first request (systemd"
+    echo "                  socket activation), exit it after 5 minutes unused"
     echo
     echo "Supported distributions and package managers:"
     echo "  • Ubuntu / Debian / Mint          (apt)"
@@ -37,16 +41,31 @@ show_help() {
 }
 
 # Parse command line arguments
+COMBINED=false
+ON_DEMAND=false
 for arg in "$@"; do
     case $arg in
         --help|-h)
             show_help
             ;;
+        --combined)
+            COMBINED=true
+            ;;
+        --on-demand)
+            ON_DEMAND=true
+            ;;
     esac
 done
 
+if [ "$COMBINED" = true ] && [ "$ON_DEMAND" = true ]; then
+    # The sync must run all the time, an idle daemon would stop it
+    echo "--combined and --on-demand cannot be used together" >&2
+    exit 1
+fi
+
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 INSTALL_DIR="$HOME/.local/bin"
+PATH_MARKER="# redragon-hs-companion"
 SYSTEMD_DIR="$HOME/.config/systemd/user"
 GNOME_EXT_DIR="$HOME/.local/share/gnome-shell/extensions"
 CINNAMON_APPLET_DIR="$HOME/.local/share/cinnamon/applets"
@@ -301,10 +320,52 @@ install_scripts() {
     cp "$SCRIPT_DIR/redragon_volume_sync.py" "$INSTALL_DIR/"
     print_success "Library installed at $INSTALL_DIR/redragon_volume_sync.py"
 
-    # Install CLI client (20ms via socket)
-    cp "$SCRIPT_DIR/redragon-volume" "$INSTALL_DIR/"
-    chmod +x "$INSTALL_DIR/redragon-volume"
-    print_success "CLI client installed: redragon-volume"
+    # Install mixer backends (native ALSA control API / amixer)
+    cp "$SCRIPT_DIR/redragon_alsa.py" "$INSTALL_DIR/"
+    print_success "Mixer backends installed at $INSTALL_DIR/redragon_alsa.py"
+
+    # Install PulseAudio/PipeWire state cache
+    cp "$SCRIPT_DIR/redragon_pulse.py" "$INSTALL_DIR/"
+    print_success "Sound server cache installed at $INSTALL_DIR/redragon_pulse.py"
+
+    # Install sound card discovery (procfs/sysfs)
+    cp "$SCRIPT_DIR/redragon_cards.py" "$INSTALL_DIR/"
+    print_success "Card discovery installed at $INSTALL_DIR/redragon_cards.py"
+
+    # Install sound card hotplug watcher
+    cp "$SCRIPT_DIR/redragon_hotplug.py" "$INSTALL_DIR/"
+    print_success "Hotplug watcher installed at $INSTALL_DIR/redragon_hotplug.py"
+
+    # Install metrics registry
+    cp "$SCRIPT_DIR/redragon_metrics.py" "$INSTALL_DIR/"
+    print_success "Metrics installed at $INSTALL_DIR/redragon_metrics.py"
+
+    # Install state page (shared memory state read by the widgets)
+    cp "$SCRIPT_DIR/redragon_state.py" "$INSTALL_DIR/"
+    print_success "State page installed at $INSTALL_DIR/redragon_state.py"
+
+    # Install config file reader (settings in ~/.config/redragon-hs-companion/config.json)
+    cp "$SCRIPT_DIR/redragon_config.py" "$INSTALL_DIR/"
+    print_success "Config reader installed at $INSTALL_DIR/redragon_config.py"
+
+    # Install systemd notifications (readiness, status, watchdog)
+    cp "$SCRIPT_DIR/redragon_notify.py" "$INSTALL_DIR/"
+    print_success "Service notifications installed at $INSTALL_DIR/redragon_notify.py"
+
+    # Install the client: redragon-volume is the Python client itself (one
+    # process, one connection), the bash script only serves systems without python3
+    cp "$SCRIPT_DIR/redragon_client.py" "$INSTALL_DIR/"
+    chmod +x "$INSTALL_DIR/redragon_client.py"
+    rm -f "$INSTALL_DIR/redragon-volume"
+    if command -v python3 &> /dev/null; then
+        ln -s redragon_client.py "$INSTALL_DIR/redragon-volume"
+        print_success "CLI client installed: redragon-volume (redragon_client.py)"
+    else
+        cp "$SCRIPT_DIR/redragon-volume" "$INSTALL_DIR/"
+        chmod +x "$INSTALL_DIR/redragon-volume"
+        print_success "CLI client installed: redragon-volume (bash, needs socat or netcat)"
+    fi
+    ensure_on_path
 
     # Install PCM sync daemon
     cp "$SCRIPT_DIR/redragon_daemon.py" "$INSTALL_DIR/"
@@ -323,17 +384,29 @@ install_systemd_service() {
 
     mkdir -p "$SYSTEMD_DIR"
 
-    # Create service file with correct path
-    # PCM sync service
-    cat > "$SYSTEMD_DIR/redragon-volume-sync.service" <<EOF
+    local control_args=""
+    if [ "$COMBINED" = true ]; then
+        # The control daemon does the sync itself, drop the separate service
+        control_args=" --with-sync"
+        if [ -f "$SYSTEMD_DIR/redragon-volume-sync.service" ]; then
+            systemctl --user disable --now redragon-volume-sync.service 2>/dev/null || true
+            rm -f "$SYSTEMD_DIR/redragon-volume-sync.service"
+            print_info "Separate sync service removed (combined mode)"
+        fi
+    else
+        # Create service file with correct path
+        # PCM sync service
+        cat > "$SYSTEMD_DIR/redragon-volume-sync.service" <<EOF
 [Unit]
 Description=Redragon Wireless Headset Volume Synchronizer
 After=sound.target pulseaudio.service
 Wants=sound.target
 
 [Service]
-Type=simple
+Type=notify
 ExecStart=$INSTALL_DIR/redragon_daemon.py
+ExecReload=/bin/kill -HUP \$MAINPID
+WatchdogSec=30
 Restart=on-failure
 RestartSec=5
 StandardOutput=journal
@@ -347,7 +420,23 @@ PrivateTmp=true
 WantedBy=default.target
 EOF
 
-    print_success "PCM sync service installed"
+        print_success "PCM sync service installed"
+    fi
+
+    local control_unit="redragon-control-daemon.service"
+    if [ "$ON_DEMAND" = true ]; then
+        # systemd holds the socket, the daemon starts on the first connection
+        # and exits when idle; requests sent meanwhile wait in the backlog
+        control_args=" --idle-timeout 300"
+        control_unit="redragon-control-daemon.socket"
+        # No install paths in the socket unit: the shipped file is used as is
+        cp "$SCRIPT_DIR/systemd/redragon-control-daemon.socket" "$SYSTEMD_DIR/"
+        print_success "Control daemon socket installed (on demand)"
+    elif [ -f "$SYSTEMD_DIR/redragon-control-daemon.socket" ]; then
+        systemctl --user disable --now redragon-control-daemon.socket 2>/dev/null || true
+        rm -f "$SYSTEMD_DIR/redragon-control-daemon.socket"
+        print_info "Control daemon socket removed (always running)"
+    fi
 
     # Fast control daemon service
     cat > "$SYSTEMD_DIR/redragon-control-daemon.service" <<EOF
@@ -356,8 +445,10 @@ Description=Redragon Control Daemon - Volume Control Server
 After=sound.target
 
 [Service]
-Type=simple
-ExecStart=$INSTALL_DIR/redragon_control_daemon.py
+Type=notify
+ExecStart=$INSTALL_DIR/redragon_control_daemon.py$control_args
+ExecReload=/bin/kill -HUP \$MAINPID
+WatchdogSec=30
 Restart=on-failure
 RestartSec=5
 StandardOutput=journal
@@ -382,15 +473,23 @@ EOF
     read -p "Do you want to enable the services to start automatically? (y/n) " -n 1 -r
     echo
     if [[ $REPLY =~ ^[SsYy]$ ]]; then
-        systemctl --user enable redragon-volume-sync.service
-        systemctl --user enable redragon-control-daemon.service
-        systemctl --user start redragon-volume-sync.service
-        systemctl --user start redragon-control-daemon.service
+        if [ "$COMBINED" != true ]; then
+            systemctl --user enable redragon-volume-sync.service
+            systemctl --user start redragon-volume-sync.service
+        fi
+        if [ "$ON_DEMAND" = true ]; then
+            # A running daemon would keep the socket bound
+            systemctl --user disable --now redragon-control-daemon.service 2>/dev/null || true
+        fi
+        systemctl --user enable "$control_unit"
+        systemctl --user restart "$control_unit"
         print_success "Services enabled and started"
     else
         print_info "You can start the services manually with:"
-        print_info "  systemctl --user start redragon-volume-sync.service"
-        print_info "  systemctl --user start redragon-control-daemon.service"
+        if [ "$COMBINED" != true ]; then
+            print_info "  systemctl --user start redragon-volume-sync.service"
+        fi
+        print_info "  systemctl --user start $control_unit"
     fi
 }
 
@@ -411,6 +510,7 @@ install_gnome_extension() {
     cp "$SCRIPT_DIR/gnome-extension/metadata.json" "$ext_dir/"
     cp "$SCRIPT_DIR/gnome-extension/extension.js" "$ext_dir/"
     cp "$SCRIPT_DIR/gnome-extension/translations.js" "$ext_dir/"
+    cp "$SCRIPT_DIR/gnome-extension/statePage.js" "$ext_dir/"
     cp "$SCRIPT_DIR/gnome-extension/schemas/org.gnome.shell.extensions.redragon-volume-sync.gschema.xml" "$ext_dir/schemas/"
 
     # Set proper permissions (readable by user)
@@ -578,6 +678,10 @@ install_cinnamon_applet() {
 
     cp "$SCRIPT_DIR/cinnamon-applet/metadata.json" "$applet_dir/"
     cp "$SCRIPT_DIR/cinnamon-applet/applet.js" "$applet_dir/"
+    # State page reader shared with the GNOME extension, as a legacy (non-ESM) module
+    sed -e "s|^import GLib from 'gi://GLib';|const GLib = imports.gi.GLib;|" \
+        -e 's/^export function /function /' \
+        "$SCRIPT_DIR/gnome-extension/statePage.js" > "$applet_dir/statePage.js"
 
     print_success "Cinnamon applet installed"
     
@@ -724,6 +828,18 @@ test_installation() {
     fi
 }
 
+# Puts $INSTALL_DIR on the PATH of login shells (and so of the desktop
+# session that runs the widgets) if it is not there yet
+ensure_on_path() {
+    case ":$PATH:" in
+        *":$INSTALL_DIR:"*) return ;;
+    esac
+    if ! grep -qs "$PATH_MARKER" "$HOME/.profile"; then
+        printf '\nexport PATH="%s:$PATH"  %s\n' "$INSTALL_DIR" "$PATH_MARKER" >> "$HOME/.profile"
+    fi
+    print_info "$INSTALL_DIR added to PATH in ~/.profile (log out and back in to use redragon-volume)"
+}
+
 print_usage_info() {
     local distro=$(detect_distro)
     local pkg_mgr=$(detect_package_manager)
@@ -16,6 +16,7 @@ PlasmoidItem {
     property int currentVolume: 0
     property bool isMuted: false
     property bool updatingSlider: false
+    property int stateVersion: 0
 
     preferredRepresentation: compactRepresentation
 
@@ -29,6 +30,12 @@ PlasmoidItem {
             var exitCode = data["exit code"]
             var stdout = data["stdout"]
 
+            if (sourceName.startsWith("redragon-volume watch")) {
+                disconnectSource(sourceName)
+                handleWatchOutput(exitCode, stdout)
+                return
+            }
+
             if (exitCode === 0 && stdout) {
                 handleCommandOutput(sourceName, stdout)
             }
@@ -67,25 +74,58 @@ PlasmoidItem {
                 updatingSlider = false
             }
         }
-        // Sink list
-        else if (command.includes("pactl list sinks short")) {
-            var lines = output.split('\n')
-            for (var i = 0; i < lines.length; i++) {
-                var line = lines[i]
-                if (line.includes('XiiSound') || line.includes('Weltrend') ||
-                    line.includes('Redragon') || line.includes('H878')) {
-                    var parts = line.split(/\s+/)
-                    if (parts.length >= 2) {
-                        sinkName = parts[1]
-                        break
-                    }
+        // Sink name (from the daemon's sink index)
+        else if (command.includes("redragon-volume sink")) {
+            var sink = output.trim()
+            if (sink.length > 0 && !sink.startsWith("ERROR")) {
+                sinkName = sink
+            }
+        }
+    }
+
+    // Result of a watch: the status once the daemon's state moved past
+    // stateVersion. The next watch starts right away, so changes arrive
+    // without polling; monitoringTimer only takes over while watch fails
+    function handleWatchOutput(exitCode, output) {
+        var versionMatch = output ? output.match(/version=(\d+)\s*$/) : null
+        if (exitCode !== 0 || !versionMatch) {
+            // Daemon stopped, no headset, or a client without watch
+            isConnected = false
+            monitoringTimer.start()
+            return
+        }
+        stateVersion = parseInt(versionMatch[1])
+
+        // Parse: OK: device=H878 Wireless headset card=3 pcm0=50 pcm1=50 analog=False version=7
+        var statusMatch = output.match(/device=(.+?)\s+card=\S+\s+pcm0=(\S+)\s+pcm1=(\S+)\s+analog=(\S+)/)
+        if (statusMatch) {
+            if (!isConnected || deviceName !== statusMatch[1]) {
+                deviceName = statusMatch[1]
+                isConnected = true
+                findSinkName()
+            }
+            // Effective volume, as "get" reports it
+            var volume = parseInt(statusMatch[4] === "True" ? statusMatch[3] : statusMatch[2])
+            if (!isNaN(volume)) {
+                currentVolume = volume
+                isMuted = (volume === 0)
+                if (!volumeSlider.pressed) {
+                    updatingSlider = true
+                    volumeSlider.value = volume
+                    updatingSlider = false
                 }
             }
         }
+        watchState()
+    }
+
+    function watchState() {
+        monitoringTimer.stop()
+        executable.exec("redragon-volume watch " + stateVersion)
     }
 
     function findSinkName() {
-        executable.exec("pactl list sinks short")
+        executable.exec("redragon-volume sink")
     }
 
     function updateVolume() {
@@ -113,19 +153,17 @@ PlasmoidItem {
 
     function setAsDefaultSink() {
         if (isConnected && sinkName) {
-            executable.exec("pactl set-default-sink " + sinkName)
+            executable.exec("redragon-volume set-default")
             var message = Translations._('set_as_default', [deviceName])
             executable.exec("notify-send 'Redragon Volume' '" + message + "' -i audio-headphones")
         }
     }
 
-    // Timer para monitoramento
+    // Timer para monitoramento (fallback while watch fails)
     Timer {
         id: monitoringTimer
         interval: 3000
-        running: true
-        repeat: true
-        triggeredOnStart: true
+        repeat: false
 
         onTriggered: {
             if (isConnected) {
@@ -133,6 +171,7 @@ PlasmoidItem {
             } else {
                 detectDevice()
             }
+            watchState()
         }
     }
 
@@ -306,6 +345,6 @@ PlasmoidItem {
     }
 
     Component.onCompleted: {
-        detectDevice()
+        watchState()
     }
 }
@@ -0,0 +1,648 @@
+#!/usr/bin/env python3
+"""
+Redragon ALSA mixer backends
+Reads and writes the headset PCM controls either natively through the ALSA
+control API (libasound via ctypes) or by running amixer as a fallback
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import re
+import shutil
+import subprocess
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+from redragon_metrics import count_fork
+
+
+# PCM[0] is controlled by PipeWire/PulseAudio, PCM[1] is not. Both are found
+# by name, their numids depend on the dongle firmware (9/10 on the H878)
+PCM_CONTROL_NAME = "PCM Playback Volume"
+PCM_MASTER_INDEX = 0
+PCM_SECONDARY_INDEX = 1
+
+# alsa/control.h
+SND_CTL_EVENT_ELEM = 0
+SND_CTL_EVENT_MASK_VALUE = 1 << 0
+SND_CTL_EVENT_MASK_REMOVE = 0xFFFFFFFF
+
+
+class MixerError(Exception):
+    """Raised when a mixer backend fails to read or write a control"""
+
+
+class ControlInfo(NamedTuple):
+    """One element of a card's control interface"""
+    numid: int
+    name: str
+    index: int = 0
+    min: Optional[int] = None
+    max: Optional[int] = None
+    count: Optional[int] = None  # Number of channels (values)
+
+
+class ControlMap:
+    """Controls of one card by name and index, enumerated once per card"""
+
+    def __init__(self, controls: List[ControlInfo]):
+        self.controls = {(control.name, control.index): control for control in controls}
+
+    def find(self, name: str, index: int = 0) -> ControlInfo:
+        control = self.controls.get((name, index))
+        if control is None:
+            raise MixerError(f"no control '{name}' index {index}")
+        return control
+
+    @property
+    def master(self) -> ControlInfo:
+        """PCM[0], controlled by PipeWire/PulseAudio"""
+        return self.find(PCM_CONTROL_NAME, PCM_MASTER_INDEX)
+
+    @property
+    def secondary(self) -> ControlInfo:
+        """PCM[1], not controlled by the sound server"""
+        return self.find(PCM_CONTROL_NAME, PCM_SECONDARY_INDEX)
+
+
+def percent_value(control, percent: int) -> int:
+    """Raw value of a control (anything with min/max) at a percentage of its
+    range, with the same conversion as "amixer set PCM N%"
+    """
+    return control.min + round(percent * (control.max - control.min) * 0.01)
+
+
+_CONTENTS_HEADER_RE = re.compile(r"^numid=(\d+),iface=\w+,name='([^']*)'(?:,index=(\d+))?")
+_CONTENTS_INFO_RE = re.compile(r'values=(\d+),min=(-?\d+),max=(-?\d+)')
+_CONTENTS_VALUES_RE = re.compile(r'^\s*: values=(.+)')
+
+
+def _parse_contents(output: str) -> Tuple[List[ControlInfo], Dict[int, List[str]]]:
+    """Parses "amixer contents" / "amixer cget" output
+
+    Returns:
+        (controls, values by numid)
+    """
+    controls = []
+    values = {}
+    current = None
+    for line in output.split('\n'):
+        header = _CONTENTS_HEADER_RE.match(line)
+        if header:
+            numid, name, index = header.groups()
+            current = ControlInfo(int(numid), name, int(index or 0))
+            controls.append(current)
+            continue
+        if current is None:
+            continue
+
+        info = _CONTENTS_INFO_RE.search(line)
+        if info and line.lstrip().startswith(';'):
+            count, minimum, maximum = (int(group) for group in info.groups())
+            current = current._replace(min=minimum, max=maximum, count=count)
+            controls[-1] = current
+            continue
+
+        value = _CONTENTS_VALUES_RE.match(line)
+        if value:
+            values[current.numid] = value.group(1).strip().split(',')
+    return controls, values
+
+
+class AmixerBackend:
+    """Mixer backend that runs amixer for every operation
+
+    The card's controls are listed once ("amixer contents"), later reads
+    only fetch the two PCM elements and writes address them by numid.
+    """
+
+    name = "amixer"
+
+    def __init__(self):
+        self._maps: Dict[str, ControlMap] = {}
+
+    def controls(self, card_id: str) -> ControlMap:
+        """Returns the control map of the card, enumerating it on first use"""
+        control_map = self._maps.get(card_id)
+        if control_map is None:
+            result = self._run(["amixer", "-c", card_id, "contents"], env=self._env())
+            controls, _ = _parse_contents(result.stdout)
+            control_map = self._maps[card_id] = ControlMap(controls)
+        return control_map
+
+    def get_volumes(self, card_id: str) -> Tuple[Optional[int], Optional[int]]:
+        """Gets the current raw values of PCM[0] and PCM[1]"""
+        controls = self.controls(card_id)
+        master, secondary = controls.master, controls.secondary
+
+        # Both elements in one amixer run
+        commands = f"cget numid={master.numid}\ncget numid={secondary.numid}\n"
+        try:
+            result = self._run(["amixer", "-c", card_id, "-s"], env=self._env(), input=commands)
+        except MixerError:
+            # Card may be gone or renumbered, enumerate again next time
+            self._maps.pop(card_id, None)
+            raise
+        _, values = _parse_contents(result.stdout)
+
+        def first_value(control: ControlInfo) -> Optional[int]:
+            vals = values.get(control.numid)
+            return int(vals[0]) if vals else None
+
+        return first_value(master), first_value(secondary)
+
+    def set_master_percent(self, card_id: str, percent: int) -> None:
+        """Defines PCM[0] (all channels) as a percentage of its range
+
+        Uses the same conversion as "amixer set PCM N%".
+        """
+        master = self.controls(card_id).master
+        value = percent_value(master, percent)
+        self._run(["amixer", "-c", card_id, "cset", f"numid={master.numid}", str(value)])
+
+    def set_secondary(self, card_id: str, value: int) -> None:
+        """Defines the raw value of PCM[1]"""
+        secondary = self.controls(card_id).secondary
+        self._run(["amixer", "-c", card_id, "cset", f"numid={secondary.numid}", str(value)])
+
+    def reset(self) -> None:
+        """Forgets the control maps (e.g. after re-detection)"""
+        self._maps.clear()
+
+    def open_event_monitor(self, card_id: str) -> "AmixerEventMonitor":
+        """Subscribes to control change events of the card via amixer"""
+        return AmixerEventMonitor(card_id)
+
+    @staticmethod
+    def _env() -> dict:
+        # Force English locale for consistent output
+        env = os.environ.copy()
+        env['LC_ALL'] = 'C'
+        env['LANG'] = 'C'
+        return env
+
+    def _run(self, args: List[str], env: Optional[dict] = None, input: Optional[str] = None) -> subprocess.CompletedProcess:
+        count_fork(args)
+        try:
+            return subprocess.run(args, capture_output=True, text=True, check=True, env=env, input=input)
+        except (subprocess.CalledProcessError, OSError) as e:
+            raise MixerError(str(e)) from e
+
+
+class AmixerEventMonitor:
+    """Control change events read from a long-lived "amixer events" process
+
+    Stand-in for the native subscription when libasound is not available.
+    amixer block-buffers stdout on a pipe, so it is run through stdbuf to get
+    one line per event.
+    """
+
+    _NUMID_RE = re.compile(r'numid=(\d+)')
+
+    def __init__(self, card_id: str):
+        stdbuf = shutil.which("stdbuf")
+        if not stdbuf or not shutil.which("amixer"):
+            raise MixerError("amixer events needs amixer and stdbuf")
+
+        env = os.environ.copy()
+        env['LC_ALL'] = 'C'
+        env['LANG'] = 'C'
+        count_fork(["amixer"])
+        self._proc = subprocess.Popen(
+            [stdbuf, "-oL", "amixer", "-c", card_id, "events"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=env
+        )
+        self._buffer = b""
+
+    def fileno(self) -> int:
+        return self._proc.stdout.fileno()
+
+    def read_events(self) -> Optional[Set[int]]:
+        """Reads pending events
+
+        Returns:
+            The numids whose value changed, or None if the card went away
+        """
+        data = os.read(self.fileno(), 4096)
+        if not data:
+            return None
+
+        self._buffer += data
+        *lines, self._buffer = self._buffer.split(b"\n")
+
+        numids = set()
+        for line in lines:
+            line = line.decode('utf-8', 'replace')
+            if line.startswith("event remove:"):
+                return None
+            if line.startswith("event value:"):
+                match = self._NUMID_RE.search(line)
+                if match:
+                    numids.add(int(match.group(1)))
+        return numids
+
+    def close(self) -> None:
+        if self._proc.poll() is None:
+            self._proc.terminate()
+            try:
+                self._proc.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+                self._proc.wait()
+        self._proc.stdout.close()
+
+
+class _PollFd(ctypes.Structure):
+    _fields_ = [("fd", ctypes.c_int), ("events", ctypes.c_short), ("revents", ctypes.c_short)]
+
+
+class NativeEventMonitor:
+    """Control change events read directly from /dev/snd/controlC<N>
+
+    Uses its own non-blocking control handle subscribed to events, so it can
+    be waited on with select()/poll() alongside other descriptors.
+    """
+
+    def __init__(self, lib, card_id: str):
+        self._lib = lib
+        self._ctl = ctypes.c_void_p()
+        self._event = ctypes.c_void_p()
+        _check(lib, lib.snd_ctl_open(ctypes.byref(self._ctl), f"hw:{card_id}".encode(), 0), f"open hw:{card_id}")
+
+        try:
+            _check(lib, lib.snd_ctl_nonblock(self._ctl, 1), "nonblock")
+            _check(lib, lib.snd_ctl_subscribe_events(self._ctl, 1), "subscribe events")
+
+            pollfd = _PollFd()
+            if lib.snd_ctl_poll_descriptors(self._ctl, ctypes.byref(pollfd), 1) != 1:
+                raise MixerError("no poll descriptor for control device")
+            self._fd = pollfd.fd
+
+            _alloc(lib, lib.snd_ctl_event_malloc, self._event, "event")
+        except (MixerError, OSError):
+            self.close()
+            raise
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def read_events(self) -> Optional[Set[int]]:
+        """Reads pending events
+
+        Returns:
+            The numids whose value changed, or None if the card went away
+        """
+        numids = set()
+        while True:
+            ret = self._lib.snd_ctl_read(self._ctl, self._event)
+            if ret == -errno.EAGAIN or ret == 0:
+                return numids
+            if ret < 0:
+                return None
+            if self._lib.snd_ctl_event_get_type(self._event) != SND_CTL_EVENT_ELEM:
+                continue
+
+            mask = self._lib.snd_ctl_event_elem_get_mask(self._event)
+            if mask == SND_CTL_EVENT_MASK_REMOVE:
+                return None
+            if mask & SND_CTL_EVENT_MASK_VALUE:
+                numids.add(self._lib.snd_ctl_event_elem_get_numid(self._event))
+
+    def close(self) -> None:
+        if self._event:
+            self._lib.snd_ctl_event_free(self._event)
+            self._event = ctypes.c_void_p()
+        if self._ctl:
+            self._lib.snd_ctl_close(self._ctl)
+            self._ctl = ctypes.c_void_p()
+
+
+class _ControlElement:
+    """Handle to one ALSA control element, resolved once and reused"""
+
+    def __init__(self, lib, ctl, numid: int):
+        self._lib = lib
+        self._ctl = ctl
+        self.numid = numid
+
+        self._id = ctypes.c_void_p()
+        self._info = ctypes.c_void_p()
+        self._value = ctypes.c_void_p()
+        try:
+            _alloc(lib, lib.snd_ctl_elem_id_malloc, self._id, f"numid={numid} id")
+            _alloc(lib, lib.snd_ctl_elem_info_malloc, self._info, f"numid={numid} info")
+            _alloc(lib, lib.snd_ctl_elem_value_malloc, self._value, f"numid={numid} value")
+
+            lib.snd_ctl_elem_id_set_numid(self._id, numid)
+            lib.snd_ctl_elem_info_set_id(self._info, self._id)
+            _check(lib, lib.snd_ctl_elem_info(ctl, self._info), f"numid={numid} info")
+
+            # Complete the id (iface, name, index) with what the kernel resolved
+            lib.snd_ctl_elem_info_get_id(self._info, self._id)
+            lib.snd_ctl_elem_value_set_id(self._value, self._id)
+
+            self.min = lib.snd_ctl_elem_info_get_min(self._info)
+            self.max = lib.snd_ctl_elem_info_get_max(self._info)
+            self.count = lib.snd_ctl_elem_info_get_count(self._info)
+        except (MixerError, OSError):
+            self.free()
+            raise
+
+    def read(self) -> List[int]:
+        _check(self._lib, self._lib.snd_ctl_elem_read(self._ctl, self._value), f"numid={self.numid} read")
+        return [self._lib.snd_ctl_elem_value_get_integer(self._value, i) for i in range(self.count)]
+
+    def write(self, value: int) -> None:
+        for i in range(self.count):
+            self._lib.snd_ctl_elem_value_set_integer(self._value, i, value)
+        _check(self._lib, self._lib.snd_ctl_elem_write(self._ctl, self._value), f"numid={self.numid} write")
+
+    def free(self) -> None:
+        if self._value:
+            self._lib.snd_ctl_elem_value_free(self._value)
+            self._value = ctypes.c_void_p()
+        if self._info:
+            self._lib.snd_ctl_elem_info_free(self._info)
+            self._info = ctypes.c_void_p()
+        if self._id:
+            self._lib.snd_ctl_elem_id_free(self._id)
+            self._id = ctypes.c_void_p()
+
+
+class _CardControls:
+    """Open control device (/dev/snd/controlC<N>) with the PCM element handles
+
+    Elements are enumerated once when the device is opened and looked up by
+    name, so firmware with different numids works the same.
+    """
+
+    def __init__(self, lib, card_id: str):
+        self._lib = lib
+        self.ctl = ctypes.c_void_p()
+        _check(lib, lib.snd_ctl_open(ctypes.byref(self.ctl), f"hw:{card_id}".encode(), 0), f"open hw:{card_id}")
+
+        self.elements: Dict[int, _ControlElement] = {}
+        try:
+            control_map = ControlMap(self._list_elements())
+            resolved = []
+            for control in (control_map.master, control_map.secondary):
+                element = _ControlElement(lib, self.ctl, control.numid)
+                self.elements[control.numid] = element
+                resolved.append(control._replace(min=element.min, max=element.max, count=element.count))
+            control_map.controls.update(((control.name, control.index), control) for control in resolved)
+            self.map = control_map
+            self.master = self.elements[control_map.master.numid]
+            self.secondary = self.elements[control_map.secondary.numid]
+        except (MixerError, OSError):
+            self.close()
+            raise
+
+    def _list_elements(self) -> List[ControlInfo]:
+        lib = self._lib
+        element_list = ctypes.c_void_p()
+        _alloc(lib, lib.snd_ctl_elem_list_malloc, element_list, "element list")
+        try:
+            # First call gets the count, second one fills the allocated space
+            _check(lib, lib.snd_ctl_elem_list(self.ctl, element_list), "list elements")
+            count = lib.snd_ctl_elem_list_get_count(element_list)
+            _check(lib, lib.snd_ctl_elem_list_alloc_space(element_list, count), "list elements")
+            try:
+                _check(lib, lib.snd_ctl_elem_list(self.ctl, element_list), "list elements")
+                return [
+                    ControlInfo(
+                        lib.snd_ctl_elem_list_get_numid(element_list, i),
+                        lib.snd_ctl_elem_list_get_name(element_list, i).decode('utf-8', 'replace'),
+                        lib.snd_ctl_elem_list_get_index(element_list, i)
+                    )
+                    for i in range(lib.snd_ctl_elem_list_get_used(element_list))
+                ]
+            finally:
+                lib.snd_ctl_elem_list_free_space(element_list)
+        finally:
+            lib.snd_ctl_elem_list_free(element_list)
+
+    def close(self) -> None:
+        for element in self.elements.values():
+            element.free()
+        self.elements.clear()
+        if self.ctl:
+            self._lib.snd_ctl_close(self.ctl)
+            self.ctl = ctypes.c_void_p()
+
+
+def _check(lib, ret: int, what: str) -> int:
+    if ret < 0:
+        raise MixerError(f"{what}: {lib.snd_strerror(ret).decode()}")
+    return ret
+
+
+def _alloc(lib, malloc, pointer: ctypes.c_void_p, what: str) -> None:
+    """Allocates a libasound structure with its snd_*_malloc function
+
+    Raises:
+        OSError: Allocation failed (ENOMEM)
+    """
+    ret = malloc(ctypes.byref(pointer))
+    if ret < 0:
+        raise OSError(-ret, f"{what} allocation: {lib.snd_strerror(ret).decode()}")
+
+
+def _load_libasound():
+    """Loads libasound and declares the prototypes used, or returns None"""
+    path = ctypes.util.find_library("asound")
+    if not path:
+        return None
+    try:
+        lib = ctypes.CDLL(path)
+    except OSError:
+        return None
+
+    vp = ctypes.c_void_p
+    pvp = ctypes.POINTER(ctypes.c_void_p)
+    prototypes = {
+        "snd_ctl_open": (ctypes.c_int, [pvp, ctypes.c_char_p, ctypes.c_int]),
+        "snd_ctl_close": (ctypes.c_int, [vp]),
+        "snd_strerror": (ctypes.c_char_p, [ctypes.c_int]),
+        "snd_ctl_elem_list_malloc": (ctypes.c_int, [pvp]),
+        "snd_ctl_elem_list_free": (None, [vp]),
+        "snd_ctl_elem_list": (ctypes.c_int, [vp, vp]),
+        "snd_ctl_elem_list_alloc_space": (ctypes.c_int, [vp, ctypes.c_uint]),
+        "snd_ctl_elem_list_free_space": (None, [vp]),
+        "snd_ctl_elem_list_get_count": (ctypes.c_uint, [vp]),
+        "snd_ctl_elem_list_get_used": (ctypes.c_uint, [vp]),
+        "snd_ctl_elem_list_get_numid": (ctypes.c_uint, [vp, ctypes.c_uint]),
+        "snd_ctl_elem_list_get_name": (ctypes.c_char_p, [vp, ctypes.c_uint]),
+        "snd_ctl_elem_list_get_index": (ctypes.c_uint, [vp, ctypes.c_uint]),
+        "snd_ctl_elem_id_malloc": (ctypes.c_int, [pvp]),
+        "snd_ctl_elem_id_free": (None, [vp]),
+        "snd_ctl_elem_id_set_numid": (None, [vp, ctypes.c_uint]),
+        "snd_ctl_elem_info_malloc": (ctypes.c_int, [pvp]),
+        "snd_ctl_elem_info_free": (None, [vp]),
+        "snd_ctl_elem_info_set_id": (None, [vp, vp]),
+        "snd_ctl_elem_info_get_id": (None, [vp, vp]),
+        "snd_ctl_elem_info": (ctypes.c_int, [vp, vp]),
+        "snd_ctl_elem_info_get_min": (ctypes.c_long, [vp]),
+        "snd_ctl_elem_info_get_max": (ctypes.c_long, [vp]),
+        "snd_ctl_elem_info_get_count": (ctypes.c_uint, [vp]),
+        "snd_ctl_elem_value_malloc": (ctypes.c_int, [pvp]),
+        "snd_ctl_elem_value_free": (None, [vp]),
+        "snd_ctl_elem_value_set_id": (None, [vp, vp]),
+        "snd_ctl_elem_value_get_integer": (ctypes.c_long, [vp, ctypes.c_uint]),
+        "snd_ctl_elem_value_set_integer": (None, [vp, ctypes.c_uint, ctypes.c_long]),
+        "snd_ctl_elem_read": (ctypes.c_int, [vp, vp]),
+        "snd_ctl_elem_write": (ctypes.c_int, [vp, vp]),
+        "snd_ctl_nonblock": (ctypes.c_int, [vp, ctypes.c_int]),
+        "snd_ctl_subscribe_events": (ctypes.c_int, [vp, ctypes.c_int]),
+        "snd_ctl_poll_descriptors": (ctypes.c_int, [vp, ctypes.POINTER(_PollFd), ctypes.c_uint]),
+        "snd_ctl_read": (ctypes.c_int, [vp, vp]),
+        "snd_ctl_event_malloc": (ctypes.c_int, [pvp]),
+        "snd_ctl_event_free": (None, [vp]),
+        "snd_ctl_event_get_type": (ctypes.c_int, [vp]),
+        "snd_ctl_event_elem_get_numid": (ctypes.c_uint, [vp]),
+        "snd_ctl_event_elem_get_mask": (ctypes.c_uint, [vp]),
+    }
+    try:
+        for func_name, (restype, argtypes) in prototypes.items():
+            func = getattr(lib, func_name)
+            func.restype = restype
+            func.argtypes = argtypes
+    except AttributeError:
+        return None
+    return lib
+
+
+class NativeAlsaBackend:
+    """Mixer backend using the ALSA control ioctls through libasound
+
+    The control device and the PCM[0]/PCM[1] element handles are opened once
+    per card and reused, so reads and writes cost a single ioctl each instead
+    of an amixer fork.
+    """
+
+    name = "native"
+
+    def __init__(self, fallback: Optional[AmixerBackend] = None):
+        """
+        Args:
+            fallback: Backend used for cards whose control device cannot be
+                      opened natively (optional)
+        """
+        self._lib = _load_libasound()
+        if self._lib is None:
+            raise MixerError("libasound not available")
+        self._fallback = fallback
+        self._cards: Dict[str, _CardControls] = {}
+        self._fallback_cards = set()
+
+    def controls(self, card_id: str) -> ControlMap:
+        """Returns the control map of the card, enumerating it on first use"""
+        controls = self._controls(card_id)
+        if controls is None:
+            return self._fallback.controls(card_id)
+        return controls.map
+
+    def get_volumes(self, card_id: str) -> Tuple[Optional[int], Optional[int]]:
+        """Gets the current raw values of PCM[0] and PCM[1]"""
+        controls = self._controls(card_id)
+        if controls is None:
+            return self._fallback.get_volumes(card_id)
+        try:
+            vol1 = controls.master.read()[0]
+            vol2 = controls.secondary.read()[0]
+        except MixerError:
+            self._release(card_id)
+            raise
+        return vol1, vol2
+
+    def set_master_percent(self, card_id: str, percent: int) -> None:
+        """Defines PCM[0] (all channels) as a percentage of its range
+
+        Uses the same conversion as "amixer set PCM N%".
+        """
+        controls = self._controls(card_id)
+        if controls is None:
+            return self._fallback.set_master_percent(card_id, percent)
+        element = controls.master
+        value = percent_value(element, percent)
+        try:
+            element.write(value)
+        except MixerError:
+            self._release(card_id)
+            raise
+
+    def set_secondary(self, card_id: str, value: int) -> None:
+        """Defines the raw value of PCM[1]"""
+        controls = self._controls(card_id)
+        if controls is None:
+            return self._fallback.set_secondary(card_id, value)
+        try:
+            controls.secondary.write(value)
+        except MixerError:
+            self._release(card_id)
+            raise
+
+    def open_event_monitor(self, card_id: str):
+        """Subscribes to control change events of the card"""
+        if card_id in self._fallback_cards:
+            return self._fallback.open_event_monitor(card_id)
+        try:
+            return NativeEventMonitor(self._lib, card_id)
+        except OSError as e:
+            raise MixerError(str(e)) from e
+
+    def reset(self) -> None:
+        """Closes every open control device (e.g. after re-detection)"""
+        for card_id in list(self._cards):
+            self._release(card_id)
+        self._fallback_cards.clear()
+        if self._fallback is not None:
+            self._fallback.reset()
+
+    def _controls(self, card_id: str) -> Optional[_CardControls]:
+        """Returns the open controls of the card, or None to use the fallback"""
+        if card_id in self._fallback_cards:
+            return None
+        controls = self._cards.get(card_id)
+        if controls is None:
+            try:
+                controls = _CardControls(self._lib, card_id)
+            except (MixerError, OSError) as e:
+                # OSError: no memory for the control structures
+                if self._fallback is None:
+                    if isinstance(e, OSError):
+                        raise MixerError(str(e)) from e
+                    raise
+                self._fallback_cards.add(card_id)
+                return None
+            self._cards[card_id] = controls
+        return controls
+
+    def _release(self, card_id: str) -> None:
+        controls = self._cards.pop(card_id, None)
+        if controls is not None:
+            controls.close()
+
+
+BACKENDS = ("auto", "native", "amixer")
+
+
+def create_backend(name: str = "auto"):
+    """Creates a mixer backend
+
+    Args:
+        name: "native" (libasound), "amixer" (subprocess) or "auto", which
+              uses the native backend when libasound is available and falls
+              back to amixer otherwise (or for cards it cannot open)
+    """
+    if name == "amixer":
+        return AmixerBackend()
+    if name == "native":
+        return NativeAlsaBackend()
+    if name == "auto":
+        try:
+            return NativeAlsaBackend(fallback=AmixerBackend())
+        except (MixerError, OSError):
+            return AmixerBackend()
+    raise ValueError(f"unknown mixer backend '{name}'")
@@ -0,0 +1,565 @@
+#!/usr/bin/env python3
+"""
+Redragon benchmark - latency and throughput of the volume control paths
+Runs headless against a fake headset: an in-process mixer backend (or stub
+amixer executables) and stub pactl, so no hardware or sound server is needed
+
+Measures set/get/status/mute through the library, the control daemon's
+command processing and its socket (one-shot and pipelined), reads of its
+shared memory state page, conditional "status since=" queries, a slider
+stream of sets at a fixed rate, and the command line clients from process
+start to exit (redragon_client.py, installed as redragon-volume, and the
+bash fallback script, which hands over to it when python3 is present)
+
+The cold start scenario emulates systemd socket activation: the request is
+sent to a pre-bound socket before the daemon process exists, then the
+daemon is started on it; it measures the time to the answer and checks
+that the daemon exits on its own once idle
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import math
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import redragon_cards
+from redragon_alsa import PCM_CONTROL_NAME, ControlInfo, ControlMap, MixerError, create_backend
+from redragon_state import StateReader
+
+BENCH_CARD = "1"
+SCRIPT_DIR = Path(__file__).resolve().parent
+OPERATIONS = ("set", "get", "status", "mute")
+
+# Starts the control daemon like systemd socket activation would: the socket
+# on fd 3, LISTEN_PID/LISTEN_FDS naming this process, card discovery pointed
+# at the fake /proc/asound
+ACTIVATED_DAEMON = """
+import os, runpy, sys
+script_dir, proc_dir = sys.argv[1], sys.argv[2]
+sys.path.insert(0, script_dir)
+import redragon_cards
+redragon_cards.PROC_ASOUND = proc_dir
+redragon_cards.SYSFS_SOUND = proc_dir + "/no-sysfs"
+os.environ["LISTEN_PID"] = str(os.getpid())
+os.environ["LISTEN_FDS"] = "1"
+sys.argv = [os.path.join(script_dir, "redragon_control_daemon.py")] + sys.argv[3:]
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+COLD_START_IDLE_TIMEOUT = 0.3
+
+# Stub executables, installed in a temporary directory put first on PATH
+STUB_PACTL = """#!/bin/sh
+case "$1 $2" in
+"list cards") printf 'Card #1\\n\\tName: alsa_card.usb-XiiSound_H878\\n\\tProperties:\\n\\t\\talsa.card = "1"\\n\\tActive Profile: output:iec958-stereo\\n';;
+"list sinks") printf 'Sink #1\\n\\tName: alsa_output.usb-XiiSound_H878-00.iec958-stereo\\n\\tProperties:\\n\\t\\talsa.card = "1"\\n';;
+"subscribe ") exec sleep 2147483647;;
+esac
+exit 0
+"""
+
+STUB_AMIXER = """#!/bin/sh
+STATE="$(dirname "$0")/mixer_state"
+[ -f "$STATE" ] || echo "50 50" > "$STATE"
+read a b < "$STATE"
+elem() {
+    echo "numid=$1,iface=MIXER,name='PCM Playback Volume'$2"
+    echo "  ; type=INTEGER,access=rw---R--,values=$3,min=0,max=100,step=0"
+    echo "  : values=$4"
+}
+case "$3" in
+contents) elem 9 "" 2 "$a,$a"; elem 10 ",index=1" 1 "$b";;
+-s) while read cmd arg; do
+        [ "$arg" = numid=9 ] && elem 9 "" 2 "$a,$a"
+        [ "$arg" = numid=10 ] && elem 10 ",index=1" 1 "$b"
+    done;;
+cset) if [ "$4" = numid=9 ]; then echo "$5 $b" > "$STATE"; else echo "$a $5" > "$STATE"; fi;;
+*) exit 1;;
+esac
+"""
+
+
+class FakeMixerBackend:
+    """In-process stand-in for the ALSA backends (no hardware, no fork)
+
+    Each operation can cost a fixed delay to mimic the USB round trip.
+    """
+
+    name = "fake"
+
+    def __init__(self, delay: float = 0.0):
+        """
+        Args:
+            delay: Simulated cost of one control read or write, in seconds
+        """
+        self.delay = delay
+        self.reads = 0
+        self.writes = 0
+        self._values: Dict[str, List[int]] = {}
+        self._map = ControlMap([
+            ControlInfo(9, PCM_CONTROL_NAME, 0, 0, 100, 2),
+            ControlInfo(10, PCM_CONTROL_NAME, 1, 0, 100, 1),
+        ])
+
+    def controls(self, card_id: str) -> ControlMap:
+        return self._map
+
+    def get_volumes(self, card_id: str):
+        self._cost()
+        self.reads += 1
+        master, secondary = self._values.setdefault(card_id, [50, 50])
+        return master, secondary
+
+    def set_master_percent(self, card_id: str, percent: int) -> None:
+        self._cost()
+        self.writes += 1
+        self._values.setdefault(card_id, [50, 50])[0] = percent
+
+    def set_secondary(self, card_id: str, value: int) -> None:
+        self._cost()
+        self.writes += 1
+        self._values.setdefault(card_id, [50, 50])[1] = value
+
+    def reset(self) -> None:
+        """Nothing to release"""
+
+    def open_event_monitor(self, card_id: str):
+        raise MixerError("fake backend has no control events")
+
+    def _cost(self) -> None:
+        if self.delay:
+            time.sleep(self.delay)
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(scenario: str, operation: str, latencies: List[float], elapsed: float, **extra) -> dict:
+    """Latency percentiles (ms) and throughput of one measured run"""
+    result = {
+        "scenario": scenario,
+        "op": operation,
+        "n": len(latencies),
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "ops_per_s": len(latencies) / elapsed if elapsed > 0 else 0.0,
+    }
+    result.update(extra)
+    return result
+
+
+def command_for(operation: str, i: int) -> str:
+    return f"set {i % 101}" if operation == "set" else operation
+
+
+def measure(run: Callable[[str], object], operation: str, iterations: int):
+    """Times `iterations` sequential calls, returns (latencies, elapsed)"""
+    latencies = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        begin = time.perf_counter()
+        run(command_for(operation, i))
+        latencies.append(time.perf_counter() - begin)
+    return latencies, time.perf_counter() - started
+
+
+class BenchEnvironment:
+    """Temporary HOME (no config file), runtime dir, /proc/asound and stub executables"""
+
+    def __init__(self):
+        self._tmp = tempfile.TemporaryDirectory(prefix="redragon-bench-")
+        root = Path(self._tmp.name)
+        self.bin_dir = root / "bin"
+        self.proc_dir = root / "proc"
+        self.home = root / "home"
+        self.runtime_dir = root / "run"
+        for directory in (self.bin_dir, self.proc_dir, self.home, self.runtime_dir):
+            directory.mkdir()
+
+        (self.proc_dir / "cards").write_text(
+            f" {BENCH_CARD} [H878           ]: USB-Audio - XiiSound H878\n"
+            "                      XiiSound XiiSound H878 at usb-0000:00:14.0-2, full speed\n"
+        )
+        for name, script in (("pactl", STUB_PACTL), ("amixer", STUB_AMIXER)):
+            path = self.bin_dir / name
+            path.write_text(script)
+            path.chmod(0o755)
+
+        self._saved = {}
+
+    def __enter__(self):
+        for key, value in (
+            ("PATH", f"{self.bin_dir}{os.pathsep}{os.environ.get('PATH', '')}"),
+            ("HOME", str(self.home)),
+            ("XDG_CONFIG_HOME", str(self.home / ".config")),
+            ("XDG_RUNTIME_DIR", str(self.runtime_dir)),
+        ):
+            self._saved[key] = os.environ.get(key)
+            os.environ[key] = value
+        self._saved_paths = (redragon_cards.PROC_ASOUND, redragon_cards.SYSFS_SOUND)
+        redragon_cards.PROC_ASOUND = str(self.proc_dir)
+        redragon_cards.SYSFS_SOUND = str(self.proc_dir / "no-sysfs")
+        return self
+
+    def __exit__(self, *exc):
+        redragon_cards.PROC_ASOUND, redragon_cards.SYSFS_SOUND = self._saved_paths
+        for key, value in self._saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        self._tmp.cleanup()
+
+
+def make_backend(name: str, delay: float):
+    return FakeMixerBackend(delay) if name == "fake" else create_backend(name)
+
+
+def bench_library(backend, iterations: int) -> List[dict]:
+    """RedragonVolumeSync called directly (CLI and daemon building block)"""
+    from redragon_volume_sync import HeadsetRegistry
+
+    registry = HeadsetRegistry(backend=backend, watch_profile=True)
+    registry.refresh()
+    sync = registry.primary
+    if sync is None:
+        raise RuntimeError("fake headset not detected")
+
+    runs = {
+        "set": lambda command: sync.set_volume(int(command.split()[1]), silent=True),
+        "get": lambda command: sync.get_volumes(),
+        "status": lambda command: (sync.get_volumes(), sync._is_analog_output()),
+    }
+    results = []
+    try:
+        for operation, run in runs.items():
+            run(command_for(operation, 0))  # Warm up caches
+            latencies, elapsed = measure(run, operation, iterations)
+            results.append(summarize("library", operation, latencies, elapsed))
+    finally:
+        registry.close()
+    return results
+
+
+def make_daemon(backend):
+    from redragon_control_daemon import RedragonControlDaemon
+
+    daemon = RedragonControlDaemon(backend=backend)
+    daemon.logger.setLevel(logging.WARNING)
+    return daemon
+
+
+def close_daemon(daemon) -> None:
+    daemon.executor.shutdown(wait=True)
+    daemon.registry.close()
+    daemon.hotplug.close()
+
+
+def bench_process_command(backend, iterations: int) -> List[dict]:
+    """RedragonControlDaemon.process_command, without the socket"""
+    daemon = make_daemon(backend)
+    results = []
+    try:
+        for operation in OPERATIONS:
+            daemon.process_command(command_for(operation, 0))
+            latencies, elapsed = measure(daemon.process_command, operation, iterations)
+            results.append(summarize("process_command", operation, latencies, elapsed))
+    finally:
+        close_daemon(daemon)
+    return results
+
+
+async def _request(path: str, command: str) -> str:
+    reader, writer = await asyncio.open_unix_connection(path)
+    writer.write(command.encode('utf-8'))
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return response.decode('utf-8')
+
+
+async def _run_client(args: List[str]) -> None:
+    proc = await asyncio.create_subprocess_exec(
+        *args, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+    )
+    if await proc.wait() != 0:
+        raise RuntimeError(f"{' '.join(args)} failed")
+
+
+async def _client_scenarios(runs: int) -> List[dict]:
+    """Whole client invocations: interpreter startup, connect, request, exit"""
+    clients = {
+        "client python": [sys.executable, str(SCRIPT_DIR / "redragon_client.py")],
+        "client bash": ["bash", str(SCRIPT_DIR / "redragon-volume")],
+    }
+    results = []
+    for scenario, command in clients.items():
+        for operation in ("set", "get"):
+            latencies = []
+            started = time.perf_counter()
+            for i in range(runs):
+                args = command + ([str(i % 101)] if operation == "set" else [operation])
+                begin = time.perf_counter()
+                await _run_client(args)
+                latencies.append(time.perf_counter() - begin)
+            results.append(summarize(scenario, operation, latencies, time.perf_counter() - started))
+    return results
+
+
+async def _socket_scenarios(daemon, iterations: int, rate: float, duration: float, client_runs: int) -> List[dict]:
+    server_task = asyncio.ensure_future(daemon.serve())
+    while not os.path.exists(daemon.socket_path):
+        await asyncio.sleep(0.01)
+
+    results = []
+    try:
+        # One-shot: a connection per command, like redragon-volume
+        for operation in OPERATIONS:
+            await _request(daemon.socket_path, command_for(operation, 0))
+            latencies = []
+            started = time.perf_counter()
+            for i in range(iterations):
+                begin = time.perf_counter()
+                await _request(daemon.socket_path, command_for(operation, i))
+                latencies.append(time.perf_counter() - begin)
+            results.append(summarize("socket", operation, latencies, time.perf_counter() - started))
+
+        # Conditional status: answered "unchanged" while the version holds
+        response = await _request(daemon.socket_path, "status since=0")
+        since = response.rpartition("version=")[2]
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(iterations):
+            begin = time.perf_counter()
+            response = await _request(daemon.socket_path, f"status since={since}")
+            latencies.append(time.perf_counter() - begin)
+            since = response.rpartition("version=")[2]
+        results.append(summarize("socket since=", "status", latencies, time.perf_counter() - started))
+
+        # State page: the volume without any request to the daemon
+        while daemon.state_page is None or daemon.state_page.sequence == 0:
+            await asyncio.sleep(0.01)
+        reader = StateReader(daemon.state_page.path)
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(iterations):
+            begin = time.perf_counter()
+            reader.snapshot()
+            latencies.append(time.perf_counter() - begin)
+        results.append(summarize("state page", "get", latencies, time.perf_counter() - started))
+        reader.close()
+
+        if client_runs:
+            results += await _client_scenarios(client_runs)
+
+        # Pipelined: one connection, one command in flight at a time
+        reader, writer = await asyncio.open_unix_connection(daemon.socket_path)
+        writer.write(b"pipeline\n")
+        for operation in OPERATIONS:
+            latencies = []
+            started = time.perf_counter()
+            for i in range(iterations):
+                begin = time.perf_counter()
+                writer.write(f"{command_for(operation, i)}\n".encode('utf-8'))
+                await writer.drain()
+                await reader.readline()
+                latencies.append(time.perf_counter() - begin)
+            results.append(summarize("pipeline", operation, latencies, time.perf_counter() - started))
+
+        # Slider stream: sets at a fixed rate without waiting for answers
+        with daemon.set_lock:
+            received_before, applied_before = daemon.sets_received, daemon.sets_applied
+        sent_at = []
+
+        async def send():
+            interval = 1.0 / rate
+            next_send = time.perf_counter()
+            for i in range(int(rate * duration)):
+                await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+                sent_at.append(time.perf_counter())
+                writer.write(f"set {i % 101}\n".encode('utf-8'))
+                await writer.drain()
+                next_send += interval
+
+        sender = asyncio.ensure_future(send())
+        latencies = []
+        started = time.perf_counter()
+        total = int(rate * duration)
+        while len(latencies) < total:
+            await reader.readline()
+            latencies.append(time.perf_counter() - sent_at[len(latencies)])
+        await sender
+        elapsed = time.perf_counter() - started
+        writer.close()
+
+        with daemon.set_lock:
+            received = daemon.sets_received - received_before
+            applied = daemon.sets_applied - applied_before
+        results.append(summarize(
+            f"slider {rate:g} Hz", "set", latencies, elapsed,
+            sets_applied=applied, sets_coalesced=received - applied
+        ))
+    finally:
+        daemon.stop_event.set()
+        await server_task
+    return results
+
+
+def bench_cold_start(env: BenchEnvironment, runs: int) -> List[dict]:
+    """Socket activation: a request waiting in the backlog of a pre-bound
+    socket while the daemon process starts, detects the headset and answers
+
+    Raises:
+        RuntimeError: The request was lost or the daemon did not exit when idle
+    """
+    path = str(env.runtime_dir / "redragon-control.sock")
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(runs):
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(path)
+        listener.listen(16)
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.settimeout(10)
+        daemon = None
+        try:
+            client.connect(path)
+            client.sendall(b"get")
+            client.shutdown(socket.SHUT_WR)
+
+            begin = time.perf_counter()
+            daemon = subprocess.Popen(
+                [sys.executable, "-c", ACTIVATED_DAEMON, str(SCRIPT_DIR), str(env.proc_dir),
+                 "--idle-timeout", str(COLD_START_IDLE_TIMEOUT)],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                pass_fds=(3,), preexec_fn=lambda: os.dup2(listener.fileno(), 3)
+            )
+            response = b""
+            while True:
+                data = client.recv(1024)
+                if not data:
+                    break
+                response += data
+            latencies.append(time.perf_counter() - begin)
+            if not response.startswith(b"OK"):
+                raise RuntimeError(f"cold start answered {response!r}")
+
+            # Nobody connects anymore: the daemon goes away by itself
+            if daemon.wait(timeout=COLD_START_IDLE_TIMEOUT + 5) != 0:
+                raise RuntimeError(f"daemon exited with status {daemon.returncode}")
+        except subprocess.TimeoutExpired:
+            raise RuntimeError("daemon did not exit when idle")
+        except OSError as e:
+            raise RuntimeError(f"cold start request lost: {e}")
+        finally:
+            client.close()
+            listener.close()
+            if daemon is not None and daemon.poll() is None:
+                daemon.send_signal(signal.SIGTERM)
+                daemon.wait()
+            os.unlink(path)
+    return [summarize("cold start", "get", latencies, time.perf_counter() - started)]
+
+
+def bench_socket(backend, iterations: int, rate: float, duration: float, client_runs: int) -> List[dict]:
+    """The asyncio socket server, with clients on the same event loop"""
+    daemon = make_daemon(backend)
+    try:
+        return asyncio.run(_socket_scenarios(daemon, iterations, rate, duration, client_runs))
+    finally:
+        close_daemon(daemon)
+
+
+def print_table(results: List[dict], backend: str, iterations: int) -> None:
+    print(f"\nRedragon benchmark (backend: {backend}, {iterations} iterations per operation)\n")
+    print(f"{'scenario':<18}{'op':<8}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>11}")
+    print("-" * 73)
+    for result in results:
+        print(
+            f"{result['scenario']:<18}{result['op']:<8}{result['n']:>6}"
+            f"{result['p50_ms']:>10.3f}{result['p95_ms']:>10.3f}{result['p99_ms']:>10.3f}"
+            f"{result['ops_per_s']:>11.1f}"
+        )
+        if "sets_applied" in result:
+            print(f"{'':<26}sets applied: {result['sets_applied']}, coalesced: {result['sets_coalesced']}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Latency/throughput benchmark of the Redragon volume control paths (no hardware needed)"
+    )
+    parser.add_argument(
+        "-b", "--backend",
+        choices=("fake", "amixer", "native", "auto"),
+        default="fake",
+        help="Mixer backend: in-process fake (default), amixer (stub executable), native or auto"
+    )
+    parser.add_argument("-n", "--iterations", type=int, default=300, help="Commands per operation (default: 300)")
+    parser.add_argument("--mixer-delay", type=float, default=1.0, help="Fake backend cost per control access in ms (default: 1.0)")
+    parser.add_argument("--rate", type=float, default=50.0, help="Slider stream rate in Hz (default: 50)")
+    parser.add_argument("--duration", type=float, default=3.0, help="Slider stream duration in seconds (default: 3)")
+    parser.add_argument(
+        "--client-runs",
+        type=int,
+        default=30,
+        help="Command line client invocations per operation, 0 to skip (default: 30)"
+    )
+    parser.add_argument(
+        "--cold-starts",
+        type=int,
+        default=10,
+        help="Socket-activated daemon starts, 0 to skip (default: 10)"
+    )
+    parser.add_argument(
+        "--scenario",
+        choices=("all", "library", "process_command", "socket", "cold-start"),
+        default="all",
+        help="Scenario to run (default: all)"
+    )
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    with BenchEnvironment() as env, open(os.devnull, 'w') as devnull:
+        try:
+            # The library reports progress on stdout, keep it out of the results
+            with contextlib.redirect_stdout(devnull):
+                if args.scenario in ("all", "library"):
+                    results += bench_library(make_backend(args.backend, args.mixer_delay / 1000), args.iterations)
+                if args.scenario in ("all", "process_command"):
+                    results += bench_process_command(make_backend(args.backend, args.mixer_delay / 1000), args.iterations)
+                if args.scenario in ("all", "socket"):
+                    results += bench_socket(
+                        make_backend(args.backend, args.mixer_delay / 1000),
+                        args.iterations, args.rate, args.duration, args.client_runs
+                    )
+                if args.scenario in ("all", "cold-start") and args.cold_starts > 0:
+                    results += bench_cold_start(env, args.cold_starts)
+        except (MixerError, RuntimeError) as e:
+            print(f"✗ Benchmark failed: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results, args.backend, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
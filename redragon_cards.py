@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Redragon sound card discovery
+Lists sound cards from /proc/asound and /sys/class/sound without forking,
+falling back to "aplay -l" when neither is readable
+"""
+
+import os
+import re
+import subprocess
+from typing import List, NamedTuple, Optional, Pattern
+from redragon_metrics import count_fork
+
+PROC_ASOUND = "/proc/asound"
+SYSFS_SOUND = "/sys/class/sound"
+
+# USB dongles known to be Redragon headsets, by "vendor:product" or by
+# vendor alone ("vendor:*")
+KNOWN_USB_IDS = {
+    "040b:*": "Weltrend",  # Weltrend Semiconductor, used in H878/H848 dongles
+}
+
+# " 1 [H878           ]: USB-Audio - XiiSound H878"
+_PROC_CARD_RE = re.compile(r'^\s*(\d+) \[(\S+)\s*\]: (\S+) - (.*)$')
+_APLAY_CARD_RE = re.compile(r'^card (\d+): (\S+) \[([^\]]+)\]', re.IGNORECASE)
+_USB_ID_RE = re.compile(r'^([0-9a-f]{4}):([0-9a-f]{4})$')
+
+
+class SoundCard(NamedTuple):
+    number: str  # ALSA card index, as used in "hw:N" / "amixer -c N"
+    id: str  # ALSA card id, e.g. "H878"
+    name: str  # Human readable name, e.g. "XiiSound H878"
+    usb_id: Optional[str] = None  # "vendor:product" for USB cards
+
+
+def compile_patterns(patterns: List[str]) -> Pattern:
+    """Combines name patterns into one case-insensitive regex"""
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE)
+
+
+def known_usb_device(usb_id: Optional[str]) -> Optional[str]:
+    """Returns the vendor name if the USB id is a known headset dongle"""
+    if not usb_id:
+        return None
+    vendor = usb_id.split(":", 1)[0]
+    return KNOWN_USB_IDS.get(usb_id) or KNOWN_USB_IDS.get(f"{vendor}:*")
+
+
+def list_cards() -> List[SoundCard]:
+    """Lists the sound cards, from procfs, sysfs or aplay (in that order)"""
+    cards = _read_proc_cards()
+    if cards is None:
+        cards = _read_sysfs_cards()
+    if cards is None:
+        cards = _read_aplay_cards()
+    return cards
+
+
+def find_headsets(pattern: Pattern, match_usb_ids: bool = True) -> List[SoundCard]:
+    """Returns every sound card that looks like a Redragon headset
+
+    Args:
+        pattern: Compiled regex tried against the card id and name
+        match_usb_ids: Also accept cards whose USB id is in KNOWN_USB_IDS
+    """
+    return [
+        card for card in list_cards()
+        if pattern.search(f"{card.id} {card.name}")
+        or (match_usb_ids and known_usb_device(card.usb_id))
+    ]
+
+
+def _read_file(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _read_usb_id(number: str) -> Optional[str]:
+    usb_id = _read_file(f"{PROC_ASOUND}/card{number}/usbid")
+    if usb_id is None:
+        # USB audio interface node, its parent is the USB device
+        device = f"{SYSFS_SOUND}/card{number}/device/.."
+        vendor = _read_file(f"{device}/idVendor")
+        product = _read_file(f"{device}/idProduct")
+        if vendor and product:
+            usb_id = f"{vendor}:{product}"
+    if usb_id and _USB_ID_RE.match(usb_id.lower()):
+        return usb_id.lower()
+    return None
+
+
+def _read_proc_cards() -> Optional[List[SoundCard]]:
+    content = _read_file(f"{PROC_ASOUND}/cards")
+    if content is None:
+        return None
+
+    cards = []
+    for line in content.split('\n'):
+        match = _PROC_CARD_RE.match(line)
+        if match:
+            number, card_id, _, name = match.groups()
+            cards.append(SoundCard(number, card_id, name.strip(), _read_usb_id(number)))
+    return cards
+
+
+def _read_sysfs_cards() -> Optional[List[SoundCard]]:
+    try:
+        entries = os.listdir(SYSFS_SOUND)
+    except OSError:
+        return None
+
+    cards = []
+    for entry in sorted(entries):
+        match = re.match(r'card(\d+)$', entry)
+        if not match:
+            continue
+        number = match.group(1)
+        card_id = _read_file(f"{SYSFS_SOUND}/{entry}/id") or number
+        cards.append(SoundCard(number, card_id, card_id, _read_usb_id(number)))
+    return cards
+
+
+def _read_aplay_cards() -> List[SoundCard]:
+    # Force English locale for consistent output
+    env = os.environ.copy()
+    env['LC_ALL'] = 'C'
+    env['LANG'] = 'C'
+    count_fork(["aplay"])
+    try:
+        result = subprocess.run(["aplay", "-l"], capture_output=True, text=True, check=True, env=env)
+    except (subprocess.CalledProcessError, OSError):
+        return []
+
+    cards = {}
+    for line in result.stdout.split('\n'):
+        match = _APLAY_CARD_RE.match(line)
+        if match and match.group(1) not in cards:
+            number, card_id, name = match.groups()
+            cards[number] = SoundCard(number, card_id, name)
+    return list(cards.values())
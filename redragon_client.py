@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Redragon control client - talks to the control daemon's Unix socket
+Library API for the Python tools (ControlClient) and a command line entry
+point with the same commands and output as redragon-volume, in a single
+process with one connection per command (no transport probing)
+
+Startup time is the point of this module: it avoids the "socket" and
+"typing" modules (several milliseconds of imports on every run) and uses
+the C-level _socket directly.
+
+ControlClient.read_state() does not talk to the daemon at all: it reads
+the daemon's memory-mapped state page (redragon_state.py).
+"""
+
+from __future__ import annotations
+
+import _socket
+import os
+import sys
+
+USAGE = """Usage: {prog} <volume|status|get|mute|fade|list|sink|set-default|metrics|reload|watch> [card=N|device=NAME]
+  {prog} 50          # Define volume to 50%
+  {prog} status      # Show status
+  {prog} get         # Get current volume
+  {prog} mute        # Mute/unmute (toggle)
+  {prog} fade 30 500 # Fade volume to 30% over 500ms
+  {prog} list        # List connected headsets
+  {prog} sink        # Show the headset's audio sink
+  {prog} set-default # Use the headset as default audio output
+  {prog} metrics     # Show daemon metrics (Prometheus text format)
+  {prog} reload      # Re-read the daemon config file
+  {prog} watch 12    # Wait until the state version moves past 12, then show status
+  {prog} 50 card=2   # Define volume of a specific headset"""
+
+
+WATCH_TIMEOUT = 300.0  # Seconds "watch" waits for a change before answering anyway
+
+
+class ControlError(Exception):
+    """The daemon is unreachable or answered with an error"""
+
+
+class DaemonNotRunning(ControlError):
+    """No control socket"""
+
+
+def default_socket_path() -> str:
+    """socket_path of the daemon config file, or $XDG_RUNTIME_DIR/redragon-control.sock"""
+    config_home = os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser("~/.config")
+    try:
+        with open(f"{config_home}/redragon-hs-companion/config.json") as f:
+            import json  # Only paid when a config file exists
+            path = json.load(f).get("socket_path")
+    except (OSError, ValueError, AttributeError):
+        path = None
+    if isinstance(path, str) and path:
+        return path
+    return f"{os.environ.get('XDG_RUNTIME_DIR', '/tmp')}/redragon-control.sock"
+
+
+class ControlClient:
+    """One-shot requests to the control daemon"""
+
+    def __init__(self, socket_path: str | None = None, timeout: float = 5.0):
+        """
+        Args:
+            socket_path: Control socket (default: see default_socket_path())
+            timeout: Seconds to wait for the daemon
+        """
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = timeout
+        self._state_reader = None
+
+    def request(self, command: str) -> str:
+        """Sends one command and returns the raw response
+
+        Raises:
+            DaemonNotRunning: The socket does not exist or refuses connections
+            ControlError: The connection failed midway
+        """
+        sock = self._connect()
+        try:
+            sock.sendall(command.encode('utf-8'))
+            sock.shutdown(_socket.SHUT_WR)
+            chunks = []
+            while True:
+                data = sock.recv(65536)
+                if not data:
+                    break
+                chunks.append(data)
+            return b"".join(chunks).decode('utf-8', 'replace')
+        except DaemonNotRunning:
+            raise
+        except OSError as e:
+            raise ControlError(f"error communicating with daemon: {e}") from e
+        finally:
+            sock.close()
+
+    def _connect(self):
+        sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            sock.close()
+            raise DaemonNotRunning(str(e)) from e
+        except OSError as e:
+            sock.close()
+            raise ControlError(f"error communicating with daemon: {e}") from e
+        return sock
+
+    def call(self, command: str, selector: str | None = None) -> str:
+        """Sends a command and returns the text after "OK: "
+
+        Raises:
+            ControlError: The daemon answered "ERROR: ..."
+        """
+        response = self.request(f"{command} {selector}" if selector else command)
+        if not response.startswith("OK"):
+            raise ControlError(response[len("ERROR: "):] if response.startswith("ERROR: ") else response)
+        return response[len("OK: "):]
+
+    def set_volume(self, volume: int, selector: str | None = None) -> int:
+        return int(self.call(f"set {volume}", selector))
+
+    def get_volume(self, selector: str | None = None) -> int:
+        return int(self.call("get", selector))
+
+    def toggle_mute(self, selector: str | None = None, fade_ms: int | None = None) -> str:
+        """Returns "muted" or "unmuted <volume>\", fading if fade_ms is given"""
+        return self.call("mute" if fade_ms is None else f"mute {fade_ms}", selector)
+
+    def fade(self, volume: int, duration_ms: int, selector: str | None = None) -> int:
+        """Starts a fade, returns the target without waiting for the end"""
+        return int(self.call(f"fade {volume} {duration_ms}", selector))
+
+    def status(self, selector: str | None = None) -> dict[str, str]:
+        """Returns the status fields (device, card, pcm0, pcm1, analog)"""
+        fields = {}
+        rest = self.call("status", selector)
+        # device=<name with spaces> card=1 pcm0=50 ...
+        for part in rest.split(" "):
+            key, sep, value = part.partition("=")
+            if sep:
+                fields[key] = value
+                last = key
+            elif fields:
+                fields[last] += f" {part}"
+        return fields
+
+    def poll_status(self, since: int | None = None, selector: str | None = None) -> tuple[int, dict | None]:
+        """Status only if it changed since a state version, for pollers
+
+        Args:
+            since: Version returned by the previous call (None: always fetch)
+            selector: "card=<number|id>" or "device=<name>"
+
+        Returns:
+            (current version, status dict with device, card, pcm0, pcm1 and
+            analog as JSON types), the dict being None when unchanged
+        """
+        import json  # Only paid by pollers
+        command = "status format=json" if since is None else f"status since={since} format=json"
+        response = self.request(f"{command} {selector}" if selector else command)
+        try:
+            reply = json.loads(response)
+        except ValueError:
+            # Daemon without format=json: "ERROR: unknown ..." text
+            raise ControlError(response[len("ERROR: "):] if response.startswith("ERROR: ") else response)
+        if not reply.pop("ok", False):
+            raise ControlError(reply.get("error", response))
+        version = reply.pop("version")
+        return version, None if reply.get("unchanged") else reply
+
+    def watch(self, since: int = 0, selector: str | None = None, timeout: float = WATCH_TIMEOUT) -> str:
+        """Status once it differs from a state version, for callers that can
+        only run commands (long poll)
+
+        Answers right away if the state already moved past `since`, else
+        waits for the next change event (at most `timeout` seconds). The
+        subscription is opened before the status query, so a change in
+        between still ends the wait.
+
+        Args:
+            since: Version from the previous watch (0: answer right away)
+            selector: "card=<number|id>" or "device=<name>"
+            timeout: Seconds to wait for a change
+
+        Returns:
+            The raw "status since=" response: "OK: device=... version=<v>",
+            "OK: unchanged version=<v>" or "ERROR: ..."
+
+        Raises:
+            DaemonNotRunning: The socket does not exist or refuses connections
+            ControlError: The connection failed midway
+        """
+        suffix = f" {selector}" if selector else ""
+        sock = self._connect()
+        try:
+            sock.sendall(f"subscribe{suffix}".encode('utf-8'))
+            # "OK: subscribed", then the current state: every later change is pushed
+            buffer = b""
+            while buffer.count(b"\n") < 2:
+                data = sock.recv(4096)
+                if not data:
+                    raise ControlError(buffer.decode('utf-8', 'replace').strip() or "subscription closed by the daemon")
+                buffer += data
+            if not buffer.startswith(b"OK"):
+                raise ControlError(buffer.decode('utf-8', 'replace').partition("\n")[0])
+
+            response = self.request(f"status since={since}{suffix}")
+            if response.startswith("OK: ") and not response.startswith("OK: unchanged"):
+                return response
+            # Unchanged, or no headset yet: an event already queued ends the wait at once
+            if not buffer.split(b"\n", 2)[2]:
+                sock.settimeout(timeout)
+                try:
+                    sock.recv(4096)  # An event, or EOF when the daemon stops
+                except _socket.timeout:
+                    pass
+            return self.request(f"status since={since}{suffix}")
+        except ControlError:
+            raise
+        except OSError as e:
+            raise ControlError(f"error communicating with daemon: {e}") from e
+        finally:
+            sock.close()
+
+    def headsets(self) -> dict[str, str]:
+        """Returns the connected headsets, name by ALSA card number"""
+        entries = (entry.strip().partition("=") for entry in self.call("list").split(","))
+        return {card: name for card, _, name in entries if card}
+
+    def sink(self, selector: str | None = None) -> str:
+        return self.call("sink", selector)
+
+    def set_default(self, selector: str | None = None) -> str:
+        return self.call("set-default", selector)
+
+    def read_state(self, selector: str | None = None) -> dict | None:
+        """State of a headset from the daemon's state page, without a request
+
+        The page is mapped on the first call; later calls are plain memory
+        reads. Compare state_sequence() to tell whether anything changed.
+
+        Args:
+            selector: "card=<number|id>" or "device=<name>", None for the
+                      default headset
+
+        Returns:
+            Dict with device, card, id, pcm0, pcm1, analog, muted and
+            volume (None if unreadable), or None if no headset matches
+
+        Raises:
+            DaemonNotRunning: No state page (daemon stopped or too old)
+        """
+        headsets = self._state_snapshot()[1]
+        if not selector:
+            return headsets[0] if headsets else None
+        key, _, value = selector.partition("=")
+        for state in headsets:
+            if key == "card" and value in (state["card"], state["id"]):
+                return state
+            if key == "device" and value.lower() in state["device"].lower():
+                return state
+        return None
+
+    def state_sequence(self) -> int:
+        """Sequence number of the state page, changes on every update"""
+        return self._state_snapshot()[0]
+
+    def _state_snapshot(self):
+        from redragon_state import StateReader  # Only paid by state page users
+        reader = self._state_reader
+        if reader is not None and reader.closed:
+            # Daemon stopped or restarted: map its new page, if any
+            reader.close()
+            reader = self._state_reader = None
+        if reader is None:
+            try:
+                reader = self._state_reader = StateReader()
+            except (OSError, ValueError) as e:
+                raise DaemonNotRunning(str(e)) from e
+        return reader.snapshot()
+
+    def reload(self) -> None:
+        """Makes the daemon re-read its config file
+
+        Raises:
+            ControlError: The file is invalid, the daemon kept its settings
+        """
+        self.call("reload")
+
+
+def main(argv: list[str] | None = None) -> int:
+    """redragon-volume compatible command line, returns the exit status"""
+    argv = sys.argv[1:] if argv is None else argv
+    prog = os.path.basename(sys.argv[0])
+    if not argv:
+        print(USAGE.format(prog=prog))
+        return 1
+
+    client = ControlClient()
+    if not os.path.exists(client.socket_path):
+        print("Error: Daemon is not running", file=sys.stderr)
+        print("Execute: systemctl --user start redragon-control-daemon", file=sys.stderr)
+        return 1
+
+    command = argv[0]
+    selector = f" {argv[1]}" if len(argv) > 1 and argv[1] else ""
+
+    if command == "watch":
+        args = argv[1:]
+        since = int(args.pop(0)) if args and args[0].isdigit() else 0
+        try:
+            response = client.watch(since, args[0] if args and args[0] else None)
+        except ControlError:
+            print("Error communicating with daemon", file=sys.stderr)
+            return 1
+        print(response)
+        return 0 if response.startswith("OK:") else 1
+
+    # show formats the text after "OK: ", None prints the raw response
+    if command == "status":
+        request, show = f"status{selector}", None
+    elif command == "metrics":
+        request, show = "metrics", None
+    elif command == "get":
+        request, show = f"get{selector}", lambda value: f"Volume: {value}%"
+    elif command == "mute":
+        request, show = f"mute{selector}", lambda value: "OK"
+    elif command == "fade":
+        if len(argv) < 3:
+            print(f"Usage: {prog} fade <0-100> <ms> [card=N|device=NAME]", file=sys.stderr)
+            return 1
+        selector = f" {argv[3]}" if len(argv) > 3 and argv[3] else ""
+        request, show = f"fade {argv[1]} {argv[2]}{selector}", lambda value: f"Volume: {value}%"
+    elif command == "list":
+        request, show = "list", lambda value: "\n".join(entry.strip() for entry in value.split(","))
+    elif command in ("sink", "set-default"):
+        request, show = f"{command}{selector}", lambda value: value
+    elif command == "reload":
+        request, show = "reload", lambda value: value
+    elif command[:1].isdigit():
+        try:
+            volume = int(command)
+        except ValueError:
+            print(f"Invalid command: {command}", file=sys.stderr)
+            return 1
+        if not 0 <= volume <= 100:
+            print("Volume must be between 0 and 100", file=sys.stderr)
+            return 1
+        request, show = f"set {volume}{selector}", lambda value: f"Volume: {value}%"
+    else:
+        print(f"Invalid command: {command}", file=sys.stderr)
+        return 1
+
+    try:
+        response = client.request(request)
+    except ControlError:
+        print("Error communicating with daemon", file=sys.stderr)
+        return 1
+
+    if show is None:
+        sys.stdout.write(response if response.endswith("\n") else response + "\n")
+        return 0
+    if not response.startswith("OK:"):
+        print(response, file=sys.stderr)
+        return 1
+    print(show(response[len("OK: "):]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Redragon configuration - per-machine tunables of the daemons
+Read from $XDG_CONFIG_HOME/redragon-hs-companion/config.json (a JSON
+object, every key optional) once at startup and again on SIGHUP or the
+control daemon's "reload" command, without re-detecting the headsets
+
+A file that cannot be parsed or validated is reported and the settings in
+effect are kept
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# name -> (default, type, minimum, maximum)
+SETTINGS = {
+    "debounce_delay": (0.5, float, 0.0, 10.0),  # Seconds a volume set is protected from the sync
+    "max_errors": (3, int, 1, 100),  # Consecutive errors before a headset is re-detected
+    "poll_min": (0.1, float, 0.01, 60.0),  # Polling interval right after a change
+    "poll_max": (5.0, float, 0.01, 600.0),  # Polling interval while volumes are stable
+    "monitor_retry_interval": (2.0, float, 0.1, 600.0),  # Seconds between attempts to get control events
+    "state_poll_interval": (2.0, float, 0.1, 600.0),  # Subscriber refresh without control events
+    "detect_attempts": (3, int, 1, 20),  # Detections of a new card while udev sets it up
+    "detect_retry_delay": (0.5, float, 0.0, 10.0),
+    "unmute_volume": (50, int, 1, 100),  # Volume of an unmute with no volume remembered
+    "soft_mute_ms": (0, int, 0, 60000),
+    "socket_path": (None, str, None, None),  # Control socket (default: $XDG_RUNTIME_DIR/redragon-control.sock)
+    "idle_timeout": (0.0, float, 0.0, 86400.0),  # Control daemon exits after that long without clients (0: never)
+    "device_patterns": (None, list, None, None),  # Card name regexes replacing the built-in ones
+}
+
+# Settings only read at startup
+RESTART_SETTINGS = ("socket_path",)
+
+
+class ConfigError(Exception):
+    """The config file is unreadable or has an invalid setting"""
+
+
+def config_path() -> Path:
+    config_home = os.environ.get('XDG_CONFIG_HOME') or str(Path.home() / ".config")
+    return Path(config_home) / "redragon-hs-companion" / "config.json"
+
+
+def default_config() -> Dict[str, Any]:
+    return {name: spec[0] for name, spec in SETTINGS.items()}
+
+
+def load_config(path: Optional[Path] = None) -> Dict[str, Any]:
+    """Reads the config file over the defaults
+
+    Args:
+        path: Config file (default: config_path()), missing means defaults
+
+    Raises:
+        ConfigError: The file is unreadable, not JSON or has an invalid setting
+    """
+    path = path or config_path()
+    values = default_config()
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return values
+    except (OSError, ValueError) as e:
+        raise ConfigError(f"{path}: {e}") from e
+
+    if not isinstance(data, dict):
+        raise ConfigError(f"{path}: expected a JSON object")
+    for name, value in data.items():
+        values[name] = _validate(path, name, value)
+    if values["poll_max"] < values["poll_min"]:
+        raise ConfigError(f"{path}: poll_max must not be below poll_min")
+    return values
+
+
+def _validate(path: Path, name: str, value: Any) -> Any:
+    if name not in SETTINGS:
+        raise ConfigError(f"{path}: unknown setting '{name}'")
+    _, kind, minimum, maximum = SETTINGS[name]
+    if value is None:
+        return SETTINGS[name][0]
+
+    if kind is float and isinstance(value, int) and not isinstance(value, bool):
+        value = float(value)
+    if not isinstance(value, kind) or isinstance(value, bool):
+        raise ConfigError(f"{path}: {name} must be of type {kind.__name__}")
+    if minimum is not None and not minimum <= value <= maximum:
+        raise ConfigError(f"{path}: {name} must be between {minimum:g} and {maximum:g}")
+
+    if name == "device_patterns":
+        if not value or not all(isinstance(pattern, str) and pattern for pattern in value):
+            raise ConfigError(f"{path}: device_patterns must be a list of regular expressions")
+        for pattern in value:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ConfigError(f"{path}: invalid device pattern '{pattern}': {e}") from e
+    return value
+
+
+class Config:
+    """Settings in effect in a daemon, command line values taking precedence"""
+
+    def __init__(self, path: Optional[Path] = None, overrides: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            path: Config file (default: config_path())
+            overrides: Settings given on the command line (None values are ignored)
+        """
+        self.path = path or config_path()
+        self.overrides = {name: value for name, value in (overrides or {}).items() if value is not None}
+        self.values = default_config()
+        self.values.update(self.overrides)
+
+    def __getitem__(self, name: str) -> Any:
+        return self.values[name]
+
+    def load(self) -> Dict[str, Any]:
+        """(Re)reads the config file
+
+        Returns:
+            The settings that changed, by name
+
+        Raises:
+            ConfigError: The current settings are kept
+        """
+        values = load_config(self.path)
+        values.update(self.overrides)
+        if values["poll_max"] < values["poll_min"]:
+            values["poll_max"] = values["poll_min"]
+        changed = {name: value for name, value in values.items() if self.values.get(name) != value}
+        self.values = values
+        return changed
@@ -2,25 +2,264 @@
 """
 Redragon Control Daemon - Fast volume control server
 Accepts commands via Unix socket to avoid Python startup overhead
+
+Clients are served concurrently by an asyncio server; mixer work runs on a
+dedicated single-thread executor so commands never touch the headset at
+the same time
+
+Protocol: a client sends one command and gets one response (no trailing
+newline), or sends "pipeline" as its first line to keep the connection
+open and send newline-delimited commands, each answered by one
+newline-terminated response in order
+
+Rapid "set" commands are coalesced: a set still waiting for the mixer is
+acknowledged without hardware work when a newer one arrives
+
+"subscribe" keeps the connection open and streams one "EVENT:" line per
+volume, mute or analog/digital change
+
+"sink" returns the headset's PulseAudio/PipeWire sink name from an
+in-memory index, "set-default" makes it the default output
+
+"fade <target> <ms>" ramps the volume over time and "mute <ms>" (or every
+mute with --soft-mute) fades out/in instead of jumping. Ramps run on the
+event loop, writing at most every FADE_STEP_INTERVAL through the mixer
+executor, so other clients keep being served; a newer set, mute or fade
+for the same headset cancels the ramp. Both answer right away
+
+"metrics" returns counters and latency histograms in Prometheus text
+format (multi-line, one-shot connections only)
+
+With --with-sync the daemon also keeps PCM[1] in sync with PCM[0] (the
+job of redragon_daemon.py), in the same process: syncs run on the mixer
+executor next to the socket commands, on the same headset objects, so
+they can never race a "set" and detection runs only once
+
+The state of every headset is also published in a memory-mapped state
+page ($XDG_RUNTIME_DIR/redragon-state, see redragon_state.py), updated on
+the same changes as the subscriptions, so widgets can read the volume
+without connecting at all
+
+Under systemd socket activation (redragon-control-daemon.socket) the
+listening socket is inherited (LISTEN_FDS) instead of bound, so clients
+connecting while the daemon starts wait in the socket backlog. With
+--idle-timeout the daemon exits after that long without any connection;
+the socket unit starts it again on the next client
+
+"get", "status" and "list" take "format=json" for a one-line JSON object
+instead of the text response, and "since=<version>": every change of the
+published headset state bumps a state version, reported with the
+response, and a query whose version is still current is answered
+"OK: unchanged version=<v>" from the event loop without touching the
+mixer
+
+"reload" re-reads the config file (see redragon_config.py), like SIGHUP:
+tunables change without a restart or re-detecting the headsets
+
+Under systemd (Type=notify) READY=1 is sent once the socket listens and
+the headsets are detected (and in combined mode their volume restored),
+STATUS= follows the headsets and how they are watched, and the watchdog is
+only pinged while the mixer executor still completes jobs, so a daemon
+stuck in amixer or pactl gets restarted
+
+With several headsets connected, "set", "get", "status", "mute", "sink",
+"set-default" and "subscribe" accept a "card=<number|id>" or "device=<name>" selector; without
+one they act on the headset with the lowest card number
 """
 
-import socket
+import argparse
+import asyncio
+import json
 import os
 import sys
 import signal
+import socket
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from redragon_volume_sync import RedragonVolumeSync
+from redragon_alsa import MixerError
+from redragon_config import RESTART_SETTINGS, Config, ConfigError
+from redragon_daemon import POLL_MAX_INTERVAL, POLL_MIN_INTERVAL, AdaptivePoller, SyncWorker
+from redragon_hotplug import HotplugWatcher
+from redragon_metrics import METRICS
+from redragon_notify import SystemdNotifier
+from redragon_state import StatePage
+from redragon_volume_sync import HeadsetRegistry
+
+PIPELINE_COMMAND = "pipeline"
+SUBSCRIBE_COMMAND = "subscribe"
+MAX_SUBSCRIBER_BACKLOG = 100  # Events queued for a slow subscriber before dropping it
+MAX_LINE_LENGTH = 4096
+FADE_STEP_INTERVAL = 0.025  # Seconds between ramp writes (at most 40 writes/s)
+MAX_FADE_MS = 60000
+METRICS_COMMAND = "metrics"
+RELOAD_COMMAND = "reload"
+SD_LISTEN_FDS_START = 3  # First file descriptor passed by systemd
+SELECTOR_KEYS = ("card=", "device=")
+OPTION_KEYS = ("since=", "format=")
+OPTION_COMMANDS = ("get", "status", "list")  # Commands taking since= and format=
+# Commands reported by name in the metrics, anything else counts as "other"
+COMMANDS = (
+    "set", "get", "status", "mute", "fade", "list", "sink", "set-default", "ping", "stats",
+    METRICS_COMMAND, RELOAD_COMMAND, SUBSCRIBE_COMMAND
+)
+
+
+def inherited_socket():
+    """Listening socket passed by systemd socket activation
+
+    Follows sd_listen_fds(): the descriptors are for this process only if
+    LISTEN_PID matches, and the variables are removed so children do not
+    take them for theirs.
+
+    Returns:
+        The first passed socket if it is a Unix stream socket, else None
+    """
+    listen_pid = os.environ.pop("LISTEN_PID", None)
+    listen_fds = os.environ.pop("LISTEN_FDS", None)
+    os.environ.pop("LISTEN_FDNAMES", None)
+    try:
+        if listen_pid is None or int(listen_pid) != os.getpid() or int(listen_fds or 0) < 1:
+            return None
+    except ValueError:
+        return None
+    sock = socket.socket(fileno=SD_LISTEN_FDS_START)
+    if sock.family != socket.AF_UNIX or sock.type != socket.SOCK_STREAM:
+        sock.detach()
+        return None
+    os.set_inheritable(sock.fileno(), False)
+    return sock
+
+
+def split_selector(parts):
+    """Separates a "card=" / "device=" selector from the command words
+
+    Returns:
+        (remaining words, selector or None)
+    """
+    selector = None
+    rest = []
+    for part in parts:
+        if part.startswith(SELECTOR_KEYS):
+            selector = part
+        else:
+            rest.append(part)
+    return rest, selector
+
+
+def split_options(parts):
+    """Separates "since=" / "format=" options from the command words
+
+    Returns:
+        (remaining words, {option: value})
+    """
+    options = {}
+    rest = []
+    for part in parts:
+        if part.startswith(OPTION_KEYS):
+            key, _, value = part.partition("=")
+            options[key] = value
+        else:
+            rest.append(part)
+    return rest, options
+
+
+class Subscriber:
+    """One subscribed connection, following one headset"""
+
+    def __init__(self, selector=None):
+        self.selector = selector
+        self.queue = asyncio.Queue()
+        self.last_event = None
+
+    def push(self, event):
+        """Queues the event if it changed, returns False if the client fell behind"""
+        if event == self.last_event:
+            return True
+        if self.queue.qsize() >= MAX_SUBSCRIBER_BACKLOG:
+            return False
+        self.last_event = event
+        self.queue.put_nowait(event + "\n")
+        return True
+
 
 class RedragonControlDaemon:
-    def __init__(self):
+    def __init__(self, backend="auto", with_sync=False, soft_mute_ms=None, poll_min=None, poll_max=None,
+                 idle_timeout=None):
+        """
+        Args:
+            backend: Mixer backend name ("auto", "native", "amixer") or a
+                     backend instance
+            with_sync: Also synchronize PCM[0] → PCM[1] (replaces the
+                       separate sync daemon)
+            soft_mute_ms: Fade duration of "mute" without an explicit one
+                          (0: mute instantly)
+            poll_min: Combined mode polling interval right after a change,
+                      for headsets without control events (seconds)
+            poll_max: Combined mode polling interval while volumes are stable
+            idle_timeout: Seconds without connections before exiting (0:
+                          never, ignored in combined mode)
+
+        Options left to None come from the config file.
+        """
         self.running = True
-        self.sync = RedragonVolumeSync()
-        self.volume_before_mute = None  # Stores volume before muting
+        self.registry = HeadsetRegistry(backend=backend, watch_profile=True)
+        self.config = Config(overrides={
+            "soft_mute_ms": soft_mute_ms, "poll_min": poll_min, "poll_max": poll_max, "idle_timeout": idle_timeout
+        })
+        self.volume_before_mute = {}  # Stores volume before muting, by ALSA card id
+        self.unmute_volume = 50  # Unmute volume when none was remembered
+        self.soft_mute_ms = 0
+        self.fades = {}  # ALSA card number -> running ramp task
+        self.muting = set()  # ALSA card ids being faded out by "mute"
+
+        # Blocking mixer work (amixer/pactl/ioctls) runs here, one at a time
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mixer")
+        self.stop_event = None  # asyncio.Event, created inside the event loop
+
+        # Set coalescing: only the latest queued "set" reaches the mixer
+        self.set_lock = threading.Lock()
+        self.pending_sets = {}  # card number -> (command, volume, future) waiting for the executor
+        self.sets_received = 0
+        self.sets_applied = 0
+
+        # Push subscriptions
+        self.clients = set()  # StreamWriter of every open connection
+        self.last_activity = time.monotonic()  # Last connection closed
+        self.idle_timeout = 0
+        self.idle_changed = None  # asyncio.Event, set when idle_timeout is reloaded
+        self.idle_exit = False
+        self.subscribers = set()  # Subscriber per subscribed connection
+        self.refresh_task = None
+        self.refresh_pending = False
+        self.state_version = 0  # Bumped on every change of the published state, 0: none yet
+        self.version_lock = threading.Lock()  # Bumped from the executor and the event loop
+        self.published_states = None  # [(card, state)] of the last refresh
+        self.versioned = False  # A client relies on state_version, keep refreshing
+        self.state_page = None  # StatePage, created when serving
+        self.state_poll_interval = 2  # Only used when control events are unavailable
+        self.monitor_retry_interval = 2  # Seconds between attempts to get control events
+
+        # Sound card add/remove notifications
+        self.hotplug = HotplugWatcher()
+        self.cards_changed = None  # asyncio.Event, set on every hotplug event
+        self.detect_attempts = 3
+        self.detect_retry_delay = 0.5
+        self.loop = None  # Event loop, to be notified from the executor
+        self.notifier = SystemdNotifier()
+
+        # Combined mode: PCM[0] → PCM[1] sync workers, by ALSA card number
+        self.with_sync = with_sync
+        self.workers = {}
+        self.sync_pending = set()  # Cards with a sync already scheduled
+        self.poll_min = POLL_MIN_INTERVAL
+        self.poll_max = POLL_MAX_INTERVAL
+        self.max_errors = 3
+        self.polled_cards = set()  # Cards without control events
+        self.polls_changed = None  # asyncio.Event, set when a poll rescheduled itself
 
-        # Socket path
-        runtime_dir = os.environ.get('XDG_RUNTIME_DIR', '/tmp')
-        self.socket_path = f"{runtime_dir}/redragon-control.sock"
 
         # Configure logging
         log_dir = Path.home() / ".local" / "share" / "redragon-hs-companion"
@@ -37,84 +276,258 @@ class RedragonControlDaemon:
         )
         self.logger = logging.getLogger(__name__)
 
-    def signal_handler(self, signum, frame):
+        self.reload_config()
+        # Socket path (read once, the socket is not moved on reload)
+        runtime_dir = os.environ.get('XDG_RUNTIME_DIR', '/tmp')
+        self.socket_path = self.config["socket_path"] or f"{runtime_dir}/redragon-control.sock"
+        # Socket activation: the path is the one of the .socket unit
+        self.listen_socket = inherited_socket()
+        if self.listen_socket is not None:
+            self.socket_path = self.listen_socket.getsockname() or self.socket_path
+        self.registry.refresh()
+
+    def signal_handler(self, signum, frame=None):
         self.logger.info(f"Received signal {signum}, closing daemon...")
         self.running = False
+        if self.stop_event is not None:
+            self.stop_event.set()
+
+    def reload_config(self):
+        """Reads the config file and applies it to the running headsets
+        (executor thread, once the daemon is serving)
+
+        Returns:
+            None, or the error that kept the current settings
+        """
+        try:
+            changed = self.config.load()
+        except ConfigError as e:
+            self.logger.error(f"Config not applied: {e}")
+            return str(e)
+        if changed:
+            self.logger.info("Config: " + ", ".join(f"{name}={value}" for name, value in sorted(changed.items())))
+        if self.loop is not None:
+            for name in RESTART_SETTINGS:
+                if name in changed:
+                    self.logger.warning(f"Config: {name} takes effect after a restart")
+
+        config = self.config
+        self.unmute_volume = config["unmute_volume"]
+        self.soft_mute_ms = config["soft_mute_ms"]
+        if self.idle_timeout != config["idle_timeout"]:
+            self.idle_timeout = config["idle_timeout"]
+            if self.loop is not None and self.idle_changed is not None:
+                self.loop.call_soon_threadsafe(self.idle_changed.set)
+        self.state_poll_interval = config["state_poll_interval"]
+        self.monitor_retry_interval = config["monitor_retry_interval"]
+        self.detect_attempts = config["detect_attempts"]
+        self.detect_retry_delay = config["detect_retry_delay"]
+        self.poll_min = config["poll_min"]
+        self.poll_max = config["poll_max"]
+        self.max_errors = config["max_errors"]
+        self.registry.configure(config["device_patterns"], config["debounce_delay"])
+        for worker in list(self.workers.values()):
+            worker.max_errors = self.max_errors
+            worker.poller.set_bounds(self.poll_min, self.poll_max)
+        # New intervals and patterns apply from the next watch loop pass
+        self.notify_cards_changed()
+        return None
+
+    def on_sighup(self):
+        """Reloads the config between two mixer jobs"""
+        self.loop.run_in_executor(self.executor, self.notified_reload)
+
+    def notified_reload(self):
+        """reload_config() reported to systemd (executor thread)"""
+        with self.notifier.reloading():
+            return self.reload_config()
+
+    @staticmethod
+    def command_name(command):
+        """Command name used as metrics label"""
+        parts = command.split()
+        return parts[0] if parts and parts[0] in COMMANDS else "other"
+
+    def count_request(self, command):
+        METRICS.count("redragon_requests_total", command=self.command_name(command))
+
+    def render_metrics(self):
+        """Prometheus text exposition of the daemon and library metrics"""
+        METRICS.gauge("redragon_headsets", len(self.registry.headsets))
+        METRICS.gauge("redragon_subscribers", len(self.subscribers))
+        return METRICS.render()
 
     def process_command(self, command):
         """Processes commands received via socket"""
+        with METRICS.timed("redragon_request_seconds", command=self.command_name(command)):
+            response = self._process_command(command)
+        if self.is_mutation(command) and response.startswith("OK"):
+            # Before the next command reads it: the refresh may be later
+            self.bump_state_version()
+        if response.startswith("ERROR: ") and split_options(command.split())[1].get("format") == "json":
+            return json.dumps({"ok": False, "error": response[len("ERROR: "):]})
+        return response
+
+    @staticmethod
+    def reply(options, version, text, **fields):
+        """Response of a command taking options: the text, or the fields as a
+        JSON object with format=json; both report the state version when asked"""
+        if options.get("format") == "json":
+            return json.dumps({"ok": True, **fields, "version": version})
+        if "since" in options:
+            text += f" version={version}"
+        return text
+
+    def bump_state_version(self):
+        """Marks the published state outdated (any thread)"""
+        with self.version_lock:
+            self.state_version += 1
+
+    def unchanged_response(self, command):
+        """Answers a query whose since= version is still current, without
+        the mixer (event loop)
+
+        Returns:
+            The response, or None if the command has to be processed
+        """
+        parts, _ = split_selector(command.split())
+        parts, options = split_options(parts)
+        if "since" not in options or not parts or parts[0] not in OPTION_COMMANDS:
+            return None
+        if options.get("format", "text") not in ("text", "json"):
+            return None
+        if not self.versioned:
+            self.versioned = True
+            if self.state_page is None:
+                # Not refreshed until now: keep refreshing even without subscribers
+                self.schedule_refresh()
+                return None
+        # A change may be on its way to the next version
+        refreshing = self.refresh_pending or (self.refresh_task is not None and not self.refresh_task.done())
+        if refreshing or self.pending_sets or not self.state_version or options["since"] != str(self.state_version):
+            return None
+        return self.reply(options, self.state_version, "OK: unchanged", unchanged=True)
+
+    def _process_command(self, command):
+        # Read first: a response never carries a newer version than its values
+        version = self.state_version
         parts = command.strip().split()
+        parts, selector = split_selector(parts)
+        parts, options = split_options(parts)
         if not parts:
             return "ERROR: empty command"
 
         cmd = parts[0]
+        if options and cmd not in OPTION_COMMANDS:
+            return f"ERROR: {cmd} takes no since= or format= option"
+        if options.get("format", "text") not in ("text", "json"):
+            return "ERROR: format must be text or json"
+
+        if cmd == "stats":
+            with self.set_lock:
+                received, applied = self.sets_received, self.sets_applied
+            response = f"OK: sets_received={received} sets_applied={applied} sets_coalesced={received - applied}"
+            if self.with_sync:
+                response += f" syncs={sum(worker.sync_count for worker in list(self.workers.values()))}"
+            suppressed = sum(sync.writes_suppressed for sync in list(self.registry.headsets.values()))
+            return response + f" writes_suppressed={suppressed}"
+
+        if cmd == METRICS_COMMAND:
+            return "ERROR: metrics is only available on one-shot connections"
+
+        if cmd == RELOAD_COMMAND:
+            error = self.notified_reload()
+            return f"ERROR: {error}" if error else "OK: reloaded"
 
         try:
             # Try to detect headset if not connected
-            if not self.sync.card_id:
+            if not self.registry.headsets:
                 self.logger.info("Headset not detected, attempting to reconnect...")
-                if not self.sync.detect_card():
+                if not self.detect_headsets():
                     return "ERROR: headset not detected"
-                else:
-                    device_info = f"{self.sync.device_name} (card {self.sync.card_id})"
-                    self.logger.info(f"Headset reconnected: {device_info}")
+
+            if cmd == "list":
+                headsets = [self.registry.headsets[card] for card in sorted(self.registry.headsets, key=int)]
+                return self.reply(
+                    options, version,
+                    "OK: " + ", ".join(f"{sync.card_id}={sync.device_name}" for sync in headsets),
+                    headsets=[{"card": sync.card_id, "device": sync.device_name} for sync in headsets]
+                )
+
+            sync = self.registry.select(selector)
+            if sync is None:
+                return f"ERROR: no headset matching '{selector}'"
+
+            if not sync.card_id:
+                if not sync.detect_card():
+                    self.registry.remove(sync.card.number)
+                    self.notify_cards_changed()
+                    return "ERROR: headset not detected"
+                device_info = f"{sync.device_name} (card {sync.card_id})"
+                self.logger.info(f"Headset reconnected: {device_info}")
             
             if cmd == "set" and len(parts) == 2:
                 volume = int(parts[1])
-                if self.sync.set_volume(volume, silent=True):
+                if sync.set_volume(volume, silent=True):
                     return f"OK: {volume}"
                 else:
                     # Try to reconnect and retry once
                     self.logger.warning("Failed to set volume, attempting reconnection...")
-                    self.sync.card_id = None
-                    if self.sync.detect_card() and self.sync.set_volume(volume, silent=True):
+                    sync.card_id = None
+                    if sync.detect_card() and sync.set_volume(volume, silent=True):
                         return f"OK: {volume}"
                     return "ERROR: failed to set volume"
 
             elif cmd == "get":
-                vol1, vol2 = self.sync.get_volumes()
+                vol1, vol2 = sync.get_volumes()
                 if vol1 is not None:
                     # Returns the effective volume (PCM[1] on analog, or any on digital)
-                    is_analog = self.sync._is_analog_output()
+                    is_analog = sync._is_analog_output()
                     effective_vol = vol2 if is_analog else vol1
-                    return f"OK: {effective_vol}"
+                    return self.reply(options, version, f"OK: {effective_vol}", volume=effective_vol)
                 else:
                     # Try to reconnect
                     self.logger.warning("Failed to get volume, headset may have disconnected")
-                    self.sync.card_id = None
+                    sync.card_id = None
                     return "ERROR: failed to get volume"
 
             elif cmd == "status":
-                vol1, vol2 = self.sync.get_volumes()
-                is_analog = self.sync._is_analog_output()
-                device_name = self.sync.device_name or "Redragon"
-                card_id = self.sync.card_id or "?"
-                return f"OK: device={device_name} card={card_id} pcm0={vol1} pcm1={vol2} analog={is_analog}"
+                vol1, vol2 = sync.get_volumes()
+                is_analog = sync._is_analog_output()
+                device_name = sync.device_name or "Redragon"
+                card_id = sync.card_id or "?"
+                response = f"OK: device={device_name} card={card_id} pcm0={vol1} pcm1={vol2} analog={is_analog}"
+                fields = {"device": device_name, "card": card_id, "pcm0": vol1, "pcm1": vol2, "analog": is_analog}
+                worker = self.workers.get(sync.card.number)
+                # Not part of the versioned state: left out where a version is reported
+                versioned = "since" in options or options.get("format") == "json"
+                if worker is not None and sync.card.number in self.polled_cards and not versioned:
+                    response += f" poll_interval={worker.poller.interval:g}"
+                return self.reply(options, version, response, **fields)
 
             elif cmd == "mute":
                 # Toggle mute
-                vol1, vol2 = self.sync.get_volumes()
-                if vol1 is None:
+                plan = self.plan_mute(sync)
+                if plan is None:
                     return "ERROR: failed to get volume"
 
-                is_analog = self.sync._is_analog_output()
-                current_vol = vol2 if is_analog else vol1
-
-                if current_vol == 0:
-                    # Unmute: restore previous volume (or 50 if none)
-                    restore_vol = self.volume_before_mute if self.volume_before_mute else 50
-                    if self.sync.set_volume(restore_vol, silent=True):
-                        self.volume_before_mute = None
-                        return f"OK: unmuted {restore_vol}"
-                    else:
-                        return "ERROR: failed to unmute"
-                else:
-                    # Mute: store current volume and set to 0
-                    self.volume_before_mute = current_vol
-                    if self.sync.set_volume(0, silent=True):
-                        return "OK: muted"
-                    else:
-                        return "ERROR: failed to mute"
+                _, target, response = plan
+                if sync.set_volume(target, silent=True):
+                    if target:
+                        self.volume_before_mute.pop(sync.card.id, None)
+                    return response
+                return "ERROR: failed to unmute" if target else "ERROR: failed to mute"
+
+            elif cmd == "fade":
+                return "ERROR: fade is only available through the socket"
+
+            elif cmd == "sink":
+                sink = sync._get_pipewire_sink()
+                return f"OK: {sink}" if sink else "ERROR: sink not found"
+
+            elif cmd == "set-default":
+                sink = sync.sink_index.set_default(sync.card_id)
+                return f"OK: {sink}" if sink else "ERROR: failed to set default sink"
 
             elif cmd == "ping":
                 return "OK: pong"
@@ -126,63 +539,962 @@ class RedragonControlDaemon:
             self.logger.error(f"Error processing command '{command}': {e}")
             return f"ERROR: {e}"
 
-    def run(self):
-        signal.signal(signal.SIGTERM, self.signal_handler)
-        signal.signal(signal.SIGINT, self.signal_handler)
+    @staticmethod
+    def parse_set(command):
+        """Returns (volume, selector) of a well-formed "set" command, None otherwise"""
+        parts, selector = split_selector(command.split())
+        if len(parts) != 2 or parts[0] != "set":
+            return None
+        try:
+            volume = int(parts[1])
+        except ValueError:
+            return None
+        return (volume, selector) if 0 <= volume <= 100 else None
 
-        # Remove old socket if it exists
-        if os.path.exists(self.socket_path):
-            os.unlink(self.socket_path)
+    def set_target(self, selector):
+        """Card number of the headset a set applies to, None if none matches"""
+        sync = self.registry.select(selector)
+        return sync.card.number if sync is not None else None
 
-        # Create Unix socket
-        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-        server.bind(self.socket_path)
-        server.listen(5)
-        server.settimeout(1.0)  # Timeout to check self.running
+    def apply_set(self, command):
+        """Runs a set on the mixer (executor thread)"""
+        with self.set_lock:
+            self.sets_applied += 1
+        METRICS.count("redragon_sets_total", result="applied")
+        return self.process_command(command)
 
-        # Permissions for the socket
-        os.chmod(self.socket_path, 0o600)
+    def process_batch(self, commands):
+        """Processes several commands in order in a single executor job
 
-        self.logger.info(f"Redragon Control Daemon started")
-        self.logger.info(f"Socket: {self.socket_path}")
+        A set immediately followed by another set for the same headset is
+        acknowledged without touching the mixer, only the last of a run is
+        applied.
+        """
+        responses = []
+        for i, command in enumerate(commands):
+            parsed = self.parse_set(command)
+            if parsed is None:
+                responses.append(self.process_command(command))
+                continue
 
-        if not self.sync.card_id:
-            self.logger.warning("Headset not detected on startup, will auto-detect on first command...")
+            volume, selector = parsed
+            with self.set_lock:
+                self.sets_received += 1
+            METRICS.count("redragon_sets_total", result="received")
+            next_set = self.parse_set(commands[i + 1]) if i + 1 < len(commands) else None
+            target = self.set_target(selector)
+            if next_set is not None and target is not None and self.set_target(next_set[1]) == target:
+                responses.append(f"OK: {volume}")
+            else:
+                responses.append(self.apply_set(command))
+        return responses
+
+    def _run_pending_set(self, target):
+        """Executor job: applies whichever set is pending when it gets to run"""
+        with self.set_lock:
+            command, _, future = self.pending_sets.pop(target)
+        try:
+            response = self.apply_set(command)
+        except Exception as e:
+            response = f"ERROR: {e}"
+        future.get_loop().call_soon_threadsafe(self._resolve, future, response)
+
+    @staticmethod
+    def _resolve(future, response):
+        # The client task may have been cancelled meanwhile (shutdown)
+        if not future.done():
+            future.set_result(response)
+
+    async def coalesced_set(self, command, volume, selector):
+        """Queues a set, superseding (and acknowledging) any set still queued
+        for the same headset"""
+        loop = asyncio.get_running_loop()
+        # Keyed by headset: "set 50" and "set 50 card=1" may be the same one
+        target = self.set_target(selector)
+        if target is None:
+            with self.set_lock:
+                self.sets_received += 1
+            METRICS.count("redragon_sets_total", result="received")
+            # Nothing to coalesce with, the set reports the missing headset
+            return await loop.run_in_executor(self.executor, self.apply_set, command)
+
+        future = loop.create_future()
+        with self.set_lock:
+            self.sets_received += 1
+            superseded = self.pending_sets.get(target)
+            self.pending_sets[target] = (command, volume, future)
+        METRICS.count("redragon_sets_total", result="received")
+
+        if superseded is not None:
+            # The queued job will pick up the newer command instead
+            _, superseded_volume, superseded_future = superseded
+            self._resolve(superseded_future, f"OK: {superseded_volume}")
         else:
-            device_info = f"{self.sync.device_name} (card {self.sync.card_id})"
-            self.logger.info(f"Headset detected on startup: {device_info}")
+            loop.run_in_executor(self.executor, self._run_pending_set, target)
+
+        return await future
+
+    async def execute(self, command):
+        """Runs one command on the mixer executor, coalescing sets"""
+        unchanged = self.unchanged_response(command)
+        if unchanged is not None:
+            return unchanged
+        self.cancel_fade(command)
+        if self.is_ramp(command):
+            return await self.ramp_command(command)
+
+        parsed = self.parse_set(command)
+        if parsed is not None:
+            response = await self.coalesced_set(command, *parsed)
+        else:
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(self.executor, self.process_command, command)
+
+        if self.is_mutation(command):
+            self.schedule_refresh()
+        return response
+
+    @staticmethod
+    def read_volume(sync):
+        """Effective volume (PCM[1] on analog, PCM[0] on digital), None on failure"""
+        vol1, vol2 = sync.get_volumes()
+        if vol1 is None:
+            return None
+        return vol2 if sync._is_analog_output() else vol1
+
+    def plan_mute(self, sync):
+        """Decides what a mute toggle does (executor thread)
+
+        A headset at 0, or being faded out by a mute, is unmuted. Muting
+        remembers the current volume.
+
+        Returns:
+            (current volume, target volume, response), None if the volume
+            cannot be read
+        """
+        current = self.read_volume(sync)
+        if current is None:
+            return None
+
+        if current == 0 or sync.card.id in self.muting:
+            # Unmute: restore previous volume (or unmute_volume if none)
+            self.muting.discard(sync.card.id)
+            restore_vol = self.volume_before_mute.get(sync.card.id) or self.unmute_volume
+            return current, restore_vol, f"OK: unmuted {restore_vol}"
+
+        self.volume_before_mute[sync.card.id] = current
+        return current, 0, "OK: muted"
+
+    def is_ramp(self, command):
+        """Fades and soft mutes run on the event loop instead of the executor"""
+        parts, _ = split_selector(command.split())
+        if not parts:
+            return False
+        if parts[0] == "fade":
+            return True
+        return parts[0] == "mute" and (len(parts) > 1 or self.soft_mute_ms > 0)
+
+    def cancel_fade(self, command):
+        """Stops the ramp of the headset targeted by a set, mute or fade"""
+        parts, selector = split_selector(command.split())
+        if not parts or parts[0] not in ("set", "mute", "fade"):
+            return
+        sync = self.registry.select(selector)
+        if sync is None:
+            return
+        task = self.fades.pop(sync.card.number, None)
+        if task is not None:
+            task.cancel()
+        if parts[0] != "mute":
+            # A new volume replaces an interrupted fade-out
+            self.muting.discard(sync.card.id)
+
+    def plan_ramp(self, selector, target=None):
+        """Resolves the headset and start volume of a ramp (executor thread)
+
+        Args:
+            selector: "card=" / "device=" selector, None for the default headset
+            target: Fade target, None for a mute toggle
+
+        Returns:
+            (headset, start volume, target volume, response), or an error
+            response
+        """
+        if not self.registry.headsets and not self.detect_headsets():
+            return "ERROR: headset not detected"
+        sync = self.registry.select(selector)
+        if sync is None:
+            return f"ERROR: no headset matching '{selector}'"
+        if not sync.card_id and not sync.detect_card():
+            return "ERROR: headset not detected"
+
+        if target is None:
+            plan = self.plan_mute(sync)
+            if plan is None:
+                return "ERROR: failed to get volume"
+            start, target, response = plan
+            if target:
+                self.volume_before_mute.pop(sync.card.id, None)
+            return sync, start, target, response
+
+        start = self.read_volume(sync)
+        if start is None:
+            return "ERROR: failed to get volume"
+        return sync, start, target, f"OK: {target}"
 
-        while self.running:
+    async def ramp_command(self, command):
+        """Starts a "fade <target> <ms>" or soft "mute [<ms>]", answers right away"""
+        parts, selector = split_selector(command.split())
+        try:
+            numbers = [int(part) for part in parts[1:]]
+        except ValueError:
+            numbers = None
+
+        if parts[0] == "fade":
+            if not numbers or len(numbers) != 2 or not 0 <= numbers[0] <= 100 or not 0 <= numbers[1] <= MAX_FADE_MS:
+                return f"ERROR: usage: fade <0-100> <0-{MAX_FADE_MS} ms>"
+            target, duration_ms = numbers
+        else:
+            if numbers is None or len(numbers) > 1 or (numbers and not 0 <= numbers[0] <= MAX_FADE_MS):
+                return f"ERROR: usage: mute [<0-{MAX_FADE_MS} ms>]"
+            target, duration_ms = None, numbers[0] if numbers else self.soft_mute_ms
+
+        loop = asyncio.get_running_loop()
+        plan = await loop.run_in_executor(self.executor, self.plan_ramp, selector, target)
+        if isinstance(plan, str):
+            return plan
+
+        sync, start, target, response = plan
+        if parts[0] == "mute" and target == 0:
+            self.muting.add(sync.card.id)
+        previous = self.fades.pop(sync.card.number, None)
+        if previous is not None:
+            previous.cancel()
+        self.fades[sync.card.number] = asyncio.ensure_future(self.ramp(sync, start, target, duration_ms / 1000))
+        return response
+
+    async def ramp(self, sync, start, target, duration):
+        """Moves the volume from start to target over duration seconds
+
+        Writes at most every FADE_STEP_INTERVAL; when the mixer is slower,
+        intermediate values are skipped rather than queued.
+        """
+        loop = asyncio.get_running_loop()
+        began = loop.time()
+        volume = start
+        try:
+            while True:
+                fraction = 1.0 if duration <= 0 else min(1.0, (loop.time() - began) / duration)
+                step = start + round((target - start) * fraction)
+                if step != volume or fraction >= 1.0:
+                    volume = step
+                    if not await loop.run_in_executor(self.executor, sync.set_volume, volume, True):
+                        self.logger.warning(f"Fade stopped: failed to set volume of {sync.device_name}")
+                        return
+                    self.schedule_refresh()
+                if fraction >= 1.0:
+                    METRICS.count("redragon_fades_total", result="completed")
+                    return
+                await asyncio.sleep(FADE_STEP_INTERVAL)
+        except asyncio.CancelledError:
+            METRICS.count("redragon_fades_total", result="cancelled")
+            raise
+        finally:
+            if self.fades.get(sync.card.number) is asyncio.current_task():
+                del self.fades[sync.card.number]
+
+    async def execute_batch(self, commands):
+        """Runs pipelined commands in order: ramps on the event loop, the
+        commands between them as one executor job"""
+        loop = asyncio.get_running_loop()
+        responses = []
+        batch = []
+
+        async def run_batch():
+            responses.extend(await loop.run_in_executor(self.executor, self.process_batch, batch))
+            if any(self.is_mutation(command) for command in batch):
+                self.schedule_refresh()
+            batch.clear()
+
+        for command in commands:
+            self.cancel_fade(command)
+            if not self.is_ramp(command):
+                # Behind queued commands the state may change: processed in full
+                unchanged = None if batch else self.unchanged_response(command)
+                if unchanged is not None:
+                    responses.append(unchanged)
+                else:
+                    batch.append(command)
+                continue
+            if batch:
+                await run_batch()
+            responses.append(await self.ramp_command(command))
+        if batch:
+            await run_batch()
+        return responses
+
+    @staticmethod
+    def is_mutation(command):
+        parts = command.split()
+        return bool(parts) and parts[0] in ("set", "mute")
+
+    def detect_headsets(self):
+        """Updates the headset registry (executor thread)
+
+        Returns:
+            True if a headset was added
+        """
+        added, removed = self.registry.refresh()
+        for sync in removed:
+            self.logger.info(f"Headset removed: {sync.device_name} (card {sync.card.number})")
+        for sync in added:
+            self.logger.info(f"Headset connected: {sync.device_name} (card {sync.card_id})")
+        if added or removed:
+            self.notify_cards_changed()
+        return bool(added)
+
+    def notify_cards_changed(self):
+        """Wakes up watch_controls after a registry change (any thread)"""
+        if self.loop is not None and self.cards_changed is not None:
+            self.loop.call_soon_threadsafe(self.cards_changed.set)
+
+    def read_state(self, sync):
+        """Reads the state of one headset, None if it stopped answering"""
+        vol1, vol2 = sync.get_volumes()
+        if vol1 is None:
+            return None
+        is_analog = sync._is_analog_output()
+        effective_vol = vol2 if is_analog else vol1
+        return {
+            "device": sync.device_name or "Redragon",
+            "card": sync.card_id,
+            "pcm0": vol1,
+            "pcm1": vol2,
+            "analog": is_analog,
+            "muted": effective_vol == 0,
+            "volume": effective_vol,
+        }
+
+    def check_headsets(self):
+        """Detects headsets if none, re-detects the ones that stopped
+        answering and drops those gone (executor thread)"""
+        if not self.registry.headsets:
+            self.detect_headsets()
+        for card, sync in list(self.registry.headsets.items()):
+            if not sync.card_id and not sync.detect_card():
+                self.registry.remove(card)
+                self.notify_cards_changed()
+
+    def read_states(self):
+        """Reads the state pushed to subscribers (executor thread)
+
+        Returns:
+            List of (headset, state) in card order, empty if no headset
+        """
+        self.check_headsets()
+        headsets = self.registry.headsets
+        return [(headsets[card], self.read_state(headsets[card])) for card in sorted(headsets, key=int)]
+
+    @staticmethod
+    def select_state(states, selector):
+        """Picks the state of the headset a subscriber follows"""
+        for sync, state in states:
+            if sync.matches(selector):
+                return state
+        return None
+
+    @staticmethod
+    def format_event(state):
+        if state is None:
+            return "EVENT: disconnected"
+        return (
+            f"EVENT: device={state['device']} card={state['card']} pcm0={state['pcm0']} "
+            f"pcm1={state['pcm1']} analog={state['analog']} muted={state['muted']} volume={state['volume']}"
+        )
+
+    def publish_states(self, states):
+        """Sends each subscriber the state of its headset if it changed"""
+        for subscriber in list(self.subscribers):
+            event = self.format_event(self.select_state(states, subscriber.selector))
+            if not subscriber.push(event):
+                # Subscriber is not reading, disconnect it
+                self.subscribers.discard(subscriber)
+                subscriber.queue.put_nowait(None)
+
+    def schedule_refresh(self):
+        """Re-reads the state for subscribers and the state page, collapsing
+        refresh requests"""
+        if not self.subscribers and self.state_page is None and not self.versioned:
+            return
+        if self.refresh_task is not None and not self.refresh_task.done():
+            self.refresh_pending = True
+            return
+        self.refresh_task = asyncio.ensure_future(self._refresh())
+
+    async def _refresh(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self.refresh_pending = False
             try:
-                # Accept connection with timeout
+                states = await loop.run_in_executor(self.executor, self.read_states)
+            except Exception as e:
+                self.logger.error(f"Error reading state for subscribers: {e}")
+                return
+            published = [(sync.card.number, state) for sync, state in states]
+            if published != self.published_states:
+                self.published_states = published
+                self.bump_state_version()
+            self.publish_states(states)
+            if self.state_page is not None:
+                self.state_page.publish([
+                    (sync.card.number, sync.card.id, sync.device_name or "Redragon", state) for sync, state in states
+                ])
+            if not self.refresh_pending:
+                return
+
+    def _open_event_monitor(self, sync):
+        """Opens a control event monitor for a headset (executor thread)"""
+        if not sync.card_id:
+            return None
+        try:
+            return sync.backend.open_event_monitor(sync.card_id)
+        except MixerError as e:
+            self.logger.debug(f"Control events unavailable: {e}")
+            return None
+
+    async def _wait_stop(self, timeout):
+        """Sleeps up to timeout seconds, returns True if the daemon is stopping"""
+        try:
+            await asyncio.wait_for(self.stop_event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _start_worker(self, sync):
+        """Restores the volume of a new headset and syncs it once (executor thread)"""
+        worker = SyncWorker(sync, self.logger, self.max_errors, AdaptivePoller(self.poll_min, self.poll_max))
+        try:
+            worker.master_numid = sync.backend.controls(sync.card_id).master.numid
+        except MixerError:
+            pass  # Polled until the controls answer
+        if sync.restore_volume(silent=True):
+            self.logger.info(f"{worker.label}: volume restored to {sync._load_volume_state()}%")
+        worker.check_and_sync()
+        return worker
+
+    async def update_workers(self, headsets):
+        """Starts a sync worker for every new headset, stops the ones gone"""
+        for card in list(self.workers):
+            if headsets.get(card) is not self.workers[card].sync:
+                self.sync_pending.discard(card)
+                METRICS.remove("redragon_poll_interval_seconds", card=card)
+                self.logger.info(f"{self.workers.pop(card).label}: sync stopped")
+        for card, sync in headsets.items():
+            if card not in self.workers and sync.card_id:
+                worker = await self.loop.run_in_executor(self.executor, self._start_worker, sync)
+                self.workers[card] = worker
+                self.logger.info(f"{worker.label}: synchronizing PCM[0] → PCM[1]")
+
+    def schedule_sync(self, card, delay=0.0):
+        """Queues a PCM[0] → PCM[1] check of a headset, collapsing requests"""
+        if card not in self.workers or card in self.sync_pending:
+            return
+        self.sync_pending.add(card)
+        self.loop.call_later(delay, lambda: asyncio.ensure_future(self._sync(card)))
+
+    async def _sync(self, card):
+        self.sync_pending.discard(card)
+        worker = self.workers.get(card)
+        if worker is None or self.stop_event.is_set():
+            return
+        if worker.sync.should_debounce():
+            # A set was just applied, look again once it settled
+            self.schedule_sync(card, worker.sync.debounce_delay)
+            return
+
+        # Polled headsets adapt their interval to activity
+        polled = card in self.polled_cards
+        syncs_before = worker.sync_count
+        await self.loop.run_in_executor(self.executor, worker.poll if polled else worker.check_and_sync)
+        if polled:
+            self.polls_changed.set()
+        if worker.sync_count > syncs_before:
+            self.schedule_refresh()
+        if worker.lost:
+            # Stopped answering: re-detect it, or drop it if it is gone
+            worker.lost = False
+            worker.sync.card_id = None
+            await self.loop.run_in_executor(self.executor, self.check_headsets)
+            self.cards_changed.set()
+
+    def on_profile_change(self):
+        """Analog/digital switch: push the new state and re-check the sync"""
+        self.schedule_refresh()
+        for card in list(self.workers):
+            self.schedule_sync(card)
+
+    async def watch_controls(self):
+        """Turns ALSA control events of every headset into subscriber refreshes
+        (and PCM[0] → PCM[1] syncs in combined mode)
+
+        Headsets without control events are polled while subscribers exist,
+        and in combined mode synced on an adaptive schedule. While no
+        headset is present, waits for a sound card to be plugged in.
+        """
+        loop = asyncio.get_running_loop()
+        monitors = {}  # ALSA card number -> event monitor
+        monitor_retry_at = {}  # ALSA card number -> next attempt to get control events
+        next_refresh = 0.0
+
+        def stop_monitor(card):
+            monitor = monitors.pop(card)
+            loop.remove_reader(monitor.fileno())
+            monitor.close()
+            sync = self.registry.headsets.get(card)
+            if sync is not None:
+                sync.enable_write_cache(False)
+
+        def on_readable(card, monitor):
+            numids = monitor.read_events()
+            if numids is None:
+                # Control device went away: tell subscribers and look for the headset again
+                stop_monitor(card)
+                self.cards_changed.set()
+                self.schedule_refresh()
+            elif numids:
+                sync = self.registry.headsets.get(card)
+                if sync is not None:
+                    # Read again by the refresh, our own writes included
+                    sync.invalidate_volumes()
+                self.schedule_refresh()
+                worker = self.workers.get(card)
+                if worker is not None and (worker.master_numid is None or worker.master_numid in numids):
+                    self.schedule_sync(card)
+
+        try:
+            while not self.stop_event.is_set():
+                self.cards_changed.clear()
+                self.polls_changed.clear()
+                headsets = dict(self.registry.headsets)
+
+                for card in list(monitors):
+                    if card not in headsets:
+                        stop_monitor(card)
+                for card in list(monitor_retry_at):
+                    if card not in headsets:
+                        del monitor_retry_at[card]
+
+                if self.with_sync:
+                    await self.update_workers(headsets)
+
+                # Headsets without events (or whose monitor keeps dying)
+                # retry subscribing now and then, and are polled meanwhile
+                now = time.monotonic()
+                polled_cards = []
+                for card, sync in headsets.items():
+                    if card in monitors:
+                        continue
+                    if now >= monitor_retry_at.get(card, 0.0):
+                        monitor_retry_at[card] = now + self.monitor_retry_interval
+                        monitor = await loop.run_in_executor(self.executor, self._open_event_monitor, sync)
+                        if monitor is not None:
+                            monitors[card] = monitor
+                            loop.add_reader(monitor.fileno(), on_readable, card, monitor)
+                            sync.enable_write_cache(True)
+                            continue
+                    polled_cards.append(card)
+                self.polled_cards = set(polled_cards)
+                self.notifier.status(self.status_text(headsets, monitors))
+
+                timeout = None
+                if polled_cards or (not headsets and not self.hotplug.uses_netlink):
+                    if now >= next_refresh:
+                        self.schedule_refresh()
+                        next_refresh = now + self.state_poll_interval
+                    timeout = max(0.0, next_refresh - now)
+                elif not headsets:
+                    self.schedule_refresh()
+
+                for card in polled_cards:
+                    worker = self.workers.get(card)
+                    if worker is None:
+                        continue
+                    if now >= worker.poller.due_at:
+                        # Not due again until the poll reports its next interval
+                        worker.poller.due_at = now + worker.poller.interval
+                        self.schedule_sync(card)
+                    wait = max(0.0, worker.poller.due_at - now)
+                    timeout = wait if timeout is None else min(timeout, wait)
+
+                changed = asyncio.ensure_future(self.cards_changed.wait())
+                rescheduled = asyncio.ensure_future(self.polls_changed.wait())
+                stopping = asyncio.ensure_future(self.stop_event.wait())
                 try:
-                    client, _ = server.accept()
-                except socket.timeout:
-                    continue
+                    await asyncio.wait(
+                        {changed, rescheduled, stopping},
+                        timeout=timeout,
+                        return_when=asyncio.FIRST_COMPLETED
+                    )
+                finally:
+                    changed.cancel()
+                    rescheduled.cancel()
+                    stopping.cancel()
+        finally:
+            for card in list(monitors):
+                stop_monitor(card)
+
+    def status_text(self, headsets, monitors):
+        """STATUS= line: every headset and whether control events are received"""
+        if not headsets:
+            return "Waiting for headset"
+        sync = ", PCM sync" if self.with_sync else ""
+        return "; ".join(
+            f"{headsets[card].device_name} (card {card}): "
+            f"{'control events' if card in monitors else 'polling'}{sync}"
+            for card in sorted(headsets, key=int)
+        )
 
-                # Read command
-                data = client.recv(1024).decode('utf-8').strip()
+    async def watch_health(self):
+        """Pings the systemd watchdog while the mixer executor makes progress
 
-                if data:
-                    # Process and respond
-                    response = self.process_command(data)
-                    client.sendall(response.encode('utf-8'))
+        A probe job is queued behind the mixer work; as long as the previous
+        one has not run, the executor is stuck and no ping is sent.
+        """
+        loop = asyncio.get_running_loop()
+        probe = None
+        while True:
+            if probe is None or probe.done():
+                if probe is not None:
+                    self.notifier.watchdog()
+                probe = loop.run_in_executor(self.executor, time.monotonic)
+            await asyncio.sleep(self.notifier.watchdog_interval / 2)
 
-                client.close()
+    def on_hotplug(self):
+        """Reads sound card uevents and updates the headset registry"""
+        events = self.hotplug.read_events()
+        for action, card in events:
+            if action == "remove" and card in self.registry.headsets:
+                asyncio.ensure_future(self._handle_removal(card))
+        if any(action == "add" for action, _ in events):
+            asyncio.ensure_future(self._handle_add())
 
-            except Exception as e:
-                self.logger.error(f"Error in main loop: {e}")
+    def _drop_card(self, card_id):
+        """Forgets a removed headset card (executor thread)"""
+        sync = self.registry.remove(card_id)
+        if sync is not None:
+            self.logger.info(f"Headset removed: {sync.device_name} (card {card_id})")
+
+    async def _handle_removal(self, card):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self._drop_card, card)
+        self.cards_changed.set()
+        self.schedule_refresh()
+
+    async def _handle_add(self):
+        # The card's control device may take a moment to become usable
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.detect_attempts):
+            if await loop.run_in_executor(self.executor, self.detect_headsets):
+                break
+            if await self._wait_stop(self.detect_retry_delay):
+                return
+        self.cards_changed.set()
+        self.schedule_refresh()
+
+    async def serve_subscription(self, reader, writer, selector=None):
+        """Streams state change events of one headset until the client disconnects"""
+        writer.write(b"OK: subscribed\n")
+
+        # Registered before the initial snapshot, so that a change made while
+        # it is read still refreshes this subscriber
+        loop = asyncio.get_running_loop()
+        subscriber = Subscriber(selector)
+        self.subscribers.add(subscriber)
+        disconnect_task = None
+        try:
+            # Start every subscriber with the current state
+            states = await loop.run_in_executor(self.executor, self.read_states)
+            # Events queued meanwhile were read before the snapshot (one executor thread)
+            while not subscriber.queue.empty():
+                if subscriber.queue.get_nowait() is None:
+                    return  # Dropped as too far behind
+            subscriber.last_event = self.format_event(self.select_state(states, selector))
+            writer.write((subscriber.last_event + "\n").encode('utf-8'))
+            await writer.drain()
+
+            async def wait_disconnect():
+                while await reader.read(1024):
+                    pass
+                subscriber.queue.put_nowait(None)
+
+            disconnect_task = asyncio.ensure_future(wait_disconnect())
+            while True:
+                line = await subscriber.queue.get()
+                if line is None:
+                    return
+                writer.write(line.encode('utf-8'))
+                await writer.drain()
+        finally:
+            self.subscribers.discard(subscriber)
+            if disconnect_task is not None:
+                disconnect_task.cancel()
+
+    async def handle_client(self, reader, writer):
+        """Serves one client connection
+
+        One-shot: one command, one response, close.
+        Pipelined: first line "pipeline", then one response line per command line.
+        Subscribed: "subscribe [selector]", then one event line per state change.
+        """
+        self.clients.add(writer)
+        try:
+            # Read command
+            data = await reader.read(1024)
+            first_line, newline, rest = data.partition(b"\n")
+
+            if newline and first_line.decode('utf-8').strip() == PIPELINE_COMMAND:
+                METRICS.count("redragon_connections_total", mode="pipeline")
+                await self.serve_pipeline(reader, writer, rest)
+                return
+
+            data = data.decode('utf-8').strip()
+            words, selector = split_selector(data.split())
+            if words == [SUBSCRIBE_COMMAND]:
+                METRICS.count("redragon_connections_total", mode="subscribe")
+                self.count_request(data)
+                await self.serve_subscription(reader, writer, selector)
+                return
+
+            METRICS.count("redragon_connections_total", mode="oneshot")
+            if data == METRICS_COMMAND:
+                # Served from the event loop, available even while the mixer is busy
+                self.count_request(data)
+                writer.write(self.render_metrics().encode('utf-8'))
+                await writer.drain()
+            elif data:
+                self.count_request(data)
+                # Process on the mixer executor and respond
+                response = await self.execute(data)
+                writer.write(response.encode('utf-8'))
+                await writer.drain()
+
+        except (ConnectionError, UnicodeDecodeError) as e:
+            self.logger.debug(f"Client error: {e}")
+        except Exception as e:
+            self.logger.error(f"Error handling client: {e}")
+        finally:
+            self.clients.discard(writer)
+            self.last_activity = time.monotonic()
+            writer.close()
+
+    async def serve_pipeline(self, reader, writer, buffer: bytes):
+        """Answers newline-delimited commands until the client disconnects
+
+        All complete lines available at once are processed as one batch, so
+        a burst of commands costs a single executor round trip.
+        """
+        while True:
+            *lines, buffer = buffer.split(b"\n")
+            commands = [line.decode('utf-8').strip() for line in lines]
+            commands = [command for command in commands if command]
+
+            if commands:
+                for command in commands:
+                    self.count_request(command)
+                responses = await self.execute_batch(commands)
+                writer.write("".join(f"{response}\n" for response in responses).encode('utf-8'))
+                await writer.drain()
+
+            if len(buffer) > MAX_LINE_LENGTH:
+                writer.write(b"ERROR: command too long\n")
+                await writer.drain()
+                return
+
+            chunk = await reader.read(65536)
+            if not chunk:
+                return
+            buffer += chunk
+
+    def is_idle(self):
+        """No connection, ramp or pending set keeps the daemon busy"""
+        return not self.clients and not self.fades and not self.pending_sets
+
+    async def watch_idle(self):
+        """Stops the daemon after idle_timeout seconds without connections
+
+        Not in combined mode: the sync has to keep running.
+        """
+        while not self.stop_event.is_set():
+            self.idle_changed.clear()
+            timeout = None
+            if self.idle_timeout and not self.with_sync:
+                timeout = self.last_activity + self.idle_timeout - time.monotonic()
+                if timeout <= 0 and self.is_idle():
+                    self.logger.info(f"No client for {self.idle_timeout:g}s, exiting until the next connection")
+                    self.idle_exit = True
+                    self.stop_event.set()
+                    return
+                timeout = max(timeout, 0.1 if self.is_idle() else self.idle_timeout)
+
+            changed = asyncio.ensure_future(self.idle_changed.wait())
+            stopping = asyncio.ensure_future(self.stop_event.wait())
+            try:
+                await asyncio.wait({changed, stopping}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                changed.cancel()
+                stopping.cancel()
+
+    async def serve(self):
+        """Runs the socket server until SIGTERM/SIGINT (or idle exit)"""
+        loop = asyncio.get_running_loop()
+        self.loop = loop
+        self.stop_event = asyncio.Event()
+        self.cards_changed = asyncio.Event()
+        self.polls_changed = asyncio.Event()
+        self.idle_changed = asyncio.Event()
+        loop.add_signal_handler(signal.SIGTERM, self.signal_handler, signal.SIGTERM)
+        loop.add_signal_handler(signal.SIGINT, self.signal_handler, signal.SIGINT)
+        loop.add_signal_handler(signal.SIGHUP, self.on_sighup)
+
+        if self.listen_socket is not None:
+            # Bound by systemd, clients may already be waiting in the backlog
+            server = await asyncio.start_unix_server(self.handle_client, sock=self.listen_socket)
+        else:
+            # Remove old socket if it exists
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+            # Create Unix socket
+            server = await asyncio.start_unix_server(self.handle_client, path=self.socket_path)
+
+            # Permissions for the socket
+            os.chmod(self.socket_path, 0o600)
+
+        self.logger.info(f"Redragon Control Daemon started")
+        activation = " (socket activation)" if self.listen_socket is not None else ""
+        self.logger.info(f"Socket: {self.socket_path}{activation}")
+        if self.idle_timeout and self.with_sync:
+            self.logger.warning("Idle timeout ignored in combined mode (the sync keeps running)")
+        if self.with_sync:
+            self.logger.info("PCM[0] → PCM[1] synchronization enabled (combined mode)")
+
+        if not self.registry.headsets:
+            self.logger.warning("Headset not detected on startup, will auto-detect on first command...")
+        for card in sorted(self.registry.headsets, key=int):
+            device_info = f"{self.registry.headsets[card].device_name} (card {card})"
+            self.logger.info(f"Headset detected on startup: {device_info}")
+
+        # Track headsets being plugged in and out
+        if self.hotplug.uses_netlink:
+            loop.add_reader(self.hotplug.fileno(), self.on_hotplug)
+
+        try:
+            self.state_page = StatePage()
+            self.logger.info(f"State page: {self.state_page.path}")
+            self.schedule_refresh()
+        except OSError as e:
+            self.logger.warning(f"State page unavailable: {e}")
+
+        # Combined mode: volumes restored before reporting ready
+        if self.with_sync:
+            await self.update_workers(dict(self.registry.headsets))
+
+        # Push state changes to subscribers: control events, profile switches
+        watch_task = asyncio.ensure_future(self.watch_controls())
+        idle_task = asyncio.ensure_future(self.watch_idle())
+        health_task = None
+        if self.notifier.watchdog_interval is not None:
+            health_task = asyncio.ensure_future(self.watch_health())
+        subscription = self.registry.profile_cache.subscription
+        if subscription is not None:
+            subscription.add_listener('card', lambda event, index: loop.call_soon_threadsafe(self.on_profile_change))
+
+        startup = time.time() - METRICS.started
+        METRICS.gauge("redragon_startup_seconds", startup)
+        # STATUS= follows from the first watch_controls pass
+        self.notifier.ready()
+        self.logger.info(f"Ready after {startup * 1000:.0f}ms")
+
+        await self.stop_event.wait()
 
         # Cleanup
+        self.notifier.stopping()
+        watch_task.cancel()
+        idle_task.cancel()
+        if health_task is not None:
+            health_task.cancel()
+        if self.hotplug.uses_netlink:
+            loop.remove_reader(self.hotplug.fileno())
         server.close()
-        if os.path.exists(self.socket_path):
+        if self.idle_exit:
+            # A client accepted just before the server closed still gets
+            # its answer; later ones stay in the backlog for the next start
+            await asyncio.sleep(0)
+            for _ in range(50):
+                if not self.clients:
+                    break
+                await asyncio.sleep(0.1)
+        for writer in list(self.clients):
+            writer.close()
+        await server.wait_closed()
+        # An activated socket belongs to systemd, which keeps listening
+        if self.listen_socket is None and os.path.exists(self.socket_path):
             os.unlink(self.socket_path)
+        if self.state_page is not None:
+            self.state_page.close()
+
+    def run(self):
+        try:
+            asyncio.run(self.serve())
+        finally:
+            # Let an in-flight mixer write finish, drop queued ones
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.registry.close()
+            self.hotplug.close()
+            self.notifier.close()
+            self.logger.info("Redragon Control Daemon closed")
 
-        self.logger.info("Redragon Control Daemon closed")
 
+def main():
+    parser = argparse.ArgumentParser(description="Volume control server for Redragon wireless headsets")
+    parser.add_argument(
+        "--with-sync",
+        action="store_true",
+        help="Also synchronize PCM[0] → PCM[1] in this process (do not run redragon_daemon.py alongside)"
+    )
+    parser.add_argument(
+        "--soft-mute",
+        type=int,
+        metavar="MS",
+        help="Fade mute/unmute over MS milliseconds (default: soft_mute_ms from the config file, or 0, instant)"
+    )
+    parser.add_argument(
+        "--poll-min",
+        type=float,
+        metavar="SECONDS",
+        help=f"With --with-sync, polling interval right after a volume change (default: poll_min from the config file, or {POLL_MIN_INTERVAL:g})"
+    )
+    parser.add_argument(
+        "--poll-max",
+        type=float,
+        metavar="SECONDS",
+        help=f"With --with-sync, polling interval while volumes are stable (default: poll_max from the config file, or {POLL_MAX_INTERVAL:g})"
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        metavar="SECONDS",
+        help="Exit after SECONDS without connections, for socket activation (default: idle_timeout from the config file, or 0, never)"
+    )
+    args = parser.parse_args()
 
-if __name__ == "__main__":
-    daemon = RedragonControlDaemon()
+    daemon = RedragonControlDaemon(
+        with_sync=args.with_sync,
+        idle_timeout=None if args.idle_timeout is None else max(0.0, args.idle_timeout),
+        soft_mute_ms=None if args.soft_mute is None else max(0, min(args.soft_mute, MAX_FADE_MS)),
+        poll_min=None if args.poll_min is None else max(0.01, args.poll_min),
+        poll_max=args.poll_max
+    )
     try:
         daemon.run()
     except KeyboardInterrupt:
@@ -190,3 +1502,7 @@ if __name__ == "__main__":
     except Exception as e:
         daemon.logger.error(f"Fatal error: {e}", exc_info=True)
         sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
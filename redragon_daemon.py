@@ -3,53 +3,152 @@
 Redragon Volume Sync Daemon - Simple version
 Monitors and automatically synchronizes PCM[0] → PCM[1]
 Does not interfere with PipeWire
+
+Reacts to ALSA control change events when available, falling back to
+adaptive polling otherwise (fast right after a change, backing off while
+volumes are stable, none while no headset is present). Headset
+(dis)connection is picked up from sound card hotplug events instead of
+re-running detection
+
+Every connected headset gets its own sync worker; all of them are served
+by a single select loop
+
+With --metrics-socket, counters and latency histograms are served in
+Prometheus text format on a Unix socket (one dump per connection)
+
+Tunables are read from the config file (see redragon_config.py) at startup
+and on SIGHUP, command line options taking precedence
+
+Under systemd (Type=notify) the daemon reports readiness once the headsets
+present at startup are detected and their volume restored, keeps STATUS=
+up to date with the headsets and how they are synced, and pings the
+watchdog from the select loop, so a loop stuck in a mixer call is restarted
 """
 
-import subprocess
+import argparse
+import os
+import select
 import time
 import signal
 import sys
 import logging
+from collections import deque
 from pathlib import Path
-from redragon_volume_sync import RedragonVolumeSync
+from typing import Dict, Optional
+from redragon_alsa import MixerError
+from redragon_config import Config, ConfigError
+from redragon_hotplug import HotplugWatcher
+from redragon_metrics import METRICS, MetricsServer
+from redragon_notify import SystemdNotifier
+from redragon_volume_sync import HeadsetRegistry, RedragonVolumeSync
 
-class RedragonDaemonSimple:
-    def __init__(self):
-        self.running = True
-        self.sync = RedragonVolumeSync()
+MODES = ("auto", "event", "poll")
+POLL_MIN_INTERVAL = 0.1  # Seconds between polls right after a change
+POLL_MAX_INTERVAL = 5.0  # Seconds between polls once volumes are stable
+POLL_BACKOFF = 2.0
+
+
+class AdaptivePoller:
+    """Polling schedule of a headset without control events
+
+    Polls every min_interval right after a change and multiplies the
+    interval by `backoff` after every stable check, up to max_interval.
+    """
+
+    def __init__(self, min_interval: float = POLL_MIN_INTERVAL, max_interval: float = POLL_MAX_INTERVAL,
+                 backoff: float = POLL_BACKOFF):
+        """
+        Args:
+            min_interval: Interval right after a change, in seconds
+            max_interval: Idle interval, in seconds
+            backoff: Interval growth factor per stable check
+        """
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.backoff = backoff
+        self.interval = min_interval
+        self.due_at = time.monotonic()
+
+    def record(self, changed: bool, now: Optional[float] = None) -> float:
+        """Schedules the next poll after a check, returns the new interval"""
+        if changed:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+        self.due_at = (time.monotonic() if now is None else now) + self.interval
+        return self.interval
+
+    def set_bounds(self, min_interval: float, max_interval: float) -> None:
+        """Changes the interval range, taking effect from the next poll"""
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.interval = max(self.min_interval, min(self.max_interval, self.interval))
+
+
+class SyncWorker:
+    """Synchronization state of one headset"""
+
+    def __init__(self, sync: RedragonVolumeSync, logger: logging.Logger, max_errors: int = 3,
+                 poller: Optional[AdaptivePoller] = None):
+        """
+        Args:
+            sync: Volume control bound to the headset card
+            logger: Daemon logger
+            max_errors: Consecutive errors before the headset is re-detected
+            poller: Polling schedule used while control events are unavailable
+        """
+        self.sync = sync
+        self.card_id = sync.card_id
+        self.logger = logger
         self.last_volumes = (None, None)
-        self.check_interval = 2
         self.error_count = 0
-        self.max_errors = 3  # Reconnect after 3 consecutive errors
+        self.max_errors = max_errors
+        self.sync_count = 0
+        self.lost = False  # Card stopped answering, re-detect it
 
-        # Configure logging
-        log_dir = Path.home() / ".local" / "share" / "redragon-hs-companion"
-        log_dir.mkdir(parents=True, exist_ok=True)
-        log_file = log_dir / "daemon.log"
+        self.monitor = None  # Control event monitor, None while polling
+        self.master_numid = None  # numid of PCM[0] on this card
+        self.events_unavailable = False
+        self.monitor_retry_at = 0.0  # Next attempt to subscribe to control events
+        self.recheck_at = None  # Pending check for an event that arrived during debounce
+        self.poller = poller or AdaptivePoller()
 
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file),
-                logging.StreamHandler()
-            ]
-        )
-        self.logger = logging.getLogger(__name__)
+    @property
+    def label(self) -> str:
+        return f"{self.sync.device_name} (card {self.card_id})"
 
-    def signal_handler(self, signum, frame):
-        self.logger.info(f"Received signal {signum}, closing daemon...")
-        self.running = False
+    def fileno(self) -> int:
+        return self.monitor.fileno()
 
-    def wait_for_headset(self):
-        self.logger.info("Waiting for headset connection...")
-        while self.running:
-            if self.sync.detect_card():
-                device_info = f"{self.sync.device_name} (card {self.sync.card_id})"
-                self.logger.info(f"Headset detected: {device_info}")
-                return True
-            time.sleep(5)
-        return False
+    def close_monitor(self) -> None:
+        if self.monitor is not None:
+            self.monitor.close()
+            self.monitor = None
+            # Changes are no longer seen, the known volumes cannot be trusted
+            self.sync.enable_write_cache(False)
+        self.recheck_at = None
+
+    def poll(self) -> float:
+        """Polled check: syncs, then adapts the polling interval to activity
+
+        Returns:
+            Seconds until the next poll
+        """
+        before = self.last_volumes
+        self.check_and_sync()
+        # A set within the debounce window is activity too
+        changed = self.last_volumes != before or self.sync.should_debounce()
+        interval = self.poller.record(changed)
+        METRICS.gauge("redragon_poll_interval_seconds", interval, card=self.card_id)
+        return interval
+
+    def _count_error(self) -> None:
+        METRICS.count("redragon_sync_errors_total")
+        # Force reconnection after consecutive errors
+        if self.error_count >= self.max_errors:
+            self.logger.warning(f"{self.label}: too many errors, forcing headset re-detection...")
+            self.lost = True
+            self.error_count = 0
 
     def check_and_sync(self):
         """Synchronizes PCM[0] → PCM[1] only on DIGITAL OUTPUT
@@ -59,18 +158,6 @@ class RedragonDaemonSimple:
         - PCM[1] is variable (controls the real volume)
         """
         try:
-            if not self.sync.card_id:
-                self.logger.info("Card ID lost, attempting to detect headset...")
-                if not self.sync.detect_card():
-                    self.error_count += 1
-                    if self.error_count >= self.max_errors:
-                        self.logger.warning(f"Failed to detect headset {self.error_count} times, will keep retrying...")
-                    return False
-                else:
-                    device_info = f"{self.sync.device_name} (card {self.sync.card_id})"
-                    self.logger.info(f"Headset reconnected successfully: {device_info}")
-                    self.error_count = 0
-
             if self.sync.should_debounce():
                 return True
 
@@ -81,84 +168,435 @@ class RedragonDaemonSimple:
 
             if vol1 is None or vol2 is None:
                 self.error_count += 1
-                self.logger.warning(f"Failed to get volumes (error {self.error_count}/{self.max_errors})")
-                
-                # Force reconnection after consecutive errors
-                if self.error_count >= self.max_errors:
-                    self.logger.warning("Too many errors, forcing headset re-detection...")
-                    self.sync.card_id = None
-                    self.error_count = 0
+                self.logger.warning(f"{self.label}: failed to get volumes (error {self.error_count}/{self.max_errors})")
+                self._count_error()
                 return False
 
             # Reset error count on successful read
             if self.error_count > 0:
-                self.logger.info("Volume read successful, error count reset")
+                self.logger.info(f"{self.label}: volume read successful, error count reset")
                 self.error_count = 0
 
             # On analog output: does not synchronize (PCM[0]=100% fixed, PCM[1]=variable)
             if is_analog:
                 if self.last_volumes != (vol1, vol2):
-                    self.logger.debug(f"Analog output: PCM[0]={vol1}% (fixed), PCM[1]={vol2}% (variable)")
+                    self.logger.debug(f"{self.label}: analog output, PCM[0]={vol1}% (fixed), PCM[1]={vol2}% (variable)")
                 self.last_volumes = (vol1, vol2)
                 return True
 
             # On digital output: synchronize PCM[0] → PCM[1] when needed
             if vol1 != vol2:
-                self.logger.info(f"Digital output: synchronizing PCM[1] to {vol1}% (copying from PCM[0])")
-                if self.sync.sync_from_master():
+                self.logger.info(f"{self.label}: digital output, synchronizing PCM[1] to {vol1}% (copying from PCM[0])")
+                if self.sync.sync_from_master((vol1, vol2)):
                     self.last_volumes = (vol1, vol1)
+                    self.sync_count += 1
+                    METRICS.count("redragon_syncs_total")
                 else:
-                    self.logger.error("Failed to synchronize volumes")
+                    self.logger.error(f"{self.label}: failed to synchronize volumes")
                     self.error_count += 1
+                    METRICS.count("redragon_sync_errors_total")
             else:
                 if self.last_volumes != (vol1, vol2):
-                    self.logger.debug(f"Digital output: volumes synchronized PCM[0]={vol1}%, PCM[1]={vol2}%")
+                    self.logger.debug(f"{self.label}: digital output, volumes synchronized PCM[0]={vol1}%, PCM[1]={vol2}%")
                 self.last_volumes = (vol1, vol2)
 
             return True
 
         except Exception as e:
             self.error_count += 1
-            self.logger.error(f"Error in check_and_sync: {e} (error {self.error_count}/{self.max_errors})")
-            
-            # Force reconnection after consecutive errors
-            if self.error_count >= self.max_errors:
-                self.logger.warning("Too many errors, forcing headset re-detection...")
-                self.sync.card_id = None
-                self.error_count = 0
+            self.logger.error(f"{self.label}: error in check_and_sync: {e} (error {self.error_count}/{self.max_errors})")
+            self._count_error()
             return False
 
+
+class RedragonDaemonSimple:
+    def __init__(self, mode: str = "auto", metrics_socket: Optional[str] = None,
+                 poll_min: Optional[float] = None, poll_max: Optional[float] = None):
+        """
+        Args:
+            mode: "event" (control change events), "poll" (adaptive polling)
+                  or "auto" (events when available, polling otherwise)
+            metrics_socket: Path of a Unix socket serving the metrics (optional)
+            poll_min: Polling interval right after a change, in seconds
+                      (None: from the config file)
+            poll_max: Polling interval while volumes are stable, in seconds
+                      (None: from the config file)
+        """
+        self.running = True
+        self.reload_requested = False
+        self.mode = mode
+        self.registry = HeadsetRegistry(watch_profile=True)
+        self.workers: Dict[str, SyncWorker] = {}  # by ALSA card number
+        self.config = Config(overrides={"poll_min": poll_min, "poll_max": poll_max})
+        self.poll_min = POLL_MIN_INTERVAL
+        self.poll_max = POLL_MAX_INTERVAL
+        self.monitor_retry_interval = 2  # Seconds between attempts to get control events
+        self.max_errors = 3  # Reconnect after 3 consecutive errors
+
+        # Detection runs at startup and when a sound card appears
+        self.hotplug = HotplugWatcher()
+        self.detect_attempts = 3  # A new card may still be set up by udev
+        self.detect_retry_delay = 0.5
+
+        # Event mode bookkeeping
+        self.sync_latencies = deque(maxlen=100)  # event-to-sync, seconds
+        self.metrics_socket = metrics_socket
+        self.metrics_server = None
+        self.notifier = SystemdNotifier()
+
+        # Configure logging
+        log_dir = Path.home() / ".local" / "share" / "redragon-hs-companion"
+        log_dir.mkdir(parents=True, exist_ok=True)
+        log_file = log_dir / "daemon.log"
+
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(levelname)s - %(message)s',
+            handlers=[
+                logging.FileHandler(log_file),
+                logging.StreamHandler()
+            ]
+        )
+        self.logger = logging.getLogger(__name__)
+        self.reload_config()
+
+    @property
+    def sync_count(self) -> int:
+        return sum(worker.sync_count for worker in self.workers.values())
+
+    def status_text(self) -> str:
+        """STATUS= line: every headset and how it is kept in sync (with the
+        current interval of polled headsets)"""
+        if not self.workers:
+            return "Waiting for headset"
+        return "; ".join(
+            f"{worker.label}: " + (
+                "synced on control events" if worker.monitor is not None
+                else f"synced by adaptive polling (every {worker.poller.interval:.2g}s)"
+            )
+            for worker in self.workers.values()
+        )
+
+    def signal_handler(self, signum, frame):
+        if signum == signal.SIGHUP:
+            # Applied by the loop, between two syncs
+            self.reload_requested = True
+            return
+        self.logger.info(f"Received signal {signum}, closing daemon...")
+        self.running = False
+
+    def reload_config(self) -> bool:
+        """Reads the config file and applies it to the running headsets
+
+        Returns:
+            False if the file is invalid (the current settings are kept)
+        """
+        self.reload_requested = False
+        try:
+            changed = self.config.load()
+        except ConfigError as e:
+            self.logger.error(f"Config not applied: {e}")
+            return False
+        if changed:
+            self.logger.info("Config: " + ", ".join(f"{name}={value}" for name, value in sorted(changed.items())))
+
+        config = self.config
+        self.poll_min = config["poll_min"]
+        self.poll_max = config["poll_max"]
+        self.monitor_retry_interval = config["monitor_retry_interval"]
+        self.max_errors = config["max_errors"]
+        self.detect_attempts = config["detect_attempts"]
+        self.detect_retry_delay = config["detect_retry_delay"]
+        self.registry.configure(config["device_patterns"], config["debounce_delay"])
+        for worker in self.workers.values():
+            worker.max_errors = self.max_errors
+            worker.poller.set_bounds(self.poll_min, self.poll_max)
+        return True
+
+    def update_workers(self) -> bool:
+        """Starts a worker for every new headset and stops the ones gone
+
+        Returns:
+            True if a headset was added
+        """
+        added, removed = self.registry.refresh()
+        for sync in removed:
+            self.drop_worker(sync.card.number)
+        for sync in added:
+            worker = SyncWorker(sync, self.logger, self.max_errors, AdaptivePoller(self.poll_min, self.poll_max))
+            self.workers[sync.card_id] = worker
+            self.logger.info(f"Headset detected: {worker.label}")
+
+            # Try to restore saved volume state
+            if sync.restore_volume(silent=True):
+                self.logger.info(f"{worker.label}: volume restored to {sync._load_volume_state()}%")
+            else:
+                self.logger.info(f"{worker.label}: no saved volume state found or restoration failed")
+            worker.check_and_sync()
+        return bool(added)
+
+    def drop_worker(self, card_id: str) -> None:
+        worker = self.workers.pop(card_id, None)
+        if worker is not None:
+            worker.close_monitor()
+            METRICS.remove("redragon_poll_interval_seconds", card=card_id)
+            self.logger.warning(f"Headset disconnected: {worker.label}")
+        self.registry.remove(card_id)
+
+    def detect_headsets(self) -> bool:
+        """Looks for new headsets, retrying while udev may still set up the card"""
+        for attempt in range(self.detect_attempts):
+            if self.update_workers():
+                return True
+            if attempt + 1 < self.detect_attempts:
+                time.sleep(self.detect_retry_delay)
+        return False
+
+    def wait_for_headset(self):
+        self.logger.info("Waiting for headset connection...")
+        while self.running:
+            if self.detect_headsets():
+                return True
+
+            # Detection only runs again when a sound card appears
+            self.notifier.status(self.status_text())
+            while self.running:
+                if self.reload_requested:
+                    # New device patterns may match a card already there
+                    with self.notifier.reloading():
+                        reloaded = self.reload_config()
+                    if reloaded:
+                        break
+                self.notifier.watchdog()
+                if any(action == "add" for action, _ in self.hotplug.wait(self.wait_timeout())):
+                    break
+        return False
+
+    def handle_hotplug(self, events):
+        """Drops headsets as soon as their card is removed, picks up new ones
+
+        Returns:
+            True if a headset card went away
+        """
+        removed = False
+        for action, card in events:
+            if action == "remove" and card in self.workers:
+                self.drop_worker(card)
+                removed = True
+        if any(action == "add" for action, _ in events):
+            self.detect_headsets()
+        return removed
+
+    def latency_stats(self):
+        """Returns (last, average, max) event-to-sync latency in milliseconds"""
+        if not self.sync_latencies:
+            return None, None, None
+        latencies = [latency * 1000 for latency in self.sync_latencies]
+        return latencies[-1], sum(latencies) / len(latencies), max(latencies)
+
+    def open_event_monitor(self, worker: SyncWorker) -> bool:
+        """Subscribes to control change events of the headset card, if possible"""
+        worker.monitor_retry_at = time.monotonic() + self.monitor_retry_interval
+        polling = f"polling every {self.poll_min:g}-{self.poll_max:g}s (adaptive)"
+        if self.mode == "poll":
+            if not worker.events_unavailable:
+                self.logger.info(f"{worker.label}: {polling}...")
+                worker.events_unavailable = True
+            return False
+        try:
+            worker.master_numid = worker.sync.backend.controls(worker.sync.card_id).master.numid
+            worker.monitor = worker.sync.backend.open_event_monitor(worker.sync.card_id)
+            worker.sync.enable_write_cache(True)
+            worker.events_unavailable = False
+            self.logger.info(f"{worker.label}: waiting for control events...")
+            # Catch changes made while the monitor was being opened
+            worker.check_and_sync()
+            return True
+        except MixerError as e:
+            # Log once, not on every polling pass
+            if not worker.events_unavailable:
+                log = self.logger.warning if self.mode == "event" else self.logger.info
+                log(f"{worker.label}: control events unavailable ({e}), {polling} instead")
+                worker.events_unavailable = True
+            return False
+
+    def handle_control_events(self, worker: SyncWorker, ready: bool, received: float) -> None:
+        """Synchronizes a headset only when its PCM[0] changed"""
+        if ready:
+            numids = worker.monitor.read_events()
+            if numids is None:
+                if not self.running:
+                    return
+                self.logger.warning(f"{worker.label}: control device closed, headset disconnected?")
+                worker.close_monitor()
+                worker.lost = True
+                return
+            if numids:
+                worker.sync.invalidate_volumes()
+            if worker.master_numid not in numids:
+                return
+        elif worker.recheck_at is None or received < worker.recheck_at:
+            return
+
+        if worker.sync.should_debounce():
+            worker.recheck_at = time.monotonic() + worker.sync.debounce_delay
+            return
+        worker.recheck_at = None
+
+        syncs_before = worker.sync_count
+        worker.check_and_sync()
+        if worker.sync_count > syncs_before:
+            latency = time.monotonic() - received
+            self.sync_latencies.append(latency)
+            METRICS.observe("redragon_sync_latency_seconds", latency)
+            self.logger.info(f"{worker.label}: event-to-sync latency {latency * 1000:.1f}ms")
+
+    def wait_timeout(self) -> float:
+        """Longest blocking wait: running is checked and the watchdog pinged in time"""
+        if self.notifier.watchdog_interval is None:
+            return 1.0
+        return min(1.0, self.notifier.watchdog_interval / 2)
+
+    def run_loop(self):
+        """Serves every headset from one select loop until the daemon stops"""
+        while self.running:
+            if self.reload_requested:
+                with self.notifier.reloading():
+                    self.reload_config()
+
+            # No headset: no polling at all, only hotplug events
+            if not self.workers:
+                if not self.wait_for_headset():
+                    return
+
+            # Workers without events retry subscribing now and then
+            now = time.monotonic()
+            polled = []
+            for worker in list(self.workers.values()):
+                if worker.monitor is not None:
+                    continue
+                if worker.events_unavailable and now < worker.monitor_retry_at or not self.open_event_monitor(worker):
+                    polled.append(worker)
+
+            self.notifier.status(self.status_text())
+            self.notifier.watchdog()
+
+            # Wake up regularly to check self.running
+            timeout = self.wait_timeout()
+            for worker in polled:
+                timeout = min(timeout, max(0.0, worker.poller.due_at - now))
+            for worker in self.workers.values():
+                if worker.recheck_at is not None:
+                    timeout = max(0.0, min(timeout, worker.recheck_at - now))
+
+            watched = [worker for worker in self.workers.values() if worker.monitor is not None]
+            if self.hotplug.fileno() is not None:
+                watched.append(self.hotplug)
+            if self.metrics_server is not None:
+                watched.append(self.metrics_server)
+            ready, _, _ = select.select(watched, [], [], timeout)
+            received = time.monotonic()
+
+            if self.metrics_server in ready:
+                METRICS.gauge("redragon_headsets", len(self.workers))
+                self.metrics_server.accept()
+
+            if self.hotplug.fileno() is None or self.hotplug in ready:
+                self.handle_hotplug(self.hotplug.read_events())
+
+            for worker in list(self.workers.values()):
+                if worker.monitor is not None:
+                    self.handle_control_events(worker, worker in ready, received)
+
+            for worker in polled:
+                if worker.card_id in self.workers and received >= worker.poller.due_at:
+                    worker.poll()
+
+            # Headsets that stopped answering: drop them and detect again
+            if any(worker.lost for worker in self.workers.values()):
+                for card_id, worker in list(self.workers.items()):
+                    if worker.lost:
+                        self.drop_worker(card_id)
+                self.update_workers()
+
     def run(self):
         signal.signal(signal.SIGTERM, self.signal_handler)
         signal.signal(signal.SIGINT, self.signal_handler)
+        signal.signal(signal.SIGHUP, self.signal_handler)
 
         self.logger.info("Redragon Volume Sync Daemon started (simple mode: PCM[0] → PCM[1])")
 
-        if not self.wait_for_headset():
-            return
+        if self.metrics_socket:
+            try:
+                self.metrics_server = MetricsServer(self.metrics_socket)
+                self.logger.info(f"Metrics: {self.metrics_socket}")
+            except OSError as e:
+                self.logger.warning(f"Metrics socket unavailable: {e}")
 
-        # Try to restore saved volume state
-        self.logger.info("Attempting to restore saved volume state...")
-        if self.sync.restore_volume(silent=True):
-            saved_vol = self.sync._load_volume_state()
-            if saved_vol is not None:
-                self.logger.info(f"Volume restored to {saved_vol}%")
-        else:
-            self.logger.info("No saved volume state found or restoration failed")
-
-        self.logger.info("Executing initial synchronization...")
-        self.check_and_sync()
+        try:
+            # Headsets present at startup get their volume back before READY=1
+            self.update_workers()
+            for worker in self.workers.values():
+                self.open_event_monitor(worker)
+            startup = time.time() - METRICS.started
+            METRICS.gauge("redragon_startup_seconds", startup)
+            self.notifier.ready(self.status_text())
+            self.logger.info(f"Ready after {startup * 1000:.0f}ms")
+            self.run_loop()
+        finally:
+            self.notifier.stopping()
+            for worker in self.workers.values():
+                worker.close_monitor()
+            if self.metrics_server is not None:
+                self.metrics_server.close()
 
-        self.logger.info(f"Daemon active, checking every {self.check_interval}s...")
-        while self.running:
-            self.check_and_sync()
-            time.sleep(self.check_interval)
+            last, average, maximum = self.latency_stats()
+            if last is not None:
+                self.logger.info(
+                    f"Event-to-sync latency over {len(self.sync_latencies)} syncs: "
+                    f"avg {average:.1f}ms, max {maximum:.1f}ms"
+                )
+            self.hotplug.close()
+            self.registry.close()
+            self.notifier.close()
+            self.logger.info("Redragon Volume Sync Daemon closed")
 
-        self.logger.info("Redragon Volume Sync Daemon closed")
 
+def main():
+    parser = argparse.ArgumentParser(description="PCM[0] → PCM[1] sync daemon for Redragon wireless headsets")
+    parser.add_argument(
+        "-m", "--mode",
+        choices=MODES,
+        help="Monitoring mode: control change events, polling, or auto (default)",
+        default="auto"
+    )
+    parser.add_argument(
+        "--metrics-socket",
+        nargs="?",
+        const=f"{os.environ.get('XDG_RUNTIME_DIR', '/tmp')}/redragon-sync-metrics.sock",
+        metavar="PATH",
+        help="Serve Prometheus-style metrics on a Unix socket (default path: $XDG_RUNTIME_DIR/redragon-sync-metrics.sock)"
+    )
+    parser.add_argument(
+        "--poll-min",
+        type=float,
+        metavar="SECONDS",
+        help=f"Polling interval right after a volume change (default: poll_min from the config file, or {POLL_MIN_INTERVAL:g})"
+    )
+    parser.add_argument(
+        "--poll-max",
+        type=float,
+        metavar="SECONDS",
+        help=f"Polling interval while volumes are stable (default: poll_max from the config file, or {POLL_MAX_INTERVAL:g})"
+    )
+    args = parser.parse_args()
 
-if __name__ == "__main__":
-    daemon = RedragonDaemonSimple()
+    daemon = RedragonDaemonSimple(
+        mode=args.mode,
+        metrics_socket=args.metrics_socket,
+        poll_min=None if args.poll_min is None else max(0.01, args.poll_min),
+        poll_max=args.poll_max
+    )
     try:
         daemon.run()
     except KeyboardInterrupt:
@@ -166,3 +604,7 @@ if __name__ == "__main__":
     except Exception as e:
         daemon.logger.error(f"Fatal error: {e}", exc_info=True)
         sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Redragon sound card hotplug watcher
+Reports sound cards appearing and disappearing from netlink uevents, so
+daemons only run headset detection when something actually changed
+"""
+
+import os
+import re
+import select
+import socket
+import struct
+import time
+from typing import List, Optional, Set, Tuple
+
+NETLINK_KOBJECT_UEVENT = 15
+UEVENT_GROUP_KERNEL = 1
+UEVENT_GROUP_UDEV = 2  # Sent by udevd after rules ran (device node permissions set)
+
+UDEV_MONITOR_MAGIC = 0xfeedcafe
+SYSFS_SOUND = "/sys/class/sound"
+
+_CARD_RE = re.compile(r'/card(\d+)$')
+
+
+class HotplugWatcher:
+    """Sound card add/remove events
+
+    Listens to the udev netlink group when udevd is running, to the kernel
+    group otherwise. Where netlink is unavailable (e.g. some sandboxes) it
+    falls back to comparing the /sys/class/sound listing, which needs no
+    fork.
+    """
+
+    def __init__(self):
+        self._sock = None
+        self._cards = self._list_cards()
+
+        group = UEVENT_GROUP_UDEV if os.path.exists("/run/udev/control") else UEVENT_GROUP_KERNEL
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM | socket.SOCK_CLOEXEC, NETLINK_KOBJECT_UEVENT)
+            sock.bind((0, group))
+            sock.setblocking(False)
+            self._sock = sock
+        except (OSError, AttributeError):
+            self._sock = None
+
+    @property
+    def uses_netlink(self) -> bool:
+        return self._sock is not None
+
+    def fileno(self) -> Optional[int]:
+        """Descriptor to wait on, None when using the sysfs fallback"""
+        return self._sock.fileno() if self._sock is not None else None
+
+    def read_events(self) -> List[Tuple[str, str]]:
+        """Reads pending events without blocking
+
+        Returns:
+            List of (action, card number) with action "add" or "remove"
+        """
+        if self._sock is None:
+            return self._diff_cards()
+
+        events = []
+        while True:
+            try:
+                data = self._sock.recv(8192)
+            except BlockingIOError:
+                return events
+            except OSError:
+                return events
+            event = self._parse(data)
+            if event is not None:
+                events.append(event)
+
+    def wait(self, timeout: float) -> List[Tuple[str, str]]:
+        """Waits up to timeout seconds for sound card events"""
+        if self._sock is None:
+            time.sleep(timeout)
+            return self._diff_cards()
+
+        ready, _, _ = select.select([self._sock], [], [], timeout)
+        return self.read_events() if ready else []
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _parse(self, data: bytes) -> Optional[Tuple[str, str]]:
+        if data.startswith(b"libudev\0"):
+            # udev monitor header: prefix[8], magic (big endian), header_size,
+            # properties_off, properties_len (host order), ...
+            if len(data) < 24:
+                return None
+            magic, = struct.unpack_from("!I", data, 8)
+            _, properties_off, properties_len = struct.unpack_from("=III", data, 12)
+            if magic != UDEV_MONITOR_MAGIC:
+                return None
+            fields = data[properties_off:properties_off + properties_len].split(b"\0")
+        else:
+            # Kernel format: "action@devpath" followed by KEY=value fields
+            fields = data.split(b"\0")[1:]
+
+        properties = {}
+        for field in fields:
+            key, sep, value = field.partition(b"=")
+            if sep:
+                properties[key.decode('utf-8', 'replace')] = value.decode('utf-8', 'replace')
+
+        if properties.get("SUBSYSTEM") != "sound":
+            return None
+        action = properties.get("ACTION")
+        if action not in ("add", "remove"):
+            return None
+
+        # Only card-level events, not the control/pcm device nodes
+        match = _CARD_RE.search(properties.get("DEVPATH", ""))
+        if not match:
+            return None
+
+        return action, match.group(1)
+
+    def _diff_cards(self) -> List[Tuple[str, str]]:
+        cards = self._list_cards()
+        events = [("add", card) for card in sorted(cards - self._cards)]
+        events += [("remove", card) for card in sorted(self._cards - cards)]
+        self._cards = cards
+        return events
+
+    @staticmethod
+    def _list_cards() -> Set[str]:
+        try:
+            entries = os.listdir(SYSFS_SOUND)
+        except OSError:
+            return set()
+        return {match.group(1) for match in (re.match(r'card(\d+)$', entry) for entry in entries) if match}
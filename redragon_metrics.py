@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Redragon metrics - counters and latency histograms in Prometheus text format
+One process-wide registry (METRICS) is filled by the library and the daemons
+and rendered on demand: by the control daemon's "metrics" command and by the
+sync daemon's optional metrics socket
+"""
+
+import os
+import socket
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Upper bounds in seconds, from a native ioctl (~0.1ms) to a slow fork (~1s)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+HELP = {
+    "redragon_operation_seconds": "Duration of headset operations (detect, get, set, analog_check, sink)",
+    "redragon_mixer_errors_total": "Failed mixer reads and writes",
+    "redragon_forks_total": "Subprocesses started, by executable",
+    "redragon_reconnects_total": "Headset re-detections and pactl subscription restarts",
+    "redragon_syncs_total": "PCM[0] to PCM[1] synchronizations",
+    "redragon_sync_errors_total": "Failed synchronization checks",
+    "redragon_sync_latency_seconds": "Delay from a PCM[0] control event to the synchronization",
+    "redragon_poll_interval_seconds": "Current adaptive polling interval of headsets without control events",
+    "redragon_requests_total": "Control socket commands received",
+    "redragon_request_seconds": "Control socket command processing time",
+    "redragon_connections_total": "Control socket connections, by mode",
+    "redragon_fades_total": "Volume ramps (fade, soft mute), completed or cancelled",
+    "redragon_headsets": "Headsets currently managed",
+    "redragon_subscribers": "Connections subscribed to state changes",
+    "redragon_sets_total": "Set commands received and applied (the rest were coalesced)",
+    "redragon_writes_suppressed_total": "Mixer writes skipped because the control already held the value",
+    "redragon_uptime_seconds": "Seconds since the process started",
+    "redragon_startup_seconds": "Seconds from daemon start to ready (systemd READY=1)",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)  # Last one is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+
+
+class Metrics:
+    """Thread-safe counters, gauges and histograms with labels"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self.started = time.time()
+
+    def count(self, name: str, amount: float = 1, **labels: str) -> None:
+        """Increments a counter"""
+        key = self._key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def gauge(self, name: str, value: float, **labels: str) -> None:
+        """Sets a gauge to its current value"""
+        with self._lock:
+            self._gauges.setdefault(name, {})[self._key(labels)] = value
+
+    def remove(self, name: str, **labels: str) -> None:
+        """Drops a gauge series (e.g. of a headset that went away)"""
+        with self._lock:
+            self._gauges.get(name, {}).pop(self._key(labels), None)
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        """Adds a duration to a histogram"""
+        key = self._key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timed(self, name: str, **labels: str):
+        """Observes the duration of the block (also usable as a decorator)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text exposition format"""
+        self.gauge("redragon_uptime_seconds", time.time() - self.started)
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._counters):
+                self._header(lines, name, "counter")
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{self._labels(key)} {value:g}")
+            for name in sorted(self._gauges):
+                self._header(lines, name, "gauge")
+                for key, value in sorted(self._gauges[name].items()):
+                    lines.append(f"{name}{self._labels(key)} {value:g}")
+            for name in sorted(self._histograms):
+                self._header(lines, name, "histogram")
+                for key, histogram in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        lines.append(f"{name}_bucket{self._labels(key + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{self._labels(key)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{self._labels(key)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _key(labels: Dict[str, str]) -> LabelKey:
+        return tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+    @staticmethod
+    def _labels(key: LabelKey) -> str:
+        if not key:
+            return ""
+        escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in key)
+        return "{" + ",".join(f'{label}="{value}"' for (label, _), value in zip(key, escaped)) + "}"
+
+    @staticmethod
+    def _header(lines: List[str], name: str, kind: str) -> None:
+        if name in HELP:
+            lines.append(f"# HELP {name} {HELP[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+METRICS = Metrics()
+
+
+def count_fork(args: List[str]) -> None:
+    """Counts a subprocess about to be started, by executable name"""
+    METRICS.count("redragon_forks_total", command=os.path.basename(args[0]))
+
+
+class MetricsServer:
+    """Unix socket answering every connection with the metrics text
+
+    Non-blocking, meant to be added to a select loop: call accept() when
+    the socket is readable.
+    """
+
+    def __init__(self, path: str, metrics: Metrics = METRICS):
+        """
+        Args:
+            path: Socket path, replaced if it exists
+            metrics: Registry to expose
+        """
+        self.path = path
+        self.metrics = metrics
+        if os.path.exists(path):
+            os.unlink(path)
+        self._sock: Optional[socket.socket] = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM | socket.SOCK_CLOEXEC)
+        self._sock.bind(path)
+        os.chmod(path, 0o600)
+        self._sock.listen(4)
+        self._sock.setblocking(False)
+
+    def fileno(self) -> int:
+        return self._sock.fileno()
+
+    def accept(self) -> None:
+        """Answers pending connections"""
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except (BlockingIOError, OSError):
+                return
+            try:
+                conn.settimeout(1.0)
+                conn.sendall(self.metrics.render().encode('utf-8'))
+            except OSError:
+                pass
+            finally:
+                conn.close()
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+            if os.path.exists(self.path):
+                os.unlink(self.path)
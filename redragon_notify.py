@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Redragon notify - systemd service notifications (sd_notify protocol)
+Tells systemd when a daemon is ready (Type=notify units), what it is doing
+(STATUS=, shown by systemctl status) and that its main loop still runs
+(WATCHDOG=1, the unit's WatchdogSec= restarts it otherwise)
+
+Messages are datagrams of newline-separated KEY=VALUE lines sent to the
+socket in $NOTIFY_SOCKET ("@" for the abstract namespace). Without it
+(not started by systemd) every call does nothing.
+"""
+
+import os
+import socket
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+
+class SystemdNotifier:
+    """Notifications of one daemon process to its service manager"""
+
+    def __init__(self):
+        # Taken out of the environment so amixer/pactl children do not notify
+        address = os.environ.pop("NOTIFY_SOCKET", None)
+        watchdog_usec = os.environ.pop("WATCHDOG_USEC", None)
+        watchdog_pid = os.environ.pop("WATCHDOG_PID", None)
+
+        self.address = None
+        if address and address[0] in "/@":
+            self.address = "\0" + address[1:] if address[0] == "@" else address
+        self.socket = None
+        if self.address is not None:
+            try:
+                self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM | socket.SOCK_CLOEXEC)
+            except OSError:
+                self.address = None
+
+        # Ping twice per watchdog timeout, as sd_watchdog_enabled() advises
+        self.watchdog_interval: Optional[float] = None
+        try:
+            if watchdog_usec and (not watchdog_pid or int(watchdog_pid) == os.getpid()):
+                if int(watchdog_usec) > 0:
+                    self.watchdog_interval = int(watchdog_usec) / 2e6
+        except ValueError:
+            pass
+        self.is_ready = False
+        self.last_status = None
+        self.last_ping = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.socket is not None
+
+    def notify(self, *fields: str) -> bool:
+        """Sends KEY=VALUE fields in one message
+
+        Returns:
+            False if not under systemd or the message could not be sent
+        """
+        if self.socket is None:
+            return False
+        try:
+            self.socket.sendto("\n".join(fields).encode('utf-8'), self.address)
+            return True
+        except OSError:
+            return False
+
+    def ready(self, status: Optional[str] = None) -> None:
+        """Startup (or a reload) finished"""
+        fields = ["READY=1"]
+        if status is not None:
+            self.last_status = status
+            fields.append(f"STATUS={status}")
+        self.notify(*fields)
+        self.is_ready = True
+
+    def status(self, text: str) -> None:
+        """Updates the status line, unless it did not change"""
+        if text != self.last_status:
+            self.last_status = text
+            self.notify(f"STATUS={text}")
+
+    def watchdog(self) -> None:
+        """Keep-alive from the main loop, rate limited to half the ping interval"""
+        if self.watchdog_interval is None:
+            return
+        now = time.monotonic()
+        if now - self.last_ping >= self.watchdog_interval / 2:
+            self.last_ping = now
+            self.notify("WATCHDOG=1")
+
+    @contextmanager
+    def reloading(self):
+        """Reports a config reload running (only once the daemon is ready)"""
+        if not self.is_ready:
+            yield
+            return
+        monotonic_usec = time.clock_gettime_ns(time.CLOCK_MONOTONIC) // 1000
+        self.notify("RELOADING=1", f"MONOTONIC_USEC={monotonic_usec}")
+        try:
+            yield
+        finally:
+            self.notify("READY=1")
+
+    def stopping(self) -> None:
+        self.notify("STOPPING=1")
+
+    def close(self) -> None:
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Redragon PulseAudio/PipeWire state
+Caches the headset card profile (analog/digital) and sink names in memory
+and keeps them current through a long-lived "pactl subscribe" stream
+"""
+
+import os
+import re
+import subprocess
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Tuple
+from redragon_cards import compile_patterns
+from redragon_metrics import METRICS, count_fork
+
+
+def _pactl_env() -> dict:
+    # Force English locale for consistent output
+    env = os.environ.copy()
+    env['LC_ALL'] = 'C'
+    env['LANG'] = 'C'
+    return env
+
+
+class PactlSubscription:
+    """Long-lived "pactl subscribe" process dispatching events by facility
+
+    Listeners are called from the reader thread with the event type
+    ('new', 'change', 'remove') and the object index (or None).
+    """
+
+    _EVENT_RE = re.compile(r"Event '(\w+)' on ([\w-]+)(?: #(\d+))?")
+
+    def __init__(self):
+        self._listeners: Dict[str, List[Callable[[str, Optional[int]], None]]] = {}
+        self._disconnect_listeners: List[Callable[[], None]] = []
+        self._proc = None
+        self._thread = None
+
+    def add_listener(self, facility: str, callback: Callable[[str, Optional[int]], None]) -> None:
+        """Registers a callback for events on a facility ('card', 'sink', 'server', ...)"""
+        self._listeners.setdefault(facility, []).append(callback)
+
+    def add_disconnect_listener(self, callback: Callable[[], None]) -> None:
+        """Registers a callback for when the stream ends (e.g. sound server restart)"""
+        self._disconnect_listeners.append(callback)
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def start(self) -> bool:
+        """Starts the subscription, returns False if pactl cannot be run"""
+        if self.alive:
+            return True
+        count_fork(["pactl"])
+        try:
+            self._proc = subprocess.Popen(
+                ["pactl", "subscribe"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                env=_pactl_env()
+            )
+        except OSError:
+            self._proc = None
+            return False
+
+        self._thread = threading.Thread(target=self._read_events, args=(self._proc,), daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is not None and proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+
+    def _read_events(self, proc) -> None:
+        for line in proc.stdout:
+            match = self._EVENT_RE.match(line.strip())
+            if not match:
+                continue
+            event, facility, index = match.groups()
+            for callback in self._listeners.get(facility, []):
+                callback(event, int(index) if index else None)
+
+        proc.stdout.close()
+        proc.wait()
+        for callback in self._disconnect_listeners:
+            callback()
+
+
+class _SubscribedCache(ABC):
+    """Value read with pactl, cached until an event arrives on the subscription
+
+    Without a working subscription the value is re-read at most every
+    `ttl` seconds. Subclasses implement _query() and list the facilities
+    whose events invalidate the value.
+    """
+
+    FACILITIES = ()
+    # Headset names in pactl output, replaced by the configured device_patterns
+    DEVICE_PATTERNS = ['XiiSound', 'Weltrend', 'Redragon', 'H878']
+
+    def __init__(self, subscription: Optional[PactlSubscription] = None, ttl: float = 5.0,
+                 patterns: Optional[List[str]] = None):
+        """
+        Args:
+            subscription: Event stream used for invalidation (optional)
+            ttl: Maximum age in seconds of the cached value when not subscribed
+            patterns: Regexes picking the headset objects out of pactl
+                      output (None: DEVICE_PATTERNS)
+        """
+        self.subscription = subscription
+        self.ttl = ttl
+        self.queries = 0
+        self.patterns = patterns
+        self._regex = compile_patterns(patterns or self.DEVICE_PATTERNS)
+
+        self._lock = threading.Lock()
+        self._value = None
+        self._fetched_at = 0.0
+        self._generation = 0
+        self._last_start_attempt = None
+
+        if subscription is not None:
+            for facility in self.FACILITIES:
+                subscription.add_listener(facility, self._on_event)
+            subscription.add_disconnect_listener(self.invalidate)
+
+    def _on_event(self, event: str, index: Optional[int]) -> None:
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Discards the cached value, next lookup queries pactl again"""
+        with self._lock:
+            self._generation += 1
+            self._value = None
+
+    def set_patterns(self, patterns: Optional[List[str]]) -> None:
+        """Replaces the headset name regexes (None: DEVICE_PATTERNS)
+
+        The cached value was filtered with the old ones and is discarded.
+        """
+        if patterns == self.patterns:
+            return
+        self.patterns = patterns
+        self._regex = compile_patterns(patterns or self.DEVICE_PATTERNS)
+        self.invalidate()
+
+    def _is_headset(self, block: str) -> bool:
+        """Whether a "pactl list" block describes a headset object"""
+        return self._regex.search(block) is not None
+
+    def _get(self):
+        """Returns the cached value, querying pactl if needed (None on failure)"""
+        subscribed = self._ensure_subscription()
+
+        with self._lock:
+            value = self._value
+            if value is not None and not subscribed and time.monotonic() - self._fetched_at >= self.ttl:
+                value = None
+            generation = self._generation
+        if value is not None:
+            return value
+
+        self.queries += 1
+        value = self._query()
+        if value is None:
+            return None
+
+        with self._lock:
+            # Only cache if no event arrived while querying
+            if generation == self._generation:
+                self._value = value
+                self._fetched_at = time.monotonic()
+        return value
+
+    def _ensure_subscription(self) -> bool:
+        if self.subscription is None:
+            return False
+        if self.subscription.alive:
+            return True
+
+        # Retry a dead subscription at most once per TTL
+        now = time.monotonic()
+        if self._last_start_attempt is not None and now - self._last_start_attempt < self.ttl:
+            return False
+        if self._last_start_attempt is not None:
+            METRICS.count("redragon_reconnects_total", kind="pactl_subscribe")
+        self._last_start_attempt = now
+        self.invalidate()
+        return self.subscription.start()
+
+    @abstractmethod
+    def _query(self):
+        """Reads the value with pactl, None on failure"""
+
+    @staticmethod
+    def _pactl(*args: str) -> Optional[str]:
+        """Runs pactl and returns its output, None on failure"""
+        count_fork(["pactl"])
+        try:
+            result = subprocess.run(
+                ["pactl", *args],
+                capture_output=True,
+                text=True,
+                check=True,
+                env=_pactl_env()
+            )
+        except (subprocess.CalledProcessError, OSError):
+            return None
+        return result.stdout
+
+    @staticmethod
+    def _blocks(output: str, header: str) -> List[str]:
+        """Splits "pactl list" output into one block per object"""
+        return re.split(rf'^{header} #', output, flags=re.MULTILINE)[1:]
+
+    @staticmethod
+    def _alsa_card(block: str) -> Optional[str]:
+        match = re.search(r'alsa\.card = "(\d+)"', block)
+        return match.group(1) if match else None
+
+
+class ProfileCache(_SubscribedCache):
+    """Whether each headset card runs an analog profile, cached in memory
+
+    The profiles are read once with "pactl list cards" and then reused until
+    a card event arrives on the subscription. One query covers every
+    headset card.
+    """
+
+    FACILITIES = ('card',)
+
+    def is_analog(self, card_id: Optional[str] = None) -> bool:
+        """Returns True if the active profile of the headset card is analog
+
+        Args:
+            card_id: ALSA card number, the first headset card if omitted or
+                     not known to the sound server
+        """
+        profiles = self._get()
+        if profiles is None:
+            return False
+        if card_id in profiles:
+            return profiles[card_id]
+        return profiles.get(None, False)
+
+    def _query(self) -> Optional[Dict[Optional[str], bool]]:
+        """Reads the active profiles with "pactl list cards", None on failure"""
+        output = self._pactl("list", "cards")
+        if output is None:
+            return None
+
+        # Search for the Redragon cards, one "Card #N" block each
+        profiles = {}
+        for block in self._blocks(output, "Card"):
+            if not self._is_headset(block):
+                continue
+            profile = re.search(r'Active Profile:(.*)', block)
+            if not profile:
+                continue
+            analog = 'analog' in profile.group(1)
+
+            alsa_card = self._alsa_card(block)
+            if alsa_card:
+                profiles[alsa_card] = analog
+            profiles.setdefault(None, analog)
+
+        return profiles
+
+
+class SinkIndex(_SubscribedCache):
+    """Sink names of the headset cards, cached in memory
+
+    Read once with "pactl list sinks" and kept until a sink appears or
+    disappears on the subscription (volume changes do not invalidate it).
+    """
+
+    FACILITIES = ('sink',)
+
+    def _on_event(self, event: str, index: Optional[int]) -> None:
+        if event != 'change':
+            self.invalidate()
+
+    def sinks(self, card_id: Optional[str] = None) -> List[str]:
+        """Returns the headset sink names, only those of one card if given
+
+        Sinks the sound server does not tie to an ALSA card are returned for
+        any card.
+        """
+        entries = self._get() or []
+        if card_id is None:
+            return [name for _, name in entries]
+        names = [name for card, name in entries if card == card_id]
+        return names or [name for card, name in entries if card is None]
+
+    def sink(self, card_id: Optional[str] = None) -> Optional[str]:
+        """Returns the (first) sink of the headset, None if there is none"""
+        sinks = self.sinks(card_id)
+        return sinks[0] if sinks else None
+
+    def set_default(self, card_id: Optional[str] = None) -> Optional[str]:
+        """Makes the headset sink the default output
+
+        Returns:
+            The sink name, None if not found or pactl failed
+        """
+        sink = self.sink(card_id)
+        if sink is None or self._pactl("set-default-sink", sink) is None:
+            return None
+        return sink
+
+    def _query(self) -> Optional[List[Tuple[Optional[str], str]]]:
+        """Reads the headset sinks with "pactl list sinks", None on failure"""
+        output = self._pactl("list", "sinks")
+        if output is None:
+            return None
+
+        entries = []
+        for block in self._blocks(output, "Sink"):
+            name = re.search(r'^\s*Name: (\S+)', block, flags=re.MULTILINE)
+            if name and self._is_headset(block):
+                entries.append((self._alsa_card(block), name.group(1)))
+        return entries
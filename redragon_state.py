@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Redragon state page - the control daemon's headset state in shared memory
+The daemon keeps a small fixed-layout file in $XDG_RUNTIME_DIR mapped and
+rewrites it on every state change; readers map it once and then get a
+snapshot without any syscall or round trip to the daemon
+
+Layout (little-endian, one page):
+
+    offset  size  field
+         0     4  magic b"RDST"
+         4     2  layout version (2)
+         6     2  number of headsets in use (at most MAX_HEADSETS)
+         8     8  sequence: odd while the daemon writes, +2 per update
+        16     4  daemon pid, 0 once the daemon closed the page
+        20     4  reserved
+        24   104  headset slots, in card order (the first is the default
+                  headset), each:
+                  card number (int32), pcm0, pcm1, effective volume (int32,
+                  -1 if unreadable), flags (uint16: 1 analog, 2 muted),
+                  reserved (uint16), ALSA card id (20 bytes) and device name
+                  (64 bytes), UTF-8 NUL-padded
+
+Seqlock protocol: the writer makes the sequence odd, writes the slots, then
+makes it even again. A reader copies the slots between two reads of the
+sequence and retries unless both reads are equal and even. Readers tell
+that something changed by comparing the sequence with the last one seen.
+"""
+
+import mmap
+import os
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+MAGIC = b"RDST"
+LAYOUT_VERSION = 2
+MAX_HEADSETS = 8
+PAGE_SIZE = 4096
+
+HEADER = struct.Struct("<4sHHQI4x")
+SEQUENCE = struct.Struct("<Q")
+SEQUENCE_OFFSET = 8
+PID_OFFSET = 16
+SLOT = struct.Struct("<iiiiHH20s64s")
+FLAG_ANALOG = 1
+FLAG_MUTED = 2
+
+
+def state_page_path() -> str:
+    return f"{os.environ.get('XDG_RUNTIME_DIR', '/tmp')}/redragon-state"
+
+
+def _text(raw: bytes) -> str:
+    return raw.split(b"\0", 1)[0].decode('utf-8', 'replace')
+
+
+def _encode(text: str, size: int) -> bytes:
+    """NUL-padded UTF-8, cut on a character boundary"""
+    raw = text.encode('utf-8')[:size]
+    return raw.decode('utf-8', 'ignore').encode('utf-8')
+
+
+class StatePage:
+    """Writer side, owned by the control daemon (one writer thread)"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: File to map (default: $XDG_RUNTIME_DIR/redragon-state),
+                  replaced if it exists
+
+        Raises:
+            OSError: The file cannot be created or mapped
+        """
+        self.path = path or state_page_path()
+        tmp_path = f"{self.path}.tmp"
+        fd = os.open(tmp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC, 0o600)
+        try:
+            os.ftruncate(fd, PAGE_SIZE)
+            self._map: Optional[mmap.mmap] = mmap.mmap(fd, PAGE_SIZE, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        finally:
+            os.close(fd)
+        self.sequence = 0
+        self._slots = b""
+        HEADER.pack_into(self._map, 0, MAGIC, LAYOUT_VERSION, 0, self.sequence, os.getpid())
+        # Readers never see a half-initialized page
+        os.replace(tmp_path, self.path)
+
+    def publish(self, headsets: List[Tuple[str, str, str, Optional[Dict[str, Any]]]]) -> bool:
+        """Writes the state of every headset, bumping the sequence if it changed
+
+        Args:
+            headsets: (ALSA card number, ALSA card id, device name, state)
+                      in card order, the state being a dict as sent to
+                      subscribers or None if the volume is unreadable
+
+        Returns:
+            True if readers will see a new sequence
+        """
+        if self._map is None:
+            return False
+        slots = b"".join(self._pack_slot(*headset) for headset in headsets[:MAX_HEADSETS])
+        if slots == self._slots:
+            return False
+        self._write(slots)
+        return True
+
+    def _write(self, slots: bytes, pid: Optional[int] = None) -> None:
+        self.sequence += 1  # Odd: write in progress
+        SEQUENCE.pack_into(self._map, SEQUENCE_OFFSET, self.sequence)
+        self._map[HEADER.size:HEADER.size + len(slots)] = slots
+        struct.pack_into("<H", self._map, 6, len(slots) // SLOT.size)
+        if pid is not None:
+            struct.pack_into("<I", self._map, PID_OFFSET, pid)
+        self.sequence += 1
+        SEQUENCE.pack_into(self._map, SEQUENCE_OFFSET, self.sequence)
+        self._slots = slots
+
+    @staticmethod
+    def _pack_slot(card: str, card_id: str, device: str, state: Optional[Dict[str, Any]]) -> bytes:
+        if state is None:
+            return SLOT.pack(int(card), -1, -1, -1, 0, 0, _encode(card_id, 20), _encode(device, 64))
+        flags = (FLAG_ANALOG if state["analog"] else 0) | (FLAG_MUTED if state["muted"] else 0)
+        return SLOT.pack(
+            int(card), state["pcm0"], state["pcm1"], state["volume"], flags, 0,
+            _encode(card_id, 20), _encode(device, 64)
+        )
+
+    def close(self) -> None:
+        """Marks the page closed and removes it, readers then see no daemon"""
+        if self._map is not None:
+            self._write(b"", pid=0)
+            self._map.close()
+            self._map = None
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+class StateReader:
+    """Reader side: maps the page once, snapshots are plain memory reads"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: State page (default: $XDG_RUNTIME_DIR/redragon-state)
+
+        Raises:
+            OSError: The page does not exist (the daemon is not running)
+            ValueError: The file is not a state page
+        """
+        self.path = path or state_page_path()
+        with open(self.path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), PAGE_SIZE, mmap.MAP_SHARED, mmap.PROT_READ)
+        magic, version, _, _, _ = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            self._map.close()
+            raise ValueError(f"{self.path}: not a state page (version {LAYOUT_VERSION})")
+
+    @property
+    def closed(self) -> bool:
+        """The daemon stopped (a restarted daemon publishes a new page)"""
+        return struct.unpack_from("<I", self._map, PID_OFFSET)[0] == 0
+
+    @property
+    def sequence(self) -> int:
+        """Changes on every update, compare to detect changes"""
+        return SEQUENCE.unpack_from(self._map, SEQUENCE_OFFSET)[0]
+
+    def snapshot(self, retries: int = 1000) -> Tuple[int, List[Dict[str, Any]]]:
+        """Returns (sequence, headset states) from one consistent update
+
+        Each state has the keys of the daemon's subscriber state plus "id"
+        (ALSA card id); unreadable headsets have volume None.
+
+        Raises:
+            RuntimeError: The page kept changing for `retries` attempts
+        """
+        for attempt in range(retries):
+            before = self.sequence
+            if before & 1:
+                if attempt >= 10:
+                    os.sched_yield()  # Let a preempted writer finish
+                continue
+            count = struct.unpack_from("<H", self._map, 6)[0]
+            raw = self._map[HEADER.size:HEADER.size + min(count, MAX_HEADSETS) * SLOT.size]
+            if self.sequence == before:
+                return before, [self._unpack_slot(raw, offset) for offset in range(0, len(raw), SLOT.size)]
+        raise RuntimeError("state page kept changing")
+
+    @staticmethod
+    def _unpack_slot(raw: bytes, offset: int) -> Dict[str, Any]:
+        card, pcm0, pcm1, volume, flags, _, card_id, device = SLOT.unpack_from(raw, offset)
+        readable = volume >= 0
+        return {
+            "device": _text(device) or "Redragon",
+            "card": str(card),
+            "id": _text(card_id),
+            "pcm0": pcm0 if readable else None,
+            "pcm1": pcm1 if readable else None,
+            "analog": bool(flags & FLAG_ANALOG),
+            "muted": bool(flags & FLAG_MUTED),
+            "volume": volume if readable else None,
+        }
+
+    def close(self) -> None:
+        self._map.close()
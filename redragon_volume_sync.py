@@ -8,15 +8,130 @@ Compatible with:
 - Other Redragon wireless headsets with similar issues
 """
 
-import subprocess
 import sys
 import os
 import argparse
-import re
+import atexit
+import threading
 import time
 import json
 from pathlib import Path
-from typing import Tuple, Optional, List
+from typing import Dict, Tuple, Optional, List
+from redragon_alsa import BACKENDS, MixerError, create_backend, percent_value
+from redragon_cards import SoundCard, compile_patterns, find_headsets
+from redragon_metrics import METRICS
+from redragon_pulse import PactlSubscription, ProfileCache, SinkIndex
+
+
+class VolumeStatePersister:
+    """Write-behind persistence of the volume state
+
+    Keeps the latest state in memory and writes it to disk once no update
+    has arrived for `delay` seconds, and on flush()/close()/exit. Writes go to a
+    temporary file that is then renamed over the state file, so a crash
+    mid-write never leaves a truncated file behind.
+    """
+
+    def __init__(self, state_file: Path, delay: float = 1.0):
+        """
+        Args:
+            state_file: JSON file holding the state
+            delay: Quiet period in seconds before writing
+        """
+        self.state_file = state_file
+        self.delay = delay
+        self.writes = 0
+
+        self._cond = threading.Condition()
+        self._pending = None  # (version, state)
+        self._version = 0
+        self._last_update = 0.0
+        self._thread = None
+        self._closed = False
+
+        # Serializes writes and keeps an older state from replacing a newer one
+        self._write_lock = threading.Lock()
+        self._written_version = 0
+        atexit.register(self.flush)
+
+    @property
+    def pending(self) -> Optional[dict]:
+        """State not yet written to disk, if any"""
+        with self._cond:
+            return self._pending[1] if self._pending else None
+
+    def update(self, state: dict) -> None:
+        """Replaces the state to persist (cheap, never touches the disk
+        unless closed)"""
+        late = None
+        with self._cond:
+            self._version += 1
+            if self._closed:
+                late = (self._version, state)
+            else:
+                self._pending = (self._version, state)
+                self._last_update = time.monotonic()
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="state-writer", daemon=True)
+                    self._thread.start()
+                self._cond.notify()
+        if late is not None:
+            # Update of a dropped headset: no writer thread anymore, write now
+            self._write(*late)
+
+    def flush(self) -> None:
+        """Writes the pending state now (shutdown)"""
+        with self._cond:
+            pending, self._pending = self._pending, None
+        if pending is not None:
+            self._write(*pending)
+
+    def close(self) -> None:
+        """Writes the pending state and stops the writer thread (headset dropped)"""
+        with self._cond:
+            self._closed = True
+            thread = self._thread
+            self._cond.notify()
+        self.flush()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        atexit.unregister(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return  # close() writes what is pending
+                    if self._pending is None:
+                        self._cond.wait()
+                        continue
+                    remaining = self._last_update + self.delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                pending, self._pending = self._pending, None
+            self._write(*pending)
+
+    def _write(self, version: int, state: dict) -> None:
+        tmp_file = self.state_file.with_name(f".{self.state_file.name}.{os.getpid()}.tmp")
+        with self._write_lock:
+            if version <= self._written_version:
+                return
+            try:
+                with open(tmp_file, 'w') as f:
+                    json.dump(state, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_file, self.state_file)
+                self._written_version = version
+                self.writes += 1
+            except OSError:
+                # Silent fail - not critical
+                try:
+                    tmp_file.unlink()
+                except OSError:
+                    pass
 
 
 class RedragonVolumeSync:
@@ -28,109 +143,194 @@ class RedragonVolumeSync:
         r'Weltrend',                     # Other manufacturer
         r'Redragon',                     # Brand
     ]
+    DEVICE_REGEX = compile_patterns(DEVICE_PATTERNS)
 
-    def __init__(self, device_pattern: str = None):
+    def __init__(self, device_pattern: str = None, backend="auto", watch_profile: bool = False,
+                 card: Optional[SoundCard] = None, profile_cache: Optional[ProfileCache] = None,
+                 sink_index: Optional[SinkIndex] = None):
         """
         Args:
             device_pattern: Specific pattern to search (optional)
+            backend: Mixer backend name ("auto", "native", "amixer") or a
+                     backend instance
+            watch_profile: Keep a "pactl subscribe" stream open to invalidate
+                           the cached analog/digital state (for daemons)
+            card: Headset card to control instead of detecting the first
+                  one (see HeadsetRegistry)
+            profile_cache: Shared profile cache, replaces watch_profile
+            sink_index: Shared sink index (optional)
         """
         self.custom_pattern = device_pattern
+        self.device_patterns: Optional[List[str]] = None  # Replace DEVICE_PATTERNS (see HeadsetRegistry.configure)
+        self.backend = create_backend(backend) if isinstance(backend, str) else backend
+        self._owns_profile_cache = profile_cache is None
+        patterns = [device_pattern] if device_pattern else None
+        self.profile_cache = profile_cache or ProfileCache(PactlSubscription() if watch_profile else None,
+                                                           patterns=patterns)
+        self.sink_index = sink_index or SinkIndex(self.profile_cache.subscription, patterns=patterns)
+        self.card = card  # Set when bound to one headset
         self.card_id = None
         self.device_name = None
+        self.headsets = []  # Every detected headset card (SoundCard)
         self.last_set_time = 0
         self.debounce_delay = 0.5  # seconds
+
+        # Last known raw (PCM[0], PCM[1]) values, read or written. Writes of
+        # the value a control already holds are skipped while write_cache is
+        # on: the owner watches the card's control events and calls
+        # invalidate_volumes() on every one (see enable_write_cache)
+        self.write_cache = False
+        self.known_volumes: Optional[Tuple[int, int]] = None
+        self._volumes_lock = threading.Lock()
+        self._volumes_generation = 0  # Bumped on invalidation, stale reads are not cached
+        self.writes_suppressed = 0
+        self.saved_volume: Optional[int] = None  # Last volume handed to the persister
         
         # Volume state persistence
         self.state_dir = Path.home() / ".local" / "share" / "redragon-hs-companion"
-        self.state_file = self.state_dir / "volume_state.json"
+        self.legacy_state_file = self.state_dir / "volume_state.json"
+        self.state_file = self.legacy_state_file
+        if card is not None:
+            # One state per headset, so several dongles keep their own volume
+            self.state_file = self.state_dir / f"volume_state-{card.id}.json"
         self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.persister = VolumeStatePersister(self.state_file)
         
-        self.detect_card()
+        if card is not None:
+            self._use_card(card)
+        else:
+            self.detect_card()
 
-    def detect_card(self) -> bool:
-        """Detects automatically wireless headsets Redragon"""
+    def _use_card(self, card: SoundCard) -> None:
+        self.card_id = card.number
+        self.device_name = card.name or "Headset Redragon"
+        self.invalidate_volumes()
         try:
-            # Force English locale for consistent output
-            env = os.environ.copy()
-            env['LC_ALL'] = 'C'
-            env['LANG'] = 'C'
-            
-            result = subprocess.run(
-                ["aplay", "-l"],
-                capture_output=True,
-                text=True,
-                check=True,
-                env=env
-            )
-
-            # If a custom pattern was provided, use only it
-            patterns_to_check = [self.custom_pattern] if self.custom_pattern else self.DEVICE_PATTERNS
-
-            # Search for the card using the patterns
-            for line in result.stdout.split('\n'):
-                if 'card' in line.lower():
-                    for pattern in patterns_to_check:
-                        if re.search(pattern, line, re.IGNORECASE):
-                            match = re.search(r'card (\d+):', line, re.IGNORECASE)
-                            if match:
-                                self.card_id = match.group(1)
-                                # Extract the device name
-                                name_match = re.search(r'\[([^\]]+)\]', line)
-                                self.device_name = name_match.group(1) if name_match else "Headset Redragon"
-                                print(f"✓ {self.device_name} detected on card {self.card_id}")
-                                return True
+            # Enumerate the card's controls once, reused by every read and write
+            self.backend.controls(self.card_id)
+        except MixerError:
+            pass  # Reported by the first read or write
 
+    def matches(self, selector: Optional[str]) -> bool:
+        """Checks a "card=<number|id>" or "device=<name>" selector against the headset
+
+        No selector matches any headset.
+        """
+        if not selector:
+            return True
+        key, _, value = selector.partition("=")
+        if key == "card":
+            return value in (self.card_id, self.card.id if self.card else None)
+        if key == "device":
+            return value.lower() in (self.device_name or "").lower()
+        return False
+
+    def detect_card(self) -> bool:
+        """Detects automatically wireless headsets Redragon
+
+        Every matching card is kept in `self.headsets`, the first one is used.
+        """
+        self.headsets = find_redragon_cards(self.custom_pattern, self.device_patterns)
+        if self.card is not None:
+            # Bound to one headset: follow it if its card number changed
+            self.headsets = [card for card in self.headsets if card.id == self.card.id]
+
+        if not self.headsets:
             print("✗ Headset Redragon wireless not found")
             print("   Compatible devices: H878, H848, etc (via dongle USB)")
             return False
 
-        except subprocess.CalledProcessError as e:
-            print(f"✗ Error detecting audio devices: {e}")
-            return False
+        if self.card is not None:
+            self.card = self.headsets[0]
+            METRICS.count("redragon_reconnects_total", kind="headset")
+        # Card numbers may change on replug, drop cached control handles
+        self.backend.reset()
+        self._use_card(self.headsets[0])
+        print(f"✓ {self.device_name} detected on card {self.card_id}")
+        return True
 
+    @METRICS.timed("redragon_operation_seconds", op="get")
     def get_volumes(self) -> Tuple[Optional[int], Optional[int]]:
         """Gets the current volumes of the two PCM controls"""
         if not self.card_id:
             return None, None
 
+        generation = self._volumes_generation
         try:
-            # Force English locale for consistent output
-            env = os.environ.copy()
-            env['LC_ALL'] = 'C'
-            env['LANG'] = 'C'
-            
-            result = subprocess.run(
-                ["amixer", "-c", self.card_id, "contents"],
-                capture_output=True,
-                text=True,
-                check=True,
-                env=env
-            )
-
-            pcm_vol1 = None
-            pcm_vol2 = None
-
-            lines = result.stdout.split('\n')
-            for i, line in enumerate(lines):
-                if "name='PCM Playback Volume'" in line:
-                    # Next line contains the values
-                    if i + 1 < len(lines):
-                        value_line = lines[i + 2]
-                        if 'values=' in value_line:
-                            values = re.search(r'values=(.+)', value_line)
-                            if values:
-                                vals = values.group(1).strip().split(',')
-                                if "index=1" in line:
-                                    pcm_vol2 = int(vals[0])
-                                else:
-                                    pcm_vol1 = int(vals[0])
-
-            return pcm_vol1, pcm_vol2
-
-        except subprocess.CalledProcessError as e:
+            vol1, vol2 = self.backend.get_volumes(self.card_id)
+
+        except MixerError as e:
+            self.invalidate_volumes()
+            METRICS.count("redragon_mixer_errors_total", op="get")
             print(f"✗ Error getting volumes: {e}")
             return None, None
 
+        if vol1 is not None and vol2 is not None:
+            self._remember_volumes(generation, vol1, vol2)
+        return vol1, vol2
+
+    def enable_write_cache(self, enabled: bool) -> None:
+        """Skips writes of values the controls already hold, for owners that
+        call invalidate_volumes() on every control change event of the card
+
+        Turn it off when events stop being watched (e.g. back to polling).
+        """
+        self.write_cache = enabled
+        self.invalidate_volumes()
+
+    def invalidate_volumes(self) -> None:
+        """Forgets the known hardware state (control change event, re-detection)"""
+        with self._volumes_lock:
+            self._volumes_generation += 1
+            self.known_volumes = None
+
+    def _remember_volumes(self, generation: int, master: Optional[int], secondary: int) -> None:
+        """Records values read or written, unless invalidated meanwhile
+
+        Args:
+            generation: _volumes_generation before the read or write
+            master: None keeps the known PCM[0] value (nothing is recorded
+                    if it is unknown)
+        """
+        with self._volumes_lock:
+            if generation != self._volumes_generation:
+                return
+            if master is None:
+                if self.known_volumes is None:
+                    return
+                master = self.known_volumes[0]
+            self.known_volumes = (master, secondary)
+
+    def _write_volumes(self, master_percent: int, secondary: int) -> None:
+        """Writes PCM[0] (percentage) and PCM[1] (raw value), skipping the
+        controls known to hold the value already
+
+        Raises:
+            MixerError: The known state is dropped
+        """
+        generation = self._volumes_generation
+        known = self.known_volumes if self.write_cache else None
+        try:
+            master = percent_value(self.backend.controls(self.card_id).master, master_percent)
+            suppressed = 0
+            if known is not None and known[0] == master:
+                suppressed += 1
+            else:
+                self.backend.set_master_percent(self.card_id, master_percent)
+            if known is not None and known[1] == secondary:
+                suppressed += 1
+            else:
+                self.backend.set_secondary(self.card_id, secondary)
+        except MixerError:
+            self.invalidate_volumes()
+            raise
+
+        if suppressed:
+            self.writes_suppressed += suppressed
+            METRICS.count("redragon_writes_suppressed_total", suppressed)
+        self._remember_volumes(generation, master, secondary)
+
+    @METRICS.timed("redragon_operation_seconds", op="set")
     def set_volume(self, volume: int, silent: bool = False) -> bool:
         """Defines the volume intelligently based on the output type
 
@@ -159,15 +359,16 @@ class RedragonVolumeSync:
             self.last_set_time = time.time()
 
             if success:
-                # Save volume state to disk
-                self._save_volume_state(volume)
+                # Save volume state to disk (unless unchanged)
+                if volume != self.saved_volume:
+                    self._save_volume_state(volume)
                 
                 if not silent:
                     print(f"✓ Volume synchronized to {volume}%")
 
             return success
 
-        except subprocess.CalledProcessError as e:
+        except MixerError as e:
             if not silent:
                 print(f"✗ Error defining volume: {e}")
             return False
@@ -193,103 +394,41 @@ class RedragonVolumeSync:
             if is_analog:
                 # ANALOG OUTPUT: PCM[0]=100% fixed, PCM[1]=variable
 
-                # Keeps PCM[0] always at 100%
-                subprocess.run(
-                    ["amixer", "-c", self.card_id, "set", "PCM", "100%"],
-                    capture_output=True,
-                    check=True
-                )
-
-                # Adjusts only PCM[1] with the desired volume
-                subprocess.run(
-                    ["amixer", "-c", self.card_id, "cset", "numid=10", str(volume)],
-                    capture_output=True,
-                    check=True
-                )
+                # Keeps PCM[0] always at 100% (a no-op once it is known to be),
+                # adjusts only PCM[1] with the desired volume
+                self._write_volumes(100, volume)
             else:
                 # DIGITAL OUTPUT: Synchronizes PCM[0] and PCM[1] normally
 
-                # Define PCM[0] (2 channels) - Used by PipeWire/PulseAudio
-                subprocess.run(
-                    ["amixer", "-c", self.card_id, "set", "PCM", f"{volume}%"],
-                    capture_output=True,
-                    check=True
-                )
-
-                # Define PCM[1] (1 channel) - Not controlled by PipeWire
-                subprocess.run(
-                    ["amixer", "-c", self.card_id, "cset", "numid=10", str(volume)],
-                    capture_output=True,
-                    check=True
-                )
+                # PCM[0] (2 channels) - Used by PipeWire/PulseAudio
+                # PCM[1] (1 channel) - Not controlled by PipeWire
+                self._write_volumes(volume, volume)
 
             return True
-        except subprocess.CalledProcessError:
+        except MixerError:
+            METRICS.count("redragon_mixer_errors_total", op="set")
             return False
 
+    @METRICS.timed("redragon_operation_seconds", op="analog_check")
     def _is_analog_output(self) -> bool:
-        """Detects if the analog output is active"""
-        try:
-            # Force English locale for consistent output
-            env = os.environ.copy()
-            env['LC_ALL'] = 'C'
-            env['LANG'] = 'C'
-            
-            result = subprocess.run(
-                ["pactl", "list", "cards"],
-                capture_output=True,
-                text=True,
-                check=True,
-                env=env
-            )
-
-            # Search for the Redragon card
-            in_redragon_card = False
-            for line in result.stdout.split('\n'):
-                if any(pattern in line for pattern in ['XiiSound', 'Weltrend', 'Redragon', 'H878']):
-                    in_redragon_card = True
-
-                if in_redragon_card and 'Active Profile:' in line:
-                    return 'analog' in line
-
-            return False
-        except:
-            return False
+        """Detects if the analog output is active (cached, see ProfileCache)"""
+        return self.profile_cache.is_analog(self.card_id)
 
+    @METRICS.timed("redragon_operation_seconds", op="sink")
     def _get_pipewire_sink(self) -> Optional[str]:
-        """Gets the name of the PipeWire sink for the headset"""
-        try:
-            # Force English locale for consistent output
-            env = os.environ.copy()
-            env['LC_ALL'] = 'C'
-            env['LANG'] = 'C'
-            
-            result = subprocess.run(
-                ["pactl", "list", "sinks", "short"],
-                capture_output=True,
-                text=True,
-                check=True,
-                env=env
-            )
-
-            # Search for the Redragon sink
-            for line in result.stdout.split('\n'):
-                if any(pattern in line for pattern in ['XiiSound', 'Weltrend', 'Redragon']):
-                    parts = line.split()
-                    if len(parts) >= 2:
-                        return parts[1]  # Sink name
+        """Gets the name of the PipeWire sink for the headset (cached, see SinkIndex)"""
+        return self.sink_index.sink(self.card_id)
 
-            return None
-        except:
-            return None
-
-    def sync_from_master(self) -> bool:
+    def sync_from_master(self, volumes: Optional[Tuple[int, int]] = None) -> bool:
         """Synchronizes PCM[1] copying the value of PCM[0] (master)
 
-        PCM[0] (numid=9) is controlled by PipeWire/PulseAudio.
-        PCM[1] (numid=10) is not controlled and needs to be synchronized manually.
+        PCM[0] (numid=9 on the H878) is controlled by PipeWire/PulseAudio.
+        PCM[1] (numid=10 on the H878) is not controlled and needs to be synchronized manually.
+
+        Args:
+            volumes: (PCM[0], PCM[1]) just read by the caller, not read again
         """
-        vol1, vol2 = self.get_volumes()
+        vol1, vol2 = volumes if volumes is not None else self.get_volumes()
 
         if vol1 is None or vol2 is None:
             return False
@@ -300,16 +439,17 @@ class RedragonVolumeSync:
 
         # Copies the volume of PCM[0] (master) to PCM[1]
         try:
-            subprocess.run(
-                ["amixer", "-c", self.card_id, "cset", f"numid=10", f"{vol1}"],
-                capture_output=True,
-                check=True
-            )
+            generation = self._volumes_generation
+            self.backend.set_secondary(self.card_id, vol1)
 
             self.last_set_time = time.time()
+            # PCM[0] stays as known (or unknown): it may have moved since the read
+            self._remember_volumes(generation, None, vol1)
             return True
 
-        except subprocess.CalledProcessError:
+        except MixerError:
+            self.invalidate_volumes()
+            METRICS.count("redragon_mixer_errors_total", op="sync")
             return False
 
     def should_debounce(self) -> bool:
@@ -377,30 +517,32 @@ class RedragonVolumeSync:
         return self.set_volume(target, silent=True)
 
     def _save_volume_state(self, volume: int) -> None:
-        """Save volume state to disk for persistence across reboots"""
-        try:
-            state = {
-                "volume": volume,
-                "device": self.device_name or "Unknown",
-                "card_id": self.card_id,
-                "timestamp": time.time()
-            }
-            with open(self.state_file, 'w') as f:
-                json.dump(state, f, indent=2)
-        except Exception as e:
-            # Silent fail - not critical
-            pass
+        """Save volume state for persistence across reboots (written behind, see VolumeStatePersister)"""
+        state = {
+            "volume": volume,
+            "device": self.device_name or "Unknown",
+            "card_id": self.card_id,
+            "timestamp": time.time()
+        }
+        self.saved_volume = volume
+        self.persister.update(state)
 
     def _load_volume_state(self) -> Optional[int]:
-        """Load saved volume state from disk"""
-        try:
-            if self.state_file.exists():
-                with open(self.state_file, 'r') as f:
-                    state = json.load(f)
-                    return state.get("volume")
-        except Exception as e:
-            # Silent fail - return None if can't read
-            pass
+        """Load saved volume state (pending in memory, or from disk)"""
+        pending = self.persister.pending
+        if pending is not None:
+            return pending.get("volume")
+
+        # Headsets without their own state yet start from the shared one
+        for state_file in (self.state_file, self.legacy_state_file):
+            try:
+                if state_file.exists():
+                    with open(state_file, 'r') as f:
+                        state = json.load(f)
+                        return state.get("volume")
+            except Exception as e:
+                # Silent fail - return None if can't read
+                pass
         return None
 
     def restore_volume(self, silent: bool = False) -> bool:
@@ -412,6 +554,15 @@ class RedragonVolumeSync:
             return self.set_volume(saved_volume, silent=silent)
         return False
 
+    def close(self) -> None:
+        """Flushes the volume state and releases long-lived resources"""
+        self.persister.close()
+        if not self._owns_profile_cache:
+            return  # Shared resources belong to the HeadsetRegistry
+        if self.profile_cache.subscription is not None:
+            self.profile_cache.subscription.stop()
+        self.backend.reset()
+
     def show_status(self) -> None:
         """Shows the current status of the headset"""
         if not self.card_id:
@@ -426,6 +577,9 @@ class RedragonVolumeSync:
         print(f"  {device_display} - Status")
         print("="*50)
         print(f"  Card: {self.card_id}")
+        if len(self.headsets) > 1:
+            others = ", ".join(f"{card.name} (card {card.number})" for card in self.headsets[1:])
+            print(f"  Other headsets: {others}")
         print(f"  PCM Volume (2 channels): {vol1}%")
         print(f"  PCM Volume [1] (1 channel): {vol2}%")
 
@@ -437,6 +591,135 @@ class RedragonVolumeSync:
         print("="*50 + "\n")
 
 
+class HeadsetRegistry:
+    """Every connected Redragon headset, one RedragonVolumeSync per card
+
+    The headsets share the mixer backend, the profile cache and the sink
+    index, so one "pactl subscribe" stream and one "pactl list cards" /
+    "pactl list sinks" query serve all of them.
+    """
+
+    def __init__(self, device_pattern: str = None, backend="auto", watch_profile: bool = False):
+        """
+        Args:
+            device_pattern: Specific pattern to search (optional)
+            backend: Mixer backend name ("auto", "native", "amixer") or a
+                     backend instance
+            watch_profile: Keep a "pactl subscribe" stream open (for daemons)
+        """
+        self.device_pattern = device_pattern
+        self.backend = create_backend(backend) if isinstance(backend, str) else backend
+        patterns = [device_pattern] if device_pattern else None
+        self.profile_cache = ProfileCache(PactlSubscription() if watch_profile else None, patterns=patterns)
+        self.sink_index = SinkIndex(self.profile_cache.subscription, patterns=patterns)
+        self.headsets: Dict[str, RedragonVolumeSync] = {}  # by ALSA card number
+        self.device_patterns: Optional[List[str]] = None
+        self.debounce_delay: Optional[float] = None
+
+    def configure(self, device_patterns: Optional[List[str]] = None, debounce_delay: Optional[float] = None) -> None:
+        """Applies tunables to the headsets, current and future
+
+        Args:
+            device_patterns: Card name regexes replacing the built-in ones
+                             (None: built-in), used by the next detection
+                             and by the profile and sink lookups
+            debounce_delay: Seconds a volume set is protected from the sync
+                            (None: keep the default)
+        """
+        self.device_patterns = device_patterns
+        self.debounce_delay = debounce_delay
+        if not self.device_pattern:
+            # The pactl objects of a custom-named headset must match too
+            self.profile_cache.set_patterns(device_patterns)
+            self.sink_index.set_patterns(device_patterns)
+        for sync in self.headsets.values():
+            self._configure(sync)
+
+    def _configure(self, sync: RedragonVolumeSync) -> None:
+        sync.device_patterns = self.device_patterns
+        if self.debounce_delay is not None:
+            sync.debounce_delay = self.debounce_delay
+
+    def refresh(self) -> Tuple[List[RedragonVolumeSync], List[RedragonVolumeSync]]:
+        """Matches the registry to the headsets currently connected
+
+        Returns:
+            (added, removed) headsets
+        """
+        cards = {card.number: card for card in find_redragon_cards(self.device_pattern, self.device_patterns)}
+
+        removed = []
+        for number, sync in list(self.headsets.items()):
+            card = cards.get(number)
+            if card is None or card.id != sync.card.id:
+                removed.append(self.remove(number))
+
+        added = []
+        for number, card in cards.items():
+            if number not in self.headsets:
+                sync = RedragonVolumeSync(
+                    device_pattern=self.device_pattern,
+                    backend=self.backend,
+                    card=card,
+                    profile_cache=self.profile_cache,
+                    sink_index=self.sink_index
+                )
+                self._configure(sync)
+                self.headsets[number] = sync
+                added.append(sync)
+
+        return added, removed
+
+    def remove(self, card_id: str) -> Optional[RedragonVolumeSync]:
+        """Drops a headset whose card went away"""
+        sync = self.headsets.pop(card_id, None)
+        if sync is not None:
+            sync.card_id = None
+            sync.close()
+            # Card numbers may be reused, drop cached control handles
+            self.backend.reset()
+        return sync
+
+    @property
+    def primary(self) -> Optional[RedragonVolumeSync]:
+        """Headset used when no selector is given (lowest card number)"""
+        if not self.headsets:
+            return None
+        return self.headsets[min(self.headsets, key=int)]
+
+    def select(self, selector: Optional[str] = None) -> Optional[RedragonVolumeSync]:
+        """Returns the headset matching a "card=" or "device=" selector"""
+        if not selector:
+            return self.primary
+        for card_id in sorted(self.headsets, key=int):
+            if self.headsets[card_id].matches(selector):
+                return self.headsets[card_id]
+        return None
+
+    def close(self) -> None:
+        """Flushes every headset state and releases shared resources"""
+        for sync in self.headsets.values():
+            sync.close()
+        if self.profile_cache.subscription is not None:
+            self.profile_cache.subscription.stop()
+        self.backend.reset()
+
+
+@METRICS.timed("redragon_operation_seconds", op="detect")
+def find_redragon_cards(device_pattern: Optional[str] = None,
+                        device_patterns: Optional[List[str]] = None) -> List[SoundCard]:
+    """Lists the headset cards, matching only device_pattern if given
+
+    device_patterns replaces RedragonVolumeSync.DEVICE_PATTERNS (known USB
+    dongles still match).
+    """
+    if device_pattern:
+        return find_headsets(compile_patterns([device_pattern]), match_usb_ids=False)
+    if device_patterns:
+        return find_headsets(compile_patterns(device_patterns))
+    return find_headsets(RedragonVolumeSync.DEVICE_REGEX)
+
+
 # Alias for compatibility with existing code
 H878VolumeSync = RedragonVolumeSync
 
@@ -478,9 +761,20 @@ Exemplos:
         default=None
     )
 
+    parser.add_argument(
+        "-b", "--backend",
+        choices=BACKENDS,
+        help="Mixer backend: native ALSA control API, amixer or auto (default)",
+        default="auto"
+    )
+
     args = parser.parse_args()
 
-    sync = RedragonVolumeSync(device_pattern=args.device)
+    try:
+        sync = RedragonVolumeSync(device_pattern=args.device, backend=args.backend)
+    except MixerError as e:
+        print(f"✗ Mixer backend '{args.backend}' unavailable: {e}")
+        sys.exit(1)
 
     if not sync.card_id:
         print("\n⚠️  Ensure the Redragon headset is connected (via dongle USB)")
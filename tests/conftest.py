@@ -0,0 +1,79 @@
+"""
+Shared fixtures: the daemons run against stub aplay/amixer/pactl
+executables (no headset, no sound server) and a temporary HOME, or with
+the benchmark's fake headset (FakeMixerBackend, BenchEnvironment)
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# The modules live at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def no_headset(tmp_path, monkeypatch):
+    """Stub sound tools that find nothing, first on PATH, and no sound cards"""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    for name in ("aplay", "amixer", "pactl"):
+        stub = bin_dir / name
+        stub.write_text("#!/bin/sh\nexit 0\n")
+        stub.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:{Path(sys.executable).parent}:/usr/bin:/bin")
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    # Not the sound cards of the machine running the tests
+    import redragon_cards
+    monkeypatch.setattr(redragon_cards, "PROC_ASOUND", str(tmp_path / "no-proc"))
+    monkeypatch.setattr(redragon_cards, "SYSFS_SOUND", str(tmp_path / "no-sysfs"))
+    return tmp_path
+
+
+@pytest.fixture
+def daemon(no_headset):
+    from redragon_control_daemon import RedragonControlDaemon
+
+    daemon = RedragonControlDaemon()
+    yield daemon
+    daemon.executor.shutdown(wait=True)
+    daemon.registry.close()
+    daemon.hotplug.close()
+
+
+@pytest.fixture
+def bench_env():
+    """Temporary HOME, runtime dir, /proc/asound with one headset and stub pactl/amixer"""
+    from redragon_bench import BenchEnvironment
+
+    with BenchEnvironment() as env:
+        yield env
+
+
+@pytest.fixture
+def backend():
+    from redragon_bench import FakeMixerBackend
+
+    return FakeMixerBackend()
+
+
+@pytest.fixture
+def registry(bench_env, backend):
+    from redragon_volume_sync import HeadsetRegistry
+
+    registry = HeadsetRegistry(backend=backend)
+    registry.refresh()
+    yield registry
+    registry.close()
+
+
+@pytest.fixture
+def headset_daemon(bench_env, backend):
+    """Control daemon with the fake headset on card 1"""
+    from redragon_bench import close_daemon, make_daemon
+
+    daemon = make_daemon(backend)
+    yield daemon
+    close_daemon(daemon)
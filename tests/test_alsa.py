@@ -0,0 +1,153 @@
+"""amixer output parsing and control lookup by name"""
+
+import errno
+
+import pytest
+
+import redragon_alsa
+from redragon_alsa import (
+    AmixerBackend, ControlInfo, ControlMap, MixerError, NativeAlsaBackend, _parse_contents, create_backend,
+    percent_value
+)
+
+CONTENTS = """numid=3,iface=MIXER,name='Mic Capture Switch'
+  ; type=BOOLEAN,access=rw------,values=1
+  : values=on
+numid=9,iface=MIXER,name='PCM Playback Volume'
+  ; type=INTEGER,access=rw---R--,values=2,min=0,max=127,step=0
+  : values=100,98
+  | dBminmax-min=-50.00dB,max=0.00dB
+numid=10,iface=MIXER,name='PCM Playback Volume',index=1
+  ; type=INTEGER,access=rw---R--,values=1,min=-20,max=20,step=0
+  : values=-3
+"""
+
+# A dongle whose PCM elements are numid 5 and 6
+OTHER_DONGLE = """numid=4,iface=MIXER,name='Mic Playback Switch'
+  ; type=BOOLEAN,access=rw------,values=1
+  : values=off
+numid=5,iface=MIXER,name='PCM Playback Volume'
+  ; type=INTEGER,access=rw---R--,values=2,min=0,max=200,step=0
+  : values={master}
+numid=6,iface=MIXER,name='PCM Playback Volume',index=1
+  ; type=INTEGER,access=rw---R--,values=1,min=0,max=100,step=0
+  : values={secondary}
+"""
+
+
+def test_parse_contents():
+    controls, values = _parse_contents(CONTENTS)
+
+    assert controls == [
+        ControlInfo(3, "Mic Capture Switch", 0),
+        ControlInfo(9, "PCM Playback Volume", 0, 0, 127, 2),
+        ControlInfo(10, "PCM Playback Volume", 1, -20, 20, 1),
+    ]
+    assert values == {3: ["on"], 9: ["100", "98"], 10: ["-3"]}
+
+
+def test_parse_contents_ignores_leading_noise():
+    controls, values = _parse_contents("amixer: warning\n  : values=1\n")
+    assert controls == [] and values == {}
+
+
+def test_control_map():
+    controls, _ = _parse_contents(CONTENTS)
+    control_map = ControlMap(controls)
+
+    assert control_map.master.numid == 9
+    assert control_map.secondary.numid == 10
+    assert control_map.find("Mic Capture Switch").numid == 3
+    with pytest.raises(MixerError):
+        control_map.find("Headphone Playback Volume")
+
+
+def test_missing_pcm_controls():
+    with pytest.raises(MixerError):
+        ControlMap([ControlInfo(9, "PCM Playback Volume", 0, 0, 100, 2)]).secondary
+
+
+
+def test_control_map_of_another_dongle():
+    """PCM numids are looked up, not assumed to be 9 and 10"""
+    controls, _ = _parse_contents(OTHER_DONGLE.format(master="80,80", secondary="60"))
+    control_map = ControlMap(controls)
+
+    assert (control_map.master.numid, control_map.secondary.numid) == (5, 6)
+    assert (control_map.master.max, control_map.master.count) == (200, 2)
+
+
+# amixer serving OTHER_DONGLE from a file, logging its arguments
+STUB_AMIXER = """#!/bin/sh
+DIR="$(dirname "$0")"
+echo "$@" >> "$DIR/amixer.log"
+case "$3" in
+contents) cat "$DIR/contents";;
+-s) while read cmd arg; do
+        [ "$arg" = numid=5 ] && sed -n '4,6p' "$DIR/contents"
+        [ "$arg" = numid=6 ] && sed -n '7,9p' "$DIR/contents"
+    done;;
+cset) ;;
+*) exit 1;;
+esac
+"""
+
+
+@pytest.fixture
+def amixer(no_headset):
+    bin_dir = no_headset / "bin"
+    (bin_dir / "contents").write_text(OTHER_DONGLE.format(master="80,80", secondary="60"))
+    (bin_dir / "amixer").write_text(STUB_AMIXER)
+    return bin_dir / "amixer.log"
+
+
+def test_amixer_backend_uses_card_numids(amixer):
+    backend = AmixerBackend()
+
+    assert backend.get_volumes("2") == (80, 60)
+    backend.set_secondary("2", 80)
+    backend.set_master_percent("2", 25)
+
+    assert amixer.read_text().splitlines() == [
+        "-c 2 contents",  # Enumerated once
+        "-c 2 -s",
+        "-c 2 cset numid=6 80",
+        "-c 2 cset numid=5 50",
+    ]
+
+
+def test_amixer_backend_without_pcm_controls(amixer):
+    (amixer.parent / "contents").write_text(CONTENTS.split("numid=9")[0])
+
+    with pytest.raises(MixerError):
+        AmixerBackend().get_volumes("2")
+
+
+class OutOfMemoryLib:
+    """libasound whose control devices open but whose allocations fail"""
+
+    def snd_ctl_open(self, ctl, name, mode):
+        return 0
+
+    def snd_ctl_close(self, ctl):
+        return 0
+
+    def snd_ctl_elem_list_malloc(self, element_list):
+        return -errno.ENOMEM
+
+    def snd_strerror(self, ret):
+        return b"Cannot allocate memory"
+
+
+def test_native_allocation_failure(amixer, monkeypatch):
+    monkeypatch.setattr(redragon_alsa, "_load_libasound", OutOfMemoryLib)
+
+    # The auto backend uses amixer for the card
+    assert create_backend("auto").get_volumes("2") == (80, 60)
+    with pytest.raises(MixerError, match="Cannot allocate memory"):
+        NativeAlsaBackend().get_volumes("2")
+
+
+def test_percent_value():
+    control = ControlInfo(9, "PCM Playback Volume", 0, -20, 20, 1)
+    assert [percent_value(control, percent) for percent in (0, 50, 100)] == [-20, 0, 20]
@@ -0,0 +1,28 @@
+"""Benchmark scenarios run end to end on the fake headset"""
+
+from redragon_bench import OPERATIONS, bench_library, bench_process_command, percentile, summarize
+
+
+def test_percentile():
+    samples = [float(i) for i in range(1, 101)]
+    assert (percentile(samples, 0.5), percentile(samples, 0.99), percentile([3.0], 0.95)) == (50.0, 99.0, 3.0)
+
+
+def test_summarize():
+    result = summarize("library", "get", [0.001, 0.002, 0.003, 0.004], 0.5, sets_applied=2)
+    assert result["n"] == 4 and result["ops_per_s"] == 8.0 and result["sets_applied"] == 2
+    assert result["p50_ms"] == 2.0
+
+
+def test_library_scenario(bench_env, backend):
+    results = bench_library(backend, 5)
+
+    assert [result["op"] for result in results] == ["set", "get", "status"]
+    assert all(result["n"] == 5 for result in results)
+    assert backend.writes > 0
+
+
+def test_process_command_scenario(bench_env, backend):
+    results = bench_process_command(backend, 5)
+
+    assert [result["op"] for result in results] == list(OPERATIONS)
@@ -0,0 +1,54 @@
+"""Sound card discovery from procfs and sysfs"""
+
+import pytest
+
+import redragon_cards
+from redragon_cards import SoundCard, compile_patterns, find_headsets, list_cards
+
+PATTERN = compile_patterns([r'[Hh]\d{3}', r'XiiSound'])
+
+
+@pytest.fixture
+def proc(tmp_path, monkeypatch):
+    proc = tmp_path / "proc"
+    proc.mkdir()
+    (proc / "cards").write_text(
+        " 0 [PCH            ]: HDA-Intel - HDA Intel PCH\n"
+        "                      HDA Intel PCH at 0xf7f10000 irq 32\n"
+        " 1 [H878           ]: USB-Audio - XiiSound H878\n"
+        "                      XiiSound XiiSound H878 at usb-0000:00:14.0-2, full speed\n"
+        " 2 [Device         ]: USB-Audio - USB Audio Device\n"
+        "                      Generic USB Audio Device at usb-0000:00:14.0-3, full speed\n"
+    )
+    for number, usb_id in (("1", "1b3f:2008"), ("2", "040B:0897")):
+        (proc / f"card{number}").mkdir()
+        (proc / f"card{number}" / "usbid").write_text(usb_id + "\n")
+    monkeypatch.setattr(redragon_cards, "PROC_ASOUND", str(proc))
+    monkeypatch.setattr(redragon_cards, "SYSFS_SOUND", str(tmp_path / "no-sysfs"))
+    return proc
+
+
+def test_proc_cards(proc):
+    assert list_cards() == [
+        SoundCard("0", "PCH", "HDA Intel PCH"),
+        SoundCard("1", "H878", "XiiSound H878", "1b3f:2008"),
+        SoundCard("2", "Device", "USB Audio Device", "040b:0897"),
+    ]
+
+
+def test_headsets_by_name_and_usb_id(proc):
+    assert [card.number for card in find_headsets(PATTERN)] == ["1", "2"]
+    assert [card.number for card in find_headsets(PATTERN, match_usb_ids=False)] == ["1"]
+
+
+def test_sysfs_fallback(tmp_path, monkeypatch):
+    sysfs = tmp_path / "sysfs"
+    for entry, card_id in (("card0", "PCH"), ("card3", "H878"), ("controlC3", None)):
+        (sysfs / entry).mkdir(parents=True)
+        if card_id:
+            (sysfs / entry / "id").write_text(card_id + "\n")
+    monkeypatch.setattr(redragon_cards, "PROC_ASOUND", str(tmp_path / "no-proc"))
+    monkeypatch.setattr(redragon_cards, "SYSFS_SOUND", str(sysfs))
+
+    assert list_cards() == [SoundCard("0", "PCH", "PCH"), SoundCard("3", "H878", "H878")]
+    assert find_headsets(PATTERN) == [SoundCard("3", "H878", "H878")]
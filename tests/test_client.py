@@ -0,0 +1,115 @@
+"""Control client requests and the redragon-volume command line"""
+
+import asyncio
+import socket
+import threading
+
+import pytest
+
+from redragon_client import ControlClient, ControlError, DaemonNotRunning, main
+
+
+@pytest.fixture
+def fake_daemon(tmp_path, monkeypatch):
+    """Answers each one-shot connection from a dict of canned responses"""
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    responses = {}
+    requests = []
+    server = socket.socket(socket.AF_UNIX)
+    server.bind(str(tmp_path / "redragon-control.sock"))
+    server.listen()
+
+    def serve():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            with conn:
+                command = b"".join(iter(lambda: conn.recv(4096), b"")).decode()
+                requests.append(command)
+                conn.sendall(responses.get(command, "ERROR: unknown command").encode())
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    yield responses, requests
+    server.shutdown(socket.SHUT_RDWR)
+    server.close()
+    thread.join()
+
+
+def test_client_api(fake_daemon):
+    responses, requests = fake_daemon
+    responses.update({
+        "set 30 card=2": "OK: 30",
+        "list": "OK: 1=XiiSound H878, 2=Redragon H510",
+        "status": "OK: device=XiiSound H878 card=1 pcm0=50 pcm1=50 analog=False",
+    })
+    client = ControlClient()
+
+    assert client.set_volume(30, "card=2") == 30
+    assert client.headsets() == {"1": "XiiSound H878", "2": "Redragon H510"}
+    assert client.status() == {"device": "XiiSound H878", "card": "1", "pcm0": "50", "pcm1": "50", "analog": "False"}
+    with pytest.raises(ControlError, match="unknown command"):
+        client.get_volume()
+    assert requests == ["set 30 card=2", "list", "status", "get"]
+
+
+def test_client_without_daemon(tmp_path):
+    with pytest.raises(DaemonNotRunning):
+        ControlClient(str(tmp_path / "missing.sock")).request("ping")
+
+
+@pytest.mark.parametrize("argv, request_sent, output, status", [
+    (["50"], "set 50", "Volume: 50%\n", 0),
+    (["get", "card=2"], "get card=2", "Volume: 40%\n", 0),
+    (["list"], "list", "1=XiiSound H878\n2=Redragon H510\n", 0),
+    (["mute"], "mute", "", 1),
+])
+def test_main(fake_daemon, capsys, argv, request_sent, output, status):
+    responses, requests = fake_daemon
+    responses.update({"set 50": "OK: 50", "get card=2": "OK: 40", "list": "OK: 1=XiiSound H878, 2=Redragon H510"})
+
+    assert main(argv) == status
+    assert requests == [request_sent]
+    assert capsys.readouterr().out == output
+
+
+@pytest.mark.parametrize("argv", [[], ["101"], ["loud"]])
+def test_main_rejects_bad_arguments(fake_daemon, argv):
+    assert main(argv) == 1
+    assert fake_daemon[1] == []
+
+
+def test_watch_waits_for_a_change(headset_daemon, tmp_path):
+    async def scenario():
+        headset_daemon.loop = asyncio.get_running_loop()
+        path = str(tmp_path / "control.sock")
+        server = await asyncio.start_unix_server(headset_daemon.handle_client, path=path)
+        client = ControlClient(path)
+        # The first versioned query starts the state refreshes
+        await headset_daemon.execute("status since=0")
+        while headset_daemon.refresh_task is None or not headset_daemon.refresh_task.done():
+            await asyncio.sleep(0.01)
+
+        first = await asyncio.to_thread(client.watch)
+        version = first.rsplit("version=", 1)[1]
+        watching = asyncio.ensure_future(asyncio.to_thread(client.watch, int(version), timeout=2))
+        await asyncio.sleep(0.2)
+        assert not watching.done()
+        await asyncio.to_thread(client.request, "set 30")
+        changed = await asyncio.wait_for(watching, 2)
+        unchanged = await asyncio.to_thread(client.watch, int(changed.rsplit("version=", 1)[1]), timeout=0.1)
+        missing = await asyncio.to_thread(client.watch, 0, "card=9", timeout=0.1)
+
+        server.close()
+        await server.wait_closed()
+        return first, changed, unchanged, missing
+
+    first, changed, unchanged, missing = asyncio.run(scenario())
+
+    assert first.startswith("OK: device=XiiSound H878 card=1 pcm0=50")
+    assert "pcm0=30" in changed
+    assert unchanged.startswith("OK: unchanged version=")
+    assert missing == "ERROR: no headset matching 'card=9'"
+
@@ -0,0 +1,65 @@
+"""Config file validation and reloads"""
+
+import json
+
+import pytest
+
+from redragon_config import Config, ConfigError, default_config, load_config
+
+
+def write_config(tmp_path, data):
+    path = tmp_path / "config.json"
+    path.write_text(data if isinstance(data, str) else json.dumps(data))
+    return path
+
+
+def test_missing_file_means_defaults(tmp_path):
+    assert load_config(tmp_path / "missing.json") == default_config()
+
+
+def test_values_are_read_over_defaults(tmp_path):
+    values = load_config(write_config(tmp_path, {"poll_max": 2, "soft_mute_ms": 300, "socket_path": None}))
+
+    assert values["poll_max"] == 2.0 and isinstance(values["poll_max"], float)
+    assert values["soft_mute_ms"] == 300
+    assert values["socket_path"] is None
+    assert values["max_errors"] == default_config()["max_errors"]
+
+
+@pytest.mark.parametrize("data", [
+    "{not json",
+    "[1, 2]",
+    {"unknown": 1},
+    {"max_errors": 1.5},
+    {"max_errors": True},
+    {"soft_mute_ms": -1},
+    {"poll_min": 1.0, "poll_max": 0.5},
+    {"device_patterns": []},
+    {"device_patterns": ["H8[78"]},
+    {"socket_path": 3},
+])
+def test_invalid_files_are_rejected(tmp_path, data):
+    with pytest.raises(ConfigError):
+        load_config(write_config(tmp_path, data))
+
+
+def test_reload_reports_changes_and_keeps_overrides(tmp_path):
+    path = write_config(tmp_path, {"poll_min": 1.0, "unmute_volume": 30})
+    config = Config(path, overrides={"poll_max": 0.5, "soft_mute_ms": None})
+
+    changed = config.load()
+
+    assert changed == {"poll_min": 1.0, "unmute_volume": 30, "poll_max": 1.0}
+    assert config["poll_max"] == 1.0  # Raised to poll_min
+    assert config.load() == {}
+
+
+def test_failed_reload_keeps_settings(tmp_path):
+    path = write_config(tmp_path, {"unmute_volume": 30})
+    config = Config(path)
+    config.load()
+    path.write_text('{"unmute_volume": 500}')
+
+    with pytest.raises(ConfigError):
+        config.load()
+    assert config["unmute_volume"] == 30
@@ -0,0 +1,418 @@
+"""Control daemon socket protocol, set coalescing and subscriptions"""
+
+import asyncio
+import json
+import os
+import socket
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+
+class Echo:
+    """Stands in for the mixer: answers every command with its text"""
+
+    def __init__(self, daemon, monkeypatch):
+        self.commands = []  # Commands that reached process_command
+        self.batches = []
+        process_batch = daemon.process_batch
+
+        def process_command(command):
+            self.commands.append(command)
+            return f"OK: {command}"
+
+        def recording_batch(commands):
+            self.batches.append(list(commands))
+            return process_batch(commands)
+
+        def set_target(selector):
+            # Headsets on cards 1 (the default) and 2
+            return {None: "1", "card=1": "1", "card=2": "2"}.get(selector)
+
+        monkeypatch.setattr(daemon, "process_command", process_command)
+        monkeypatch.setattr(daemon, "process_batch", recording_batch)
+        monkeypatch.setattr(daemon, "set_target", set_target)
+
+
+@pytest.fixture
+def echo(daemon, monkeypatch):
+    return Echo(daemon, monkeypatch)
+
+
+def exchange(daemon, tmp_path, *messages, shutdown=True):
+    """Sends each message on one connection, returns everything received"""
+    async def scenario():
+        path = str(tmp_path / "control.sock")
+        server = await asyncio.start_unix_server(daemon.handle_client, path=path)
+        reader, writer = await asyncio.open_unix_connection(path)
+        for message in messages:
+            writer.write(message)
+            await writer.drain()
+            await asyncio.sleep(0.05)
+        if shutdown:
+            writer.write_eof()
+        received = await asyncio.wait_for(reader.read(), 2)
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return received
+
+    return asyncio.run(scenario())
+
+
+def test_one_shot(daemon, echo, tmp_path):
+    assert exchange(daemon, tmp_path, b"get", shutdown=False) == b"OK: get"
+
+
+def test_pipeline_answers_in_order(daemon, echo, tmp_path):
+    received = exchange(daemon, tmp_path, b"pipeline\nset 10\nget\n", b"set 2", b"0\n\nstatus\n")
+
+    assert received == b"OK: set 10\nOK: get\nOK: set 20\nOK: status\n"
+    # Lines available at once share one executor job
+    assert echo.batches == [["set 10", "get"], ["set 20", "status"]]
+
+
+def test_pipeline_line_too_long(daemon, echo, tmp_path):
+    assert exchange(daemon, tmp_path, b"pipeline\n", b"x" * 5000) == b"ERROR: command too long\n"
+
+
+def test_batch_applies_last_set_of_a_run(daemon, echo):
+    responses = daemon.process_batch(["set 10", "set 20", "set 30", "get", "set 40"])
+
+    assert responses == ["OK: 10", "OK: 20", "OK: set 30", "OK: get", "OK: set 40"]
+    assert echo.commands == ["set 30", "get", "set 40"]
+    assert (daemon.sets_received, daemon.sets_applied) == (4, 2)
+
+
+def test_queued_sets_coalesce(daemon, echo):
+    async def scenario():
+        # Mixer busy: the sets queue up behind this job
+        release = threading.Event()
+        daemon.executor.submit(release.wait)
+        sets = [asyncio.ensure_future(daemon.execute(f"set {volume}")) for volume in (10, 11, 12)]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*sets)
+
+    assert asyncio.run(scenario()) == ["OK: 10", "OK: 11", "OK: set 12"]
+    assert echo.commands == ["set 12"]
+    assert (daemon.sets_received, daemon.sets_applied) == (3, 1)
+
+
+def headset_state(volume):
+    return {"device": "XiiSound H878", "card": "1", "pcm0": volume, "pcm1": volume,
+            "analog": False, "muted": volume == 0, "volume": volume}
+
+
+class Headset:
+    """Stands in for the RedragonVolumeSync of card 1"""
+
+    card = SimpleNamespace(number="1", id="H878")
+
+    def matches(self, selector):
+        return selector in (None, "card=1")
+
+
+def test_subscribers_get_changes(daemon, echo, tmp_path, monkeypatch):
+    state = headset_state(30)
+    monkeypatch.setattr(daemon, "read_states", lambda: [(Headset(), dict(state))])
+
+    async def scenario():
+        path = str(tmp_path / "control.sock")
+        server = await asyncio.start_unix_server(daemon.handle_client, path=path)
+
+        async def one_shot(command):
+            reader, writer = await asyncio.open_unix_connection(path)
+            writer.write(command.encode())
+            response = await reader.read()
+            writer.close()
+            return response
+
+        other_reader, other_writer = await asyncio.open_unix_connection(path)
+        other_writer.write(b"subscribe card=2")
+        other_lines = [await other_reader.readline(), await other_reader.readline()]
+        reader, writer = await asyncio.open_unix_connection(path)
+        writer.write(b"subscribe")
+        lines = [await reader.readline(), await reader.readline()]
+        state.update(headset_state(40))
+        await one_shot("set 40")
+        lines.append(await asyncio.wait_for(reader.readline(), 2))
+        # Same state again: nothing to send
+        await one_shot("set 40")
+        await one_shot("mute")
+        state.update(headset_state(0))
+        await one_shot("mute")
+        lines.append(await asyncio.wait_for(reader.readline(), 2))
+        writer.close()
+        # Following a headset that is not there: nothing changed for it
+        other_writer.write_eof()
+        other_lines.append(await asyncio.wait_for(other_reader.read(), 2))
+        other_writer.close()
+        server.close()
+        await server.wait_closed()
+        return [line.decode() for line in lines], [line.decode() for line in other_lines]
+
+    lines, other_lines = asyncio.run(scenario())
+    assert other_lines == ["OK: subscribed\n", "EVENT: disconnected\n", ""]
+    assert lines == [
+        "OK: subscribed\n",
+        "EVENT: device=XiiSound H878 card=1 pcm0=30 pcm1=30 analog=False muted=False volume=30\n",
+        "EVENT: device=XiiSound H878 card=1 pcm0=40 pcm1=40 analog=False muted=False volume=40\n",
+        "EVENT: device=XiiSound H878 card=1 pcm0=0 pcm1=0 analog=False muted=True volume=0\n",
+    ]
+
+
+def test_subscriber_registered_before_snapshot(daemon, tmp_path, monkeypatch):
+    """A refresh racing the initial snapshot must still reach the subscriber"""
+    subscribers_seen = []
+
+    def read_states():
+        subscribers_seen.append(len(daemon.subscribers))
+        return [(Headset(), headset_state(30))]
+
+    monkeypatch.setattr(daemon, "read_states", read_states)
+
+    async def scenario():
+        path = str(tmp_path / "control.sock")
+        server = await asyncio.start_unix_server(daemon.handle_client, path=path)
+        reader, writer = await asyncio.open_unix_connection(path)
+        writer.write(b"subscribe")
+        lines = [await reader.readline(), await reader.readline()]
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return lines
+
+    assert asyncio.run(scenario())[0] == b"OK: subscribed\n"
+    assert subscribers_seen == [1]
+
+
+def test_queued_sets_coalesce_per_headset(daemon, echo):
+    async def scenario():
+        release = threading.Event()
+        daemon.executor.submit(release.wait)
+        commands = ("set 10 card=1", "set 20 card=2", "set 11 card=1", "set 21 card=2")
+        sets = [asyncio.ensure_future(daemon.execute(command)) for command in commands]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*sets)
+
+    assert asyncio.run(scenario()) == ["OK: 10", "OK: 20", "OK: set 11 card=1", "OK: set 21 card=2"]
+    assert echo.commands == ["set 11 card=1", "set 21 card=2"]
+
+
+@pytest.mark.parametrize("command, response", [
+    ("ping", "OK: pong"),
+    ("get", "OK: 50"),
+    ("list", "OK: 1=XiiSound H878"),
+    ("get card=1", "OK: 50"),
+    ("get card=9", "ERROR: no headset matching 'card=9'"),
+    ("", "ERROR: empty command"),
+    ("bogus", "ERROR: unknown command 'bogus'"),
+    ("mute since=3", "ERROR: mute takes no since= or format= option"),
+])
+def test_commands(headset_daemon, command, response):
+    assert headset_daemon.process_command(command) == response
+
+
+def test_set_then_status(headset_daemon, backend):
+    assert headset_daemon.process_command("set 30") == "OK: 30"
+
+    assert headset_daemon.process_command("get") == "OK: 30"
+    assert headset_daemon.process_command("status") == "OK: device=XiiSound H878 card=1 pcm0=30 pcm1=30 analog=False"
+    assert backend.get_volumes("1") == (30, 30)
+
+
+def test_mute_toggle(headset_daemon, backend):
+    headset_daemon.process_command("set 40")
+
+    assert headset_daemon.process_command("mute") == "OK: muted"
+    assert backend.get_volumes("1") == (0, 0)
+    assert headset_daemon.process_command("mute") == "OK: unmuted 40"
+    assert backend.get_volumes("1") == (40, 40)
+
+
+def test_combined_mode_syncs_pcm1(headset_daemon, backend):
+    headset_daemon.with_sync = True
+    backend.set_master_percent("1", 70)
+
+    async def scenario():
+        headset_daemon.loop = asyncio.get_running_loop()
+        headset_daemon.stop_event = asyncio.Event()
+        headset_daemon.cards_changed = asyncio.Event()
+        await headset_daemon.update_workers(headset_daemon.registry.headsets)
+        backend.set_master_percent("1", 20)
+        headset_daemon.registry.headsets["1"].last_set_time = 0  # Past the debounce window
+        await headset_daemon._sync("1")
+
+    asyncio.run(scenario())
+
+    assert backend.get_volumes("1") == (20, 20)
+    assert " syncs=2 " in headset_daemon.process_command("stats")
+
+
+def test_fade_reaches_target(headset_daemon, backend):
+    async def scenario():
+        response = await headset_daemon.execute("fade 80 100")
+        await headset_daemon.fades["1"]
+        return response
+
+    assert asyncio.run(scenario()) == "OK: 80"
+    assert backend.get_volumes("1") == (80, 80)
+    assert headset_daemon.fades == {}
+
+
+def test_set_cancels_fade(headset_daemon, backend):
+    async def scenario():
+        await headset_daemon.execute("fade 100 5000")
+        fade = headset_daemon.fades["1"]
+        await asyncio.sleep(0.1)
+        response = await headset_daemon.execute("set 20")
+        await asyncio.sleep(0.1)
+        return response, fade.cancelled()
+
+    assert asyncio.run(scenario()) == ("OK: 20", True)
+    assert backend.get_volumes("1") == (20, 20)
+
+
+def test_soft_mute_fades_out_and_back(headset_daemon, backend):
+    async def scenario():
+        muted = await headset_daemon.execute("mute 50")
+        await headset_daemon.fades["1"]
+        volume = backend.get_volumes("1")
+        unmuted = await headset_daemon.execute("mute 50")
+        await headset_daemon.fades["1"]
+        return muted, volume, unmuted
+
+    assert asyncio.run(scenario()) == ("OK: muted", (0, 0), "OK: unmuted 50")
+    assert backend.get_volumes("1") == (50, 50)
+
+
+@pytest.mark.parametrize("command, response", [
+    ("fade 80", "ERROR: usage: fade <0-100> <0-60000 ms>"),
+    ("fade 101 100", "ERROR: usage: fade <0-100> <0-60000 ms>"),
+    ("mute soon", "ERROR: usage: mute [<0-60000 ms>]"),
+])
+def test_ramp_usage(headset_daemon, command, response):
+    assert asyncio.run(headset_daemon.execute(command)) == response
+
+
+@pytest.fixture
+def listen_fd(tmp_path, monkeypatch):
+    """A listening Unix socket on descriptor 3, as passed by systemd"""
+    from redragon_control_daemon import SD_LISTEN_FDS_START
+
+    saved = os.dup(SD_LISTEN_FDS_START)
+    listener = socket.socket(socket.AF_UNIX)
+    listener.bind(str(tmp_path / "activated.sock"))
+    listener.listen()
+    os.dup2(listener.fileno(), SD_LISTEN_FDS_START)
+    listener.close()
+    monkeypatch.setenv("LISTEN_FDS", "1")
+    monkeypatch.setenv("LISTEN_FDNAMES", "redragon-control-daemon.socket")
+    yield
+    os.dup2(saved, SD_LISTEN_FDS_START)
+    os.close(saved)
+
+
+def test_inherited_socket(listen_fd, monkeypatch):
+    from redragon_control_daemon import inherited_socket
+
+    monkeypatch.setenv("LISTEN_PID", str(os.getpid()))
+    sock = inherited_socket()
+
+    assert sock.family == socket.AF_UNIX and sock.getsockname().endswith("activated.sock")
+    assert "LISTEN_FDS" not in os.environ and "LISTEN_FDNAMES" not in os.environ
+    sock.detach()
+
+
+def test_inherited_socket_of_another_process(listen_fd, monkeypatch):
+    from redragon_control_daemon import inherited_socket
+
+    monkeypatch.setenv("LISTEN_PID", str(os.getpid() + 1))
+
+    assert inherited_socket() is None
+    assert "LISTEN_PID" not in os.environ
+
+
+def test_json_format(headset_daemon):
+    assert json.loads(headset_daemon.process_command("get format=json")) == {"ok": True, "volume": 50, "version": 0}
+    assert json.loads(headset_daemon.process_command("get card=9 format=json")) == {
+        "ok": False, "error": "no headset matching 'card=9'"
+    }
+
+
+def test_versioned_status(headset_daemon):
+    assert headset_daemon.process_command("status since=0") == (
+        "OK: device=XiiSound H878 card=1 pcm0=50 pcm1=50 analog=False version=0"
+    )
+    assert json.loads(headset_daemon.process_command("status since=0 format=json")) == {
+        "ok": True, "device": "XiiSound H878", "card": "1", "pcm0": 50, "pcm1": 50, "analog": False, "version": 0
+    }
+
+
+def test_since_current_version_is_unchanged(headset_daemon):
+    async def settle():
+        while headset_daemon.refresh_task is None or not headset_daemon.refresh_task.done():
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        headset_daemon.loop = asyncio.get_running_loop()
+        # The first versioned query starts the refreshes
+        first = await headset_daemon.execute("status since=0")
+        await settle()
+        version = headset_daemon.state_version
+        unchanged = await headset_daemon.execute(f"status since={version}")
+        unchanged_json = await headset_daemon.execute(f"get since={version} format=json")
+
+        await headset_daemon.execute("set 40")
+        changed = await headset_daemon.execute(f"status since={version}")
+        await settle()
+        return first, version, unchanged, unchanged_json, changed
+
+    first, version, unchanged, unchanged_json, changed = asyncio.run(scenario())
+
+    assert first.startswith("OK: device=")
+    assert version > 0
+    assert unchanged == f"OK: unchanged version={version}"
+    assert json.loads(unchanged_json) == {"ok": True, "unchanged": True, "version": version}
+    assert "pcm0=40" in changed
+    assert int(changed.rsplit("version=", 1)[1]) > version
+
+
+def test_mutations_bump_version(headset_daemon):
+    assert headset_daemon.process_command("status since=0").endswith(" version=0")
+
+    headset_daemon.process_command("set 30")
+
+    assert headset_daemon.state_version == 1
+    assert headset_daemon.process_command("status since=0").endswith("pcm0=30 pcm1=30 analog=False version=1")
+    headset_daemon.process_command("get card=9")
+    assert headset_daemon.state_version == 1
+
+
+def test_concurrent_sets_coalesce_by_headset(headset_daemon, backend):
+    async def scenario():
+        release = threading.Event()
+        headset_daemon.executor.submit(release.wait)
+        sets = [asyncio.ensure_future(headset_daemon.execute(command)) for command in ("set 10", "set 11 card=1", "set 12")]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*sets)
+
+    assert asyncio.run(scenario()) == ["OK: 10", "OK: 11", "OK: 12"]
+    assert (headset_daemon.sets_received, headset_daemon.sets_applied) == (3, 1)
+    assert backend.get_volumes("1") == (12, 12)
+
+
+def test_set_without_headset_is_not_coalesced(headset_daemon):
+    async def scenario():
+        release = threading.Event()
+        headset_daemon.executor.submit(release.wait)
+        sets = [asyncio.ensure_future(headset_daemon.execute(command)) for command in ("set 10 card=9", "set 20 card=9")]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*sets)
+
+    assert asyncio.run(scenario()) == ["ERROR: no headset matching 'card=9'"] * 2
@@ -0,0 +1,44 @@
+"""Sync daemon polling schedule"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from redragon_daemon import AdaptivePoller, RedragonDaemonSimple
+
+
+def test_poller_backs_off_while_stable():
+    poller = AdaptivePoller(min_interval=0.1, max_interval=1.0, backoff=2.0)
+
+    intervals = [poller.record(changed=False, now=0.0) for _ in range(5)]
+
+    assert intervals == pytest.approx([0.2, 0.4, 0.8, 1.0, 1.0])
+    assert poller.due_at == pytest.approx(1.0)
+
+
+def test_poller_resets_on_change():
+    poller = AdaptivePoller(min_interval=0.1, max_interval=1.0, backoff=2.0)
+    poller.record(changed=False)
+    poller.record(changed=False)
+
+    assert poller.record(changed=True, now=10.0) == 0.1
+    assert poller.due_at == pytest.approx(10.1)
+
+
+def test_poller_max_not_below_min():
+    assert AdaptivePoller(min_interval=2.0, max_interval=1.0).max_interval == 2.0
+
+
+def test_status_shows_poll_interval():
+    poller = AdaptivePoller(min_interval=0.1, max_interval=1.0, backoff=2.0)
+    poller.record(changed=False)
+    poller.record(changed=False)
+    daemon = SimpleNamespace(workers={
+        "1": SimpleNamespace(label="XiiSound H878 (card 1)", monitor=object(), poller=AdaptivePoller()),
+        "2": SimpleNamespace(label="Redragon H510 (card 2)", monitor=None, poller=poller),
+    })
+
+    assert RedragonDaemonSimple.status_text(daemon) == (
+        "XiiSound H878 (card 1): synced on control events; "
+        "Redragon H510 (card 2): synced by adaptive polling (every 0.4s)"
+    )
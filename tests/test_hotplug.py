@@ -0,0 +1,68 @@
+"""Parsing of kernel and udev netlink uevents"""
+
+import struct
+
+import pytest
+
+import redragon_hotplug
+from redragon_hotplug import UDEV_MONITOR_MAGIC, HotplugWatcher
+
+
+@pytest.fixture
+def watcher():
+    watcher = HotplugWatcher()
+    yield watcher
+    watcher.close()
+
+
+def kernel_event(action, devpath, subsystem="sound"):
+    fields = [f"{action}@{devpath}", f"ACTION={action}", f"DEVPATH={devpath}", f"SUBSYSTEM={subsystem}", "SEQNUM=42"]
+    return "\0".join(fields).encode() + b"\0"
+
+
+def udev_event(properties, magic=UDEV_MONITOR_MAGIC):
+    """udev monitor message: 40-byte header, then the properties"""
+    body = "\0".join(f"{key}={value}" for key, value in properties.items()).encode() + b"\0"
+    header = b"libudev\0" + struct.pack("!I", magic) + struct.pack("=III", 40, 40, len(body))
+    return header.ljust(40, b"\0") + body
+
+
+def test_kernel_card_events(watcher):
+    devpath = "/devices/pci0000:00/0000:00:14.0/usb1/1-2/1-2:1.0/sound/card3"
+    assert watcher._parse(kernel_event("add", devpath)) == ("add", "3")
+    assert watcher._parse(kernel_event("remove", devpath)) == ("remove", "3")
+
+
+@pytest.mark.parametrize("data", [
+    kernel_event("add", "/devices/usb1/1-2/sound/card3/controlC3"),  # Device node, not the card
+    kernel_event("change", "/devices/usb1/1-2/sound/card3"),
+    kernel_event("add", "/devices/usb1/1-2/input/input7", subsystem="input"),
+    b"",
+])
+def test_kernel_events_ignored(watcher, data):
+    assert watcher._parse(data) is None
+
+
+def test_udev_card_event(watcher):
+    data = udev_event({"ACTION": "add", "DEVPATH": "/devices/usb1/1-2/sound/card1", "SUBSYSTEM": "sound"})
+    assert watcher._parse(data) == ("add", "1")
+
+
+def test_udev_bad_header(watcher):
+    properties = {"ACTION": "add", "DEVPATH": "/devices/usb1/1-2/sound/card1", "SUBSYSTEM": "sound"}
+    assert watcher._parse(udev_event(properties, magic=0xdeadbeef)) is None
+    assert watcher._parse(b"libudev\0short") is None
+
+
+def test_sysfs_fallback(tmp_path, monkeypatch):
+    monkeypatch.setattr(redragon_hotplug, "SYSFS_SOUND", str(tmp_path))
+    (tmp_path / "card0").mkdir()
+    (tmp_path / "timer").mkdir()
+    watcher = HotplugWatcher()
+    watcher.close()  # No netlink: compare the sysfs listing
+
+    (tmp_path / "card2").mkdir()
+    (tmp_path / "card0").rmdir()
+
+    assert watcher.read_events() == [("add", "2"), ("remove", "0")]
+    assert watcher.read_events() == []
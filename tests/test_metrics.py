@@ -0,0 +1,62 @@
+"""Metrics registry and its Prometheus text rendering"""
+
+import socket
+
+from redragon_metrics import Metrics, MetricsServer
+
+
+def test_counters_and_gauges():
+    metrics = Metrics()
+    metrics.count("redragon_requests_total", command="get")
+    metrics.count("redragon_requests_total", 2, command="get")
+    metrics.count("redragon_requests_total", command="set")
+    metrics.gauge("redragon_headsets", 2)
+
+    text = metrics.render()
+
+    assert "# HELP redragon_requests_total Control socket commands received\n" in text
+    assert "# TYPE redragon_requests_total counter\n" in text
+    assert 'redragon_requests_total{command="get"} 3\n' in text
+    assert 'redragon_requests_total{command="set"} 1\n' in text
+    assert "# TYPE redragon_headsets gauge\nredragon_headsets 2\n" in text
+    assert "redragon_uptime_seconds " in text
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics = Metrics()
+    for seconds in (0.0004, 0.003, 0.003, 3.0):
+        metrics.observe("redragon_request_seconds", seconds, command="get")
+
+    lines = metrics.render().splitlines()
+
+    assert 'redragon_request_seconds_bucket{command="get",le="0.0005"} 1' in lines
+    assert 'redragon_request_seconds_bucket{command="get",le="0.005"} 3' in lines
+    assert 'redragon_request_seconds_bucket{command="get",le="2.5"} 3' in lines
+    assert 'redragon_request_seconds_bucket{command="get",le="+Inf"} 4' in lines
+    assert 'redragon_request_seconds_count{command="get"} 4' in lines
+    assert 'redragon_request_seconds_sum{command="get"} 3.006400' in lines
+
+
+def test_timed_and_label_escaping():
+    metrics = Metrics()
+    with metrics.timed("redragon_operation_seconds", op='say "hi"\n'):
+        pass
+
+    assert 'redragon_operation_seconds_count{op="say \\"hi\\"\\n"} 1' in metrics.render()
+
+
+def test_metrics_server(tmp_path):
+    metrics = Metrics()
+    metrics.count("redragon_syncs_total")
+    server = MetricsServer(str(tmp_path / "metrics.sock"), metrics)
+    try:
+        client = socket.socket(socket.AF_UNIX)
+        client.connect(server.path)
+        server.accept()
+        text = b"".join(iter(lambda: client.recv(4096), b"")).decode()
+        client.close()
+    finally:
+        server.close()
+
+    assert "redragon_syncs_total 1\n" in text
+    assert not (tmp_path / "metrics.sock").exists()
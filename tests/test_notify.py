@@ -0,0 +1,73 @@
+"""sd_notify messages to the service manager"""
+
+import os
+import socket
+
+import pytest
+
+from redragon_notify import SystemdNotifier
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """Datagram socket standing in for systemd's NOTIFY_SOCKET"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.bind(str(tmp_path / "notify"))
+    sock.settimeout(1)
+    monkeypatch.setenv("NOTIFY_SOCKET", str(tmp_path / "notify"))
+    yield lambda: sock.recv(4096).decode()
+    sock.close()
+
+
+def test_ready_status_and_stopping(manager):
+    notifier = SystemdNotifier()
+    assert "NOTIFY_SOCKET" not in os.environ
+
+    notifier.ready("1 headset")
+    notifier.status("1 headset")  # Unchanged: not sent
+    notifier.status("no headset")
+    notifier.stopping()
+    notifier.close()
+
+    assert [manager(), manager(), manager()] == ["READY=1\nSTATUS=1 headset", "STATUS=no headset", "STOPPING=1"]
+
+
+def test_reloading_brackets_the_reload(manager):
+    notifier = SystemdNotifier()
+    with notifier.reloading():
+        pass  # Not ready yet: nothing sent
+    notifier.ready()
+
+    with notifier.reloading():
+        pass
+
+    assert manager() == "READY=1"
+    assert manager().startswith("RELOADING=1\nMONOTONIC_USEC=")
+    assert manager() == "READY=1"
+    notifier.close()
+
+
+def test_watchdog(manager, monkeypatch):
+    monkeypatch.setenv("WATCHDOG_USEC", "2000000")
+    monkeypatch.setenv("WATCHDOG_PID", str(os.getpid()))
+    notifier = SystemdNotifier()
+    assert notifier.watchdog_interval == 1.0
+
+    notifier.watchdog()
+    notifier.watchdog()  # Rate limited
+
+    assert manager() == "WATCHDOG=1"
+    with pytest.raises(socket.timeout):
+        manager()
+    notifier.close()
+
+
+def test_without_systemd(monkeypatch):
+    monkeypatch.delenv("NOTIFY_SOCKET", raising=False)
+    monkeypatch.setenv("WATCHDOG_USEC", "2000000")
+    monkeypatch.setenv("WATCHDOG_PID", str(os.getpid() + 1))
+    notifier = SystemdNotifier()
+
+    assert not notifier.enabled
+    assert notifier.watchdog_interval is None
+    assert not notifier.notify("READY=1")
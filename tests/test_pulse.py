@@ -0,0 +1,153 @@
+"""Profile and sink caches read from pactl"""
+
+import pytest
+
+from redragon_pulse import ProfileCache, SinkIndex, _SubscribedCache
+
+CARDS = """Card #42
+\tName: alsa_card.pci-0000_00_1f.3
+\tProperties:
+\t\talsa.card = "0"
+\tActive Profile: output:analog-stereo
+Card #43
+\tName: alsa_card.usb-XiiSound_H878
+\tProperties:
+\t\talsa.card = "1"
+\tActive Profile: output:iec958-stereo
+Card #44
+\tName: alsa_card.usb-Redragon_H510
+\tProperties:
+\t\talsa.card = "3"
+\tActive Profile: output:analog-stereo
+Card #45
+\tName: alsa_card.usb-Acme_Gamer_X1
+\tProperties:
+\t\talsa.card = "4"
+\tActive Profile: output:analog-stereo+input:mono-fallback
+"""
+
+SINKS = """Sink #50
+\tName: alsa_output.pci-0000_00_1f.3.analog-stereo
+\tProperties:
+\t\talsa.card = "0"
+Sink #51
+\tName: alsa_output.usb-XiiSound_H878-00.iec958-stereo
+\tProperties:
+\t\talsa.card = "1"
+Sink #52
+\tName: bluez_output.Redragon_H848.1
+\tProperties:
+\t\tdevice.bus = "bluetooth"
+Sink #53
+\tName: alsa_output.usb-Acme_Gamer_X1-00.analog-stereo
+\tProperties:
+\t\talsa.card = "4"
+"""
+
+# pactl serving CARDS and SINKS from files, logging its arguments
+STUB_PACTL = """#!/bin/sh
+DIR="$(dirname "$0")"
+echo "$@" >> "$DIR/pactl.log"
+case "$1 $2" in
+"list cards") cat "$DIR/cards";;
+"list sinks") cat "$DIR/sinks";;
+esac
+exit 0
+"""
+
+
+@pytest.fixture
+def pactl(no_headset):
+    bin_dir = no_headset / "bin"
+    (bin_dir / "cards").write_text(CARDS)
+    (bin_dir / "sinks").write_text(SINKS)
+    (bin_dir / "pactl").write_text(STUB_PACTL)
+    return bin_dir / "pactl.log"
+
+
+def test_profiles_by_card(pactl):
+    profiles = ProfileCache()
+
+    assert not profiles.is_analog("1")
+    assert profiles.is_analog("3")
+    assert not profiles.is_analog()  # First headset card
+    assert not profiles.is_analog("0")  # Not a headset: first headset card too
+    assert profiles.queries == 1
+
+
+def test_profiles_requeried_after_invalidation(pactl):
+    profiles = ProfileCache()
+    profiles.is_analog("1")
+
+    (pactl.parent / "cards").write_text(CARDS.replace("iec958-stereo", "analog-stereo"))
+    assert not profiles.is_analog("1")
+    profiles.invalidate()
+    assert profiles.is_analog("1")
+    assert profiles.queries == 2
+
+
+def test_sinks_by_card(pactl):
+    sinks = SinkIndex()
+
+    assert sinks.sinks() == ["alsa_output.usb-XiiSound_H878-00.iec958-stereo", "bluez_output.Redragon_H848.1"]
+    assert sinks.sink("1") == "alsa_output.usb-XiiSound_H878-00.iec958-stereo"
+    # No sink of that card: sinks without a card are taken
+    assert sinks.sink("3") == "bluez_output.Redragon_H848.1"
+    assert sinks.queries == 1
+
+
+def test_sink_events(pactl):
+    sinks = SinkIndex()
+    sinks.sink("1")
+
+    sinks._on_event("change", 51)  # Volume change
+    sinks.sink("1")
+    assert sinks.queries == 1
+
+    sinks._on_event("remove", 51)
+    sinks.sink("1")
+    assert sinks.queries == 2
+
+
+def test_set_default(pactl):
+    assert SinkIndex().set_default("1") == "alsa_output.usb-XiiSound_H878-00.iec958-stereo"
+    assert pactl.read_text().splitlines()[-1] == "set-default-sink alsa_output.usb-XiiSound_H878-00.iec958-stereo"
+
+
+def test_custom_patterns(pactl):
+    profiles = ProfileCache(patterns=["Gamer_X1", "Acme"])
+    sinks = SinkIndex(patterns=["Acme"])
+
+    assert profiles.is_analog("4")
+    assert not ProfileCache().is_analog("4")  # Built-in patterns: taken for the digital H878
+    assert sinks.sinks() == ["alsa_output.usb-Acme_Gamer_X1-00.analog-stereo"]
+
+
+def test_set_patterns_requeries(pactl):
+    sinks = SinkIndex()
+    assert sinks.sink("4") == "bluez_output.Redragon_H848.1"
+
+    sinks.set_patterns(["Acme"])
+    assert sinks.sink("4") == "alsa_output.usb-Acme_Gamer_X1-00.analog-stereo"
+    sinks.set_patterns(["Acme"])  # Unchanged: still cached
+    sinks.set_patterns(None)
+    assert sinks.sink("4") == "bluez_output.Redragon_H848.1"
+    assert sinks.queries == 3
+
+
+def test_registry_configures_the_caches(pactl):
+    from redragon_volume_sync import HeadsetRegistry
+
+    registry = HeadsetRegistry(backend="amixer")
+    registry.configure(device_patterns=["Acme"])
+    assert registry.profile_cache.is_analog("4")
+    assert registry.sink_index.set_default("4") == "alsa_output.usb-Acme_Gamer_X1-00.analog-stereo"
+
+    registry.configure(device_patterns=None)
+    assert registry.sink_index.sink("4") == "bluez_output.Redragon_H848.1"
+    registry.close()
+
+
+def test_cache_needs_a_query():
+    with pytest.raises(TypeError):
+        _SubscribedCache()
@@ -0,0 +1,82 @@
+"""Shared memory state page: layout round trip and seqlock protocol"""
+
+import os
+
+import pytest
+
+from redragon_state import SEQUENCE, SEQUENCE_OFFSET, StatePage, StateReader
+
+HEADSET = {"device": "XiiSound H878", "card": "1", "pcm0": 40, "pcm1": 40,
+           "analog": False, "muted": False, "volume": 40}
+
+
+@pytest.fixture
+def page(tmp_path):
+    page = StatePage(str(tmp_path / "redragon-state"))
+    yield page
+    page.close()
+
+
+def test_snapshot_round_trip(page):
+    page.publish([("1", "H878", "XiiSound H878", HEADSET), ("2", "Other", "Redragon H510", None)])
+
+    sequence, headsets = StateReader(page.path).snapshot()
+
+    assert sequence == 2
+    assert headsets[0] == {**HEADSET, "id": "H878"}
+    assert headsets[1]["card"] == "2"
+    assert headsets[1]["volume"] is None and headsets[1]["pcm0"] is None
+
+
+def test_raw_values_above_int16(page):
+    state = {**HEADSET, "pcm0": 65536, "pcm1": 40000, "volume": 40000}
+    page.publish([("1", "H878", "XiiSound H878", state)])
+
+    _, headsets = StateReader(page.path).snapshot()
+
+    assert (headsets[0]["pcm0"], headsets[0]["pcm1"], headsets[0]["volume"]) == (65536, 40000, 40000)
+
+
+def test_sequence_only_moves_on_changes(page):
+    headsets = [("1", "H878", "XiiSound H878", HEADSET)]
+    assert page.publish(headsets)
+    reader = StateReader(page.path)
+    before = reader.sequence
+
+    assert not page.publish(headsets)
+    assert reader.sequence == before
+
+    assert page.publish([("1", "H878", "XiiSound H878", {**HEADSET, "volume": 41})])
+    assert reader.sequence == before + 2
+
+
+def test_snapshot_retries_while_writing(page):
+    page.publish([("1", "H878", "XiiSound H878", HEADSET)])
+    reader = StateReader(page.path)
+    # Odd sequence: the writer is in the middle of an update
+    SEQUENCE.pack_into(page._map, SEQUENCE_OFFSET, page.sequence + 1)
+
+    with pytest.raises(RuntimeError):
+        reader.snapshot(retries=20)
+
+    SEQUENCE.pack_into(page._map, SEQUENCE_OFFSET, page.sequence)
+    assert reader.snapshot()[0] == page.sequence
+
+
+def test_close_marks_page_closed(tmp_path):
+    page = StatePage(str(tmp_path / "redragon-state"))
+    reader = StateReader(page.path)
+    assert not reader.closed
+
+    page.close()
+
+    assert reader.closed
+    assert not os.path.exists(page.path)
+
+
+def test_reader_rejects_other_files(tmp_path):
+    path = tmp_path / "not-a-page"
+    path.write_bytes(b"\0" * 4096)
+
+    with pytest.raises(ValueError):
+        StateReader(str(path))
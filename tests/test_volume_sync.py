@@ -0,0 +1,168 @@
+"""Write-behind volume persistence and the headset registry"""
+
+import json
+import time
+
+import pytest
+
+import redragon_cards
+from redragon_alsa import MixerError
+from redragon_volume_sync import HeadsetRegistry, VolumeStatePersister
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def persister(tmp_path):
+    persister = VolumeStatePersister(tmp_path / "volume_state.json", delay=0.05)
+    yield persister
+    persister.close()
+
+
+def test_persister_writes_latest_state_once(persister):
+    for volume in range(10):
+        persister.update({"volume": volume})
+    assert persister.pending == {"volume": 9}
+    assert not persister.state_file.exists()
+
+    assert wait_for(lambda: persister.writes == 1)
+    assert persister.pending is None
+    assert json.loads(persister.state_file.read_text()) == {"volume": 9}
+    time.sleep(0.1)
+    assert persister.writes == 1
+
+
+def test_persister_flush_writes_now(tmp_path):
+    persister = VolumeStatePersister(tmp_path / "volume_state.json", delay=60)
+    persister.update({"volume": 30})
+
+    persister.flush()
+
+    assert json.loads(persister.state_file.read_text()) == {"volume": 30}
+    # Written through a temporary file renamed over the state file
+    assert [path.name for path in tmp_path.iterdir()] == ["volume_state.json"]
+
+
+def test_persister_close_flushes_and_stops_thread(tmp_path):
+    persister = VolumeStatePersister(tmp_path / "volume_state.json", delay=60)
+    persister.update({"volume": 30})
+    thread = persister._thread
+    assert thread.is_alive()
+
+    persister.close()
+
+    assert not thread.is_alive()
+    assert json.loads(persister.state_file.read_text()) == {"volume": 30}
+
+    # Late update of a dropped headset: written right away
+    persister.update({"volume": 31})
+    assert json.loads(persister.state_file.read_text()) == {"volume": 31}
+
+
+class StubBackend:
+    """Mixer backend without any readable control"""
+
+    def controls(self, card_id):
+        raise MixerError("no controls")
+
+    def reset(self):
+        pass
+
+
+@pytest.fixture
+def two_headsets(no_headset, monkeypatch):
+    proc = no_headset / "proc"
+    proc.mkdir()
+    (proc / "cards").write_text(
+        " 0 [PCH            ]: HDA-Intel - HDA Intel PCH\n"
+        " 1 [H878           ]: USB-Audio - XiiSound H878\n"
+        " 3 [H510           ]: USB-Audio - Redragon H510\n"
+    )
+    monkeypatch.setattr(redragon_cards, "PROC_ASOUND", str(proc))
+    return proc / "cards"
+
+
+def test_registry_follows_connected_headsets(two_headsets):
+    registry = HeadsetRegistry(backend=StubBackend())
+    try:
+        added, removed = registry.refresh()
+        assert [sync.card_id for sync in added] == ["1", "3"] and removed == []
+        assert registry.select().card_id == "1"
+        assert registry.select("card=3").card_id == "3"
+        assert registry.select("card=H510").card_id == "3"
+        assert registry.select("device=h878").card_id == "1"
+        assert registry.select("card=0") is None
+
+        two_headsets.write_text(" 3 [H510           ]: USB-Audio - Redragon H510\n")
+        added, removed = registry.refresh()
+        assert added == [] and [sync.card.number for sync in removed] == ["1"]
+        assert removed[0].card_id is None
+        assert registry.primary.card_id == "3"
+    finally:
+        registry.close()
+
+
+def test_write_cache_skips_known_values(registry, backend):
+    sync = registry.primary
+    sync.enable_write_cache(True)
+    assert sync.get_volumes() == (50, 50)
+    writes = backend.writes
+
+    assert sync.set_volume(50, silent=True)
+    assert backend.writes == writes
+    assert sync.writes_suppressed == 2
+
+    # A control change event: the hardware may hold anything now
+    sync.invalidate_volumes()
+    assert sync.set_volume(50, silent=True)
+    assert backend.writes == writes + 2
+
+
+def test_write_cache_off_writes_everything(registry, backend):
+    sync = registry.primary
+    sync.get_volumes()
+    writes = backend.writes
+
+    assert sync.set_volume(50, silent=True)
+
+    assert backend.writes == writes + 2
+    assert sync.writes_suppressed == 0
+
+
+def test_stale_read_is_not_remembered(registry):
+    sync = registry.primary
+    generation = sync._volumes_generation
+    sync.invalidate_volumes()
+
+    sync._remember_volumes(generation, 10, 10)
+
+    assert sync.known_volumes is None
+
+
+def test_set_volume_confirms_unchanged_volume(registry, capsys):
+    sync = registry.primary
+    assert sync.set_volume(40)
+    capsys.readouterr()
+
+    assert sync.set_volume(40)
+
+    assert "✓ Volume synchronized to 40%" in capsys.readouterr().out
+
+
+def test_sync_from_master_keeps_known_master(registry, backend):
+    sync = registry.primary
+    sync.enable_write_cache(True)
+    backend.set_master_percent(sync.card_id, 70)
+    assert sync.get_volumes() == (70, 50)
+
+    assert sync.sync_from_master()
+
+    assert sync.known_volumes == (70, 70)
+    assert backend.get_volumes(sync.card_id) == (70, 70)
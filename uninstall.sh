@@ -136,6 +136,11 @@ main() {
         print_success "Volume sync service stopped"
     fi
     
+    if systemctl --user is-active redragon-control-daemon.socket &> /dev/null; then
+        systemctl --user stop redragon-control-daemon.socket
+        print_success "Control daemon socket stopped"
+    fi
+    
     if systemctl --user is-active redragon-control-daemon.service &> /dev/null; then
         systemctl --user stop redragon-control-daemon.service
         print_success "Control daemon stopped"
@@ -146,6 +151,11 @@ main() {
         print_success "Volume sync service disabled"
     fi
     
+    if systemctl --user is-enabled redragon-control-daemon.socket &> /dev/null; then
+        systemctl --user disable redragon-control-daemon.socket
+        print_success "Control daemon socket disabled"
+    fi
+    
     if systemctl --user is-enabled redragon-control-daemon.service &> /dev/null; then
         systemctl --user disable redragon-control-daemon.service
         print_success "Control daemon disabled"
@@ -156,9 +166,22 @@ main() {
     # Remove scripts
     echo "Removing scripts..."
     rm -f "$INSTALL_DIR/redragon_volume_sync.py"
+    rm -f "$INSTALL_DIR/redragon_alsa.py"
+    rm -f "$INSTALL_DIR/redragon_pulse.py"
+    rm -f "$INSTALL_DIR/redragon_hotplug.py"
+    rm -f "$INSTALL_DIR/redragon_cards.py"
+    rm -f "$INSTALL_DIR/redragon_metrics.py"
+    rm -f "$INSTALL_DIR/redragon_config.py"
+    rm -f "$INSTALL_DIR/redragon_state.py"
+    rm -f "$INSTALL_DIR/redragon_notify.py"
     rm -f "$INSTALL_DIR/redragon_daemon.py"
     rm -f "$INSTALL_DIR/redragon_control_daemon.py"
     rm -f "$INSTALL_DIR/redragon-volume"
+    rm -f "$INSTALL_DIR/redragon_client.py"
+    # PATH line added by install.sh
+    if [ -f "$HOME/.profile" ]; then
+        sed -i '/# redragon-hs-companion$/d' "$HOME/.profile"
+    fi
     print_success "Scripts removed"
     
     echo
@@ -167,6 +190,7 @@ main() {
     echo "Removing systemd services..."
     rm -f "$SYSTEMD_DIR/redragon-volume-sync.service"
     rm -f "$SYSTEMD_DIR/redragon-control-daemon.service"
+    rm -f "$SYSTEMD_DIR/redragon-control-daemon.socket"
     systemctl --user daemon-reload
     print_success "Systemd services removed"
     